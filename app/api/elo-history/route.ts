@@ -0,0 +1,88 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { createServerClient } from '@/lib/supabase'
+import { keysetFilter } from '@/lib/keyset'
+
+const PAGE_SIZE = 1000
+
+// Unique order for paging (a plain select stops at the PostgREST row limit)
+const HISTORY_KEYS = ['team_id', 'match_date', 'event_id'] as const
+
+interface HistoryRow {
+  team_id: number
+  event_id: number
+  match_date: string
+  elo_pre: number
+  elo_post: number
+  delta: number
+}
+
+// Rating timelines from elo_history: one (team_id, match_date) index range
+// scan per team, all teams in one query read in pages keyed on
+// (team_id, match_date, event_id)
+// GET /api/elo-history?teams=118,2925&from=2025-08-01
+export async function GET(request: NextRequest) {
+  try {
+    const { searchParams } = new URL(request.url)
+    const teamIds = (searchParams.get('teams') || '')
+      .split(',')
+      .map(id => parseInt(id, 10))
+      .filter(id => !Number.isNaN(id))
+    const from = searchParams.get('from')
+
+    if (teamIds.length === 0) {
+      return NextResponse.json(
+        { error: 'Invalid input' },
+        { status: 400 }
+      )
+    }
+
+    const supabase = createServerClient()
+
+    // Group into one date-ordered timeline per team
+    const history: Record<number, HistoryRow[]> = {}
+    teamIds.forEach(id => {
+      history[id] = []
+    })
+
+    // A failed page fails the request rather than returning truncated timelines
+    let last: HistoryRow | undefined
+    while (true) {
+      let query = supabase
+        .from('elo_history')
+        .select('team_id, event_id, match_date, elo_pre, elo_post, delta')
+        .in('team_id', teamIds)
+      if (from) {
+        query = query.gte('match_date', from)
+      }
+      if (last) {
+        query = query.or(keysetFilter(HISTORY_KEYS, last as unknown as Record<string, unknown>))
+      }
+      const { data: rows, error } = await query
+        .order('team_id', { ascending: true })
+        .order('match_date', { ascending: true })
+        .order('event_id', { ascending: true })
+        .limit(PAGE_SIZE)
+
+      if (error) {
+        throw error
+      }
+
+      const page = (rows || []) as HistoryRow[]
+      page.forEach(row => {
+        history[row.team_id].push(row)
+      })
+
+      if (page.length < PAGE_SIZE) break
+
+      last = page[page.length - 1]
+    }
+
+    return NextResponse.json({ history })
+  } catch (error) {
+    console.error('Error loading ELO history:', error)
+    return NextResponse.json(
+      { error: 'Failed to load ELO history' },
+      { status: 500 }
+    )
+  }
+}
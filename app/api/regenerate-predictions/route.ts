@@ -1,32 +1,131 @@
-import { NextResponse } from 'next/server'
+import { NextRequest, NextResponse } from 'next/server'
 import { createServerClient } from '@/lib/supabase'
+import { keysetFilter } from '@/lib/keyset'
+
+type Prediction = ReturnType<typeof calculateMatchPrediction>
+
+interface StoredPrediction {
+  event_id: number
+  home_elo: number
+  away_elo: number
+  [key: string]: unknown
+}
+
+// Columns that decide whether a stored prediction is out of date (scripts/fixture_index.py)
+const PREDICTION_COLUMNS = [
+  'home_win_prob', 'draw_prob', 'away_win_prob', 'home_or_draw_prob', 'away_or_draw_prob',
+  'recommended_bet', 'recommended_prob', 'confidence'
+] as const
+
+const PAGE_SIZE = 1000
+const WRITE_BATCH_SIZE = 500
 
 interface PendingMatch {
   id: number
   event_id: number
+  match_date: string
   home_team_name: string
   away_team_name: string
-  [key: string]: unknown
 }
 
+// Unique order for paging the pending matches (match_date alone has ties)
+const MATCH_KEYS = ['match_date', 'id'] as const
+
+// Draw model (scripts/elo_params.py DEFAULT_DRAW_MODEL); parameters.draw_model overrides it
+const DEFAULT_DRAW_MODEL = {
+  base: 0.2494,
+  closeness_range: 200,
+  closeness_scale: 2000,
+  elite_threshold: 1650,
+  elite_bonus: 0.08,
+  defensive_scale: 0.06,
+  min: 0.15,
+  max: 0.40
+}
+
+type DrawModel = typeof DEFAULT_DRAW_MODEL
+
+const DEFAULT_INITIAL_ELO = 1500
+const DEFAULT_HOME_ADVANTAGE = 50
+const DEFAULT_DEFENSIVE_SCORE = 0.5
+
 /**
- * Calculate draw probability based on ELO difference
+ * Calculate draw probability (scripts/prediction_kernel.py draw_probabilities) from:
+ * - ELO difference (closer teams = higher draw %)
+ * - Team quality (elite teams = more tactical/defensive = higher draw %)
+ * - Defensive capabilities
  */
-function calculateDrawProbability(homeElo: number, awayElo: number): number {
-  const baseDraw = 0.2494 // Base draw percentage from historical data
+function calculateDrawProbability(
+  homeElo: number,
+  awayElo: number,
+  avgDefense: number,
+  drawModel: DrawModel
+): number {
+  const range = drawModel.closeness_range
   const eloDiff = Math.abs(homeElo - awayElo)
-  const closenessBonus = Math.max(0, (200 - Math.min(eloDiff, 200)) / 2000)
-  const drawProb = baseDraw * (1 + closenessBonus)
-  return Math.max(0.15, Math.min(0.40, drawProb)) // Cap between 15% and 40%
+  const closenessBonus = Math.max(0, (range - Math.min(eloDiff, range)) / drawModel.closeness_scale)
+  const eliteBonus =
+    homeElo > drawModel.elite_threshold && awayElo > drawModel.elite_threshold ? drawModel.elite_bonus : 0
+  const defensiveBonus = (avgDefense - 0.5) * drawModel.defensive_scale
+  const drawProb = drawModel.base * (1 + closenessBonus + eliteBonus + defensiveBonus)
+  return Math.max(drawModel.min, Math.min(drawModel.max, drawProb))
+}
+
+/**
+ * Team -> pending fixture event ids
+ */
+function buildFixtureIndex(matches: PendingMatch[]): Map<string, number[]> {
+  const index = new Map<string, number[]>()
+  for (const match of matches) {
+    for (const team of [match.home_team_name, match.away_team_name]) {
+      const eventIds = index.get(team)
+      if (eventIds) eventIds.push(match.event_id)
+      else index.set(team, [match.event_id])
+    }
+  }
+  return index
 }
 
 /**
- * Calculate match prediction with all probabilities
+ * Teams whose current ELO differs from the one their stored predictions used
+ */
+function staleTeams(
+  matches: PendingMatch[],
+  stored: Map<number, StoredPrediction>,
+  currentElos: Record<string, number>,
+  initialElo: number
+): Set<string> {
+  const teams = new Set<string>()
+  for (const match of matches) {
+    const row = stored.get(match.event_id)
+    if (!row) continue
+    if (Number(row.home_elo) !== (currentElos[match.home_team_name] ?? initialElo)) teams.add(match.home_team_name)
+    if (Number(row.away_elo) !== (currentElos[match.away_team_name] ?? initialElo)) teams.add(match.away_team_name)
+  }
+  return teams
+}
+
+function predictionChanged(old: StoredPrediction | undefined, fresh: Prediction): boolean {
+  if (!old) return true
+  return PREDICTION_COLUMNS.some((column) => {
+    const value = fresh[column]
+    return typeof value === 'number' ? Number(old[column]) !== value : old[column] !== value
+  })
+}
+
+function elosChanged(old: StoredPrediction | undefined, homeElo: number, awayElo: number): boolean {
+  return !old || Number(old.home_elo) !== homeElo || Number(old.away_elo) !== awayElo
+}
+
+/**
+ * Calculate match prediction with all probabilities (scripts/prediction_kernel.py predict_batch)
  */
 function calculateMatchPrediction(
   homeElo: number,
   awayElo: number,
-  homeAdvantage: number
+  homeAdvantage: number,
+  avgDefense: number,
+  drawModel: DrawModel
 ): {
   home_win_prob: number
   draw_prob: number
@@ -39,22 +138,14 @@ function calculateMatchPrediction(
 } {
   // 1. Calculate standard ELO probabilities (with home advantage)
   const expectedHome = 1 / (1 + Math.pow(10, (awayElo - homeElo - homeAdvantage) / 400))
-  const expectedAway = 1 - expectedHome
 
   // 2. Calculate draw probability
-  const drawProb = calculateDrawProbability(homeElo, awayElo)
+  const drawProb = calculateDrawProbability(homeElo, awayElo, avgDefense, drawModel)
 
-  // 3. Adjust home/away probabilities to account for draws
+  // 3. Share what is left after the draw in proportion to the ELO expectation
   const remainingProb = 1 - drawProb
-  let homeWinProb = expectedHome * remainingProb
-  let awayWinProb = expectedAway * remainingProb
-
-  // Ensure probabilities sum to 1.0
-  const total = homeWinProb + drawProb + awayWinProb
-  if (Math.abs(total - 1.0) > 0.001) {
-    homeWinProb /= total
-    awayWinProb /= total
-  }
+  const homeWinProb = expectedHome * remainingProb
+  const awayWinProb = (1 - expectedHome) * remainingProb
 
   // 4. Calculate double chance probabilities
   const homeOrDraw = homeWinProb + drawProb
@@ -72,9 +163,9 @@ function calculateMatchPrediction(
     'Away Win/Draw': awayOrDraw
   }
 
-  // Get best single outcome
-  const bestSingle = Object.entries(singleOutcomes).reduce((a, b) => a[1] > b[1] ? a : b)
-  const bestDouble = Object.entries(doubleChance).reduce((a, b) => a[1] > b[1] ? a : b)
+  // Get best single outcome (ties go to the first, Home > Draw > Away)
+  const bestSingle = Object.entries(singleOutcomes).reduce((a, b) => a[1] >= b[1] ? a : b)
+  const bestDouble = Object.entries(doubleChance).reduce((a, b) => a[1] >= b[1] ? a : b)
 
   // Prefer single outcome if it's >= 40%, otherwise use double chance if > 60%
   let recommended: [string, number]
@@ -98,79 +189,161 @@ function calculateMatchPrediction(
   }
 }
 
-export async function POST() {
+/**
+ * Bring predictions in line with current ELOs. Only the pending fixtures of
+ * the teams in the request body ({ teams: [...] }), or of teams whose rating
+ * differs from the one their stored predictions used, are recomputed, and only
+ * rows whose probabilities or ELOs changed are upserted (a row whose
+ * probabilities round the same still gets the new ELOs, so its teams are not
+ * seen as stale again). { full: true } recomputes every pending fixture.
+ */
+export async function POST(request: NextRequest) {
   try {
     const supabase = createServerClient()
+    const body = await request.json().catch(() => ({})) as { teams?: string[]; full?: boolean }
 
-    // 1. Get home advantage parameter
-    const { data: params, error: paramsError } = await supabase
-      .from('parameters')
-      .select('*')
+    // 1. Get the initial ELO, home advantage, draw model and defensive scores
+    const paramsDict: Record<string, unknown> = {}
+    let from = 0
 
-    if (paramsError) throw new Error(`Failed to fetch parameters: ${paramsError.message}`)
+    while (true) {
+      const { data: batch, error: paramsError } = await supabase
+        .from('parameters')
+        .select('param_key, param_value')
+        .order('param_key', { ascending: true })
+        .range(from, from + PAGE_SIZE - 1)
 
-    const paramsDict: Record<string, unknown> = {}
-    params?.forEach(param => {
-      paramsDict[param.param_key] = param.param_value
-    })
+      if (paramsError) throw new Error(`Failed to fetch parameters: ${paramsError.message}`)
 
-    const homeAdvantage = (paramsDict['baseline_stats'] as { avg_home_advantage?: number })?.avg_home_advantage || 46.8
+      if (!batch || batch.length === 0) break
 
-    // 2. Get current ELOs from teams table
-    const { data: teams, error: teamsError } = await supabase
-      .from('teams')
-      .select('name, current_elo')
+      batch.forEach(param => {
+        paramsDict[param.param_key] = param.param_value
+      })
 
-    if (teamsError) throw new Error(`Failed to fetch teams: ${teamsError.message}`)
+      if (batch.length < PAGE_SIZE) break
 
+      from += PAGE_SIZE
+    }
+
+    const initialElo = Number(paramsDict['initial_elo'] ?? DEFAULT_INITIAL_ELO)
+
+    const baselineStats = (paramsDict['baseline_stats'] || {}) as {
+      avg_home_advantage?: number
+      team_defensive_quality?: Record<string, { defensive_score?: number }>
+    }
+    const homeAdvantage = baselineStats.avg_home_advantage ?? DEFAULT_HOME_ADVANTAGE
+    const drawModel: DrawModel = {
+      ...DEFAULT_DRAW_MODEL,
+      ...(paramsDict['draw_model'] as Partial<DrawModel> | undefined)
+    }
+    const defensiveScore = (team: string) =>
+      baselineStats.team_defensive_quality?.[team]?.defensive_score ?? DEFAULT_DEFENSIVE_SCORE
+
+    // 2. Get current ELOs from teams table
     const currentElos: Record<string, number> = {}
-    teams?.forEach(team => {
-      currentElos[team.name] = team.current_elo
-    })
+    from = 0
+
+    while (true) {
+      const { data: batch, error: teamsError } = await supabase
+        .from('teams')
+        .select('name, current_elo')
+        .order('name', { ascending: true })
+        .range(from, from + PAGE_SIZE - 1)
+
+      if (teamsError) throw new Error(`Failed to fetch teams: ${teamsError.message}`)
+
+      if (!batch || batch.length === 0) break
+
+      batch.forEach(team => {
+        currentElos[team.name] = Number(team.current_elo)
+      })
+
+      if (batch.length < PAGE_SIZE) break
+
+      from += PAGE_SIZE
+    }
 
     // 3. Get all pending matches (is_completed = false)
-    // Fetch in batches to handle large datasets
-    let allPendingMatches: PendingMatch[] = []
-    let from = 0
-    const batchSize = 1000
+    // Fetch in pages keyed on (match_date, id) to handle large datasets
+    const pendingMatches: PendingMatch[] = []
+    let last: PendingMatch | undefined
 
     while (true) {
-      const { data: batch, error: matchesError } = await supabase
+      let query = supabase
         .from('matches')
-        .select('*')
-        .eq('season_year', 2025)
+        .select('id, event_id, match_date, home_team_name, away_team_name')
         .eq('is_completed', false)
+      if (last) {
+        query = query.or(keysetFilter(MATCH_KEYS, last as unknown as Record<string, unknown>))
+      }
+      const { data: batch, error: matchesError } = await query
         .order('match_date', { ascending: true })
-        .range(from, from + batchSize - 1)
+        .order('id', { ascending: true })
+        .limit(PAGE_SIZE)
 
       if (matchesError) throw new Error(`Failed to fetch pending matches: ${matchesError.message}`)
 
       if (!batch || batch.length === 0) break
 
-      allPendingMatches = allPendingMatches.concat(batch as PendingMatch[])
+      pendingMatches.push(...(batch as PendingMatch[]))
 
-      if (batch.length < batchSize) break
+      if (batch.length < PAGE_SIZE) break
 
-      from += batchSize
+      last = batch[batch.length - 1] as PendingMatch
     }
 
-    const pendingMatches = allPendingMatches
+    // 4. Get the stored predictions
+    const stored = new Map<number, StoredPrediction>()
+    from = 0
 
-    // 4. Delete all existing predictions
-    await supabase.from('predictions').delete().neq('id', 0)
+    while (true) {
+      const { data: batch, error: predictionsError } = await supabase
+        .from('predictions')
+        .select(['event_id', 'home_elo', 'away_elo', ...PREDICTION_COLUMNS].join(', '))
+        .order('event_id', { ascending: true })
+        .range(from, from + PAGE_SIZE - 1)
+
+      if (predictionsError) throw new Error(`Failed to fetch predictions: ${predictionsError.message}`)
+
+      if (!batch || batch.length === 0) break
+
+      for (const row of batch as unknown as StoredPrediction[]) stored.set(row.event_id, row)
+
+      if (batch.length < PAGE_SIZE) break
+
+      from += PAGE_SIZE
+    }
+
+    // 5. Fixtures to recompute: the changed teams' fixtures plus any without a prediction
+    let targets = pendingMatches
+    if (!body.full) {
+      const index = buildFixtureIndex(pendingMatches)
+      const changedTeams = body.teams?.length ? new Set(body.teams) : staleTeams(pendingMatches, stored, currentElos, initialElo)
+      const eventIds = new Set<number>()
+      changedTeams.forEach((team) => index.get(team)?.forEach((eventId) => eventIds.add(eventId)))
+      targets = pendingMatches.filter((m) => eventIds.has(m.event_id) || !stored.has(m.event_id))
+    }
 
-    // 5. Generate predictions for each pending match
-    const predictionsToInsert = []
+    // 6. Predict them and keep the rows whose probabilities or ELOs changed
+    const predictionsToUpsert = []
+    let predictionsChanged = 0
 
-    for (const match of pendingMatches || []) {
+    for (const match of targets) {
       const homeTeam = match.home_team_name
       const awayTeam = match.away_team_name
-      const homeElo = currentElos[homeTeam] || 1500
-      const awayElo = currentElos[awayTeam] || 1500
+      const homeElo = currentElos[homeTeam] ?? initialElo
+      const awayElo = currentElos[awayTeam] ?? initialElo
 
-      const prediction = calculateMatchPrediction(homeElo, awayElo, homeAdvantage)
+      const avgDefense = (defensiveScore(homeTeam) + defensiveScore(awayTeam)) / 2
 
-      predictionsToInsert.push({
+      const prediction = calculateMatchPrediction(homeElo, awayElo, homeAdvantage, avgDefense, drawModel)
+      const old = stored.get(match.event_id)
+      const changed = predictionChanged(old, prediction)
+      if (!changed && !elosChanged(old, homeElo, awayElo)) continue
+      if (changed) predictionsChanged++
+
+      predictionsToUpsert.push({
         match_id: match.id,
         event_id: match.event_id,
         home_elo: homeElo,
@@ -179,23 +352,48 @@ export async function POST() {
       })
     }
 
-    // 6. Insert all predictions in batches
-    if (predictionsToInsert.length > 0) {
-      const insertBatchSize = 500
-      for (let i = 0; i < predictionsToInsert.length; i += insertBatchSize) {
-        const batch = predictionsToInsert.slice(i, i + insertBatchSize)
-        const { error: insertError } = await supabase
-          .from('predictions')
-          .insert(batch)
+    // 7. Upsert the changed rows on event_id in batches
+    for (let i = 0; i < predictionsToUpsert.length; i += WRITE_BATCH_SIZE) {
+      const batch = predictionsToUpsert.slice(i, i + WRITE_BATCH_SIZE)
+      const { error: upsertError } = await supabase
+        .from('predictions')
+        .upsert(batch, { onConflict: 'event_id' })
 
-        if (insertError) throw new Error(`Failed to insert predictions batch: ${insertError.message}`)
-      }
+      if (upsertError) throw new Error(`Failed to upsert predictions batch: ${upsertError.message}`)
+    }
+
+    // 8. Delete predictions of matches that have been completed
+    const pendingIds = new Set(pendingMatches.map((m) => m.event_id))
+    const candidates = Array.from(stored.keys()).filter((eventId) => !pendingIds.has(eventId))
+    const finished: number[] = []
+    for (let i = 0; i < candidates.length; i += WRITE_BATCH_SIZE) {
+      const { data: completed, error: completedError } = await supabase
+        .from('matches')
+        .select('event_id')
+        .eq('is_completed', true)
+        .in('event_id', candidates.slice(i, i + WRITE_BATCH_SIZE))
+
+      if (completedError) throw new Error(`Failed to fetch completed matches: ${completedError.message}`)
+
+      completed?.forEach((m) => finished.push(m.event_id))
+    }
+
+    for (let i = 0; i < finished.length; i += WRITE_BATCH_SIZE) {
+      const { error: deleteError } = await supabase
+        .from('predictions')
+        .delete()
+        .in('event_id', finished.slice(i, i + WRITE_BATCH_SIZE))
+
+      if (deleteError) throw new Error(`Failed to delete finished predictions: ${deleteError.message}`)
     }
 
     return NextResponse.json({
       success: true,
-      predictions_generated: predictionsToInsert.length,
-      message: `Successfully generated ${predictionsToInsert.length} predictions`
+      fixtures_recomputed: targets.length,
+      predictions_generated: predictionsChanged,
+      elos_refreshed: predictionsToUpsert.length - predictionsChanged,
+      predictions_deleted: finished.length,
+      message: `Recomputed ${targets.length} fixtures, updated ${predictionsChanged} predictions`
     })
 
   } catch (error) {
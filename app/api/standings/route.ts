@@ -0,0 +1,50 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { createServerClient } from '@/lib/supabase'
+
+// League tables from the standings table (kept up to date by apply_score),
+// already in table order, with every team's current ELO
+// GET /api/standings?league=English%20Premier%20League
+export async function GET(request: NextRequest) {
+  try {
+    const { searchParams } = new URL(request.url)
+    const league = searchParams.get('league')
+
+    const supabase = createServerClient()
+
+    let query = supabase.from('standings').select('*')
+    if (league) {
+      query = query.eq('league_name', league)
+    }
+
+    const [
+      { data: standings, error: standingsError },
+      { data: teams, error: teamsError }
+    ] = await Promise.all([
+      query
+        .order('points', { ascending: false })
+        .order('goal_difference', { ascending: false })
+        .order('goals_for', { ascending: false }),
+      supabase.from('teams').select('name, current_elo')
+    ])
+
+    if (standingsError) {
+      throw standingsError
+    }
+    if (teamsError) {
+      throw teamsError
+    }
+
+    const current_elos: Record<string, number> = {}
+    teams?.forEach(team => {
+      current_elos[team.name] = team.current_elo
+    })
+
+    return NextResponse.json({ standings: standings || [], current_elos })
+  } catch (error) {
+    console.error('Error loading standings:', error)
+    return NextResponse.json(
+      { error: 'Failed to load standings' },
+      { status: 500 }
+    )
+  }
+}
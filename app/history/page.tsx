@@ -2,13 +2,14 @@
 
 import { useEffect, useState } from 'react'
 import { Card, CardHeader, CardTitle, CardContent } from '@/components/ui/Card'
-import { Season2025Data } from '@/types'
+import { EloHistoryEntry, Season2025Data } from '@/types'
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts'
 
 export default function HistoryPage() {
   const [loading, setLoading] = useState(true)
   const [data, setData] = useState<Season2025Data | null>(null)
   const [selectedTeam, setSelectedTeam] = useState<string>('')
+  const [history, setHistory] = useState<EloHistoryEntry[] | null>(null)
 
   useEffect(() => {
     fetch('/api/data')
@@ -23,6 +24,22 @@ export default function HistoryPage() {
       .catch(() => setLoading(false))
   }, [])
 
+  // The selected team's timeline from elo_history (one index range scan)
+  useEffect(() => {
+    if (!data || !selectedTeam) return
+    const first = data.completed_matches.find(
+      m => m.homeTeamName === selectedTeam || m.awayTeamName === selectedTeam
+    )
+    if (!first) return
+    const teamId = first.homeTeamName === selectedTeam ? first.homeTeamId : first.awayTeamId
+
+    setHistory(null)
+    fetch(`/api/elo-history?teams=${teamId}&from=${encodeURIComponent(data.completed_matches[0].date)}`)
+      .then(res => (res.ok ? res.json() : null))
+      .then(d => setHistory(d?.history?.[teamId] ?? null))
+      .catch(() => setHistory(null))
+  }, [data, selectedTeam])
+
   if (loading || !data) {
     return <div className="container mx-auto px-4 py-12"><div className="text-2xl font-black uppercase">Loading...</div></div>
   }
@@ -31,14 +48,27 @@ export default function HistoryPage() {
     data.completed_matches.flatMap(m => [m.homeTeamName, m.awayTeamName])
   )).sort()
 
-  const teamMatches = data.completed_matches
-    .filter(m => m.homeTeamName === selectedTeam || m.awayTeamName === selectedTeam)
-    .map((m, idx) => ({
-      match: idx + 1,
-      elo: m.homeTeamName === selectedTeam ? m.home_elo_post : m.away_elo_post,
-      opponent: m.homeTeamName === selectedTeam ? m.awayTeamName : m.homeTeamName,
-      result: m.homeTeamName === selectedTeam ? m.home_result : m.away_result
-    }))
+  const matchesByEvent = new Map(data.completed_matches.map(m => [m.eventId, m]))
+
+  // Without elo_history (older database): rebuild the timeline from the matches
+  const teamMatches = history && history.length > 0
+    ? history.map((h, idx) => {
+        const m = matchesByEvent.get(h.event_id)
+        return {
+          match: idx + 1,
+          elo: Number(h.elo_post),
+          opponent: m ? (m.homeTeamName === selectedTeam ? m.awayTeamName : m.homeTeamName) : '',
+          result: m ? (m.homeTeamName === selectedTeam ? m.home_result : m.away_result) : undefined
+        }
+      })
+    : data.completed_matches
+      .filter(m => m.homeTeamName === selectedTeam || m.awayTeamName === selectedTeam)
+      .map((m, idx) => ({
+        match: idx + 1,
+        elo: m.homeTeamName === selectedTeam ? m.home_elo_post : m.away_elo_post,
+        opponent: m.homeTeamName === selectedTeam ? m.awayTeamName : m.homeTeamName,
+        result: m.homeTeamName === selectedTeam ? m.home_result : m.away_result
+      }))
 
   return (
     <div className="container mx-auto px-2 md:px-4 py-4 md:py-8">
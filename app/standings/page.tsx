@@ -5,12 +5,13 @@ import { Card, CardHeader, CardTitle, CardContent } from '@/components/ui/Card'
 import { Badge } from '@/components/ui/Badge'
 import { Table, TableHeader, TableBody, TableRow, TableHead, TableCell } from '@/components/ui/Table'
 import { getLeagueColor } from '@/lib/utils'
-import { Season2025Data } from '@/types'
+import { ProcessedMatch, StandingsEntry } from '@/types'
 import { TrendingUp, TrendingDown, Minus } from 'lucide-react'
 
 interface StandingsRow {
   position: number
   team: string
+  league: string
   played: number
   won: number
   drawn: number
@@ -19,117 +20,123 @@ interface StandingsRow {
   goalsAgainst: number
   goalDifference: number
   points: number
+  streak: string
   elo: number
   eloRank: number
 }
 
+function fromEntries(entries: StandingsEntry[], elos: Record<string, number>): StandingsRow[] {
+  return entries.map(entry => ({
+    position: 0,
+    team: entry.team_name,
+    league: entry.league_name,
+    played: entry.played,
+    won: entry.won,
+    drawn: entry.drawn,
+    lost: entry.lost,
+    goalsFor: entry.goals_for,
+    goalsAgainst: entry.goals_against,
+    goalDifference: entry.goal_difference,
+    points: entry.points,
+    streak: entry.streak_result ? `${entry.streak_result}${entry.streak_length}` : '-',
+    elo: elos[entry.team_name] || 1500,
+    eloRank: 0
+  }))
+}
+
+// Without the standings table (older database): aggregate the completed matches
+function fromMatches(matches: ProcessedMatch[], elos: Record<string, number>): StandingsRow[] {
+  const teamStats: Record<string, StandingsRow> = {}
+
+  matches.forEach(match => {
+    const homeScore = match.homeTeamScore || 0
+    const awayScore = match.awayTeamScore || 0
+    const sides: [string, number, number][] = [
+      [match.homeTeamName, homeScore, awayScore],
+      [match.awayTeamName, awayScore, homeScore]
+    ]
+
+    sides.forEach(([team, scored, conceded]) => {
+      if (!teamStats[team]) {
+        teamStats[team] = {
+          position: 0,
+          team,
+          league: match.leagueName,
+          played: 0,
+          won: 0,
+          drawn: 0,
+          lost: 0,
+          goalsFor: 0,
+          goalsAgainst: 0,
+          goalDifference: 0,
+          points: 0,
+          streak: '-',
+          elo: elos[team] || 1500,
+          eloRank: 0
+        }
+      }
+      const row = teamStats[team]
+      const result = scored > conceded ? 'W' : scored < conceded ? 'L' : 'D'
+
+      row.played++
+      row.goalsFor += scored
+      row.goalsAgainst += conceded
+      row.goalDifference = row.goalsFor - row.goalsAgainst
+      if (result === 'W') {
+        row.won++
+        row.points += 3
+      } else if (result === 'D') {
+        row.drawn++
+        row.points++
+      } else {
+        row.lost++
+      }
+      row.streak = row.streak[0] === result ? `${result}${parseInt(row.streak.slice(1), 10) + 1}` : `${result}1`
+    })
+  })
+
+  return Object.values(teamStats)
+}
+
 export default function StandingsPage() {
   const [loading, setLoading] = useState(true)
-  const [data, setData] = useState<Season2025Data | null>(null)
+  const [rows, setRows] = useState<StandingsRow[] | null>(null)
   const [selectedLeague, setSelectedLeague] = useState('All Leagues')
 
   useEffect(() => {
-    fetch('/api/data')
-      .then(res => res.json())
+    fetch('/api/standings')
+      .then(res => (res.ok ? res.json() : null))
       .then(d => {
-        setData(d.season2025)
-        setLoading(false)
+        if (d?.standings?.length > 0) {
+          setRows(fromEntries(d.standings, d.current_elos))
+          setLoading(false)
+          return
+        }
+        return fetch('/api/data')
+          .then(res => res.json())
+          .then(data => {
+            setRows(fromMatches(data.season2025.completed_matches, data.season2025.current_elos))
+            setLoading(false)
+          })
       })
       .catch(() => setLoading(false))
   }, [])
 
-  if (loading || !data) {
+  if (loading || !rows) {
     return <div className="container mx-auto px-4 py-12"><div className="text-2xl font-black uppercase">Loading...</div></div>
   }
 
-  // Calculate standings from completed matches
-  const completedMatches = data.completed_matches
-
   // Get unique leagues
-  const leagues = ['All Leagues', ...Array.from(new Set(completedMatches.map(m => m.leagueName)))]
-
-  // Filter matches by selected league
-  const filteredMatches = selectedLeague === 'All Leagues'
-    ? completedMatches
-    : completedMatches.filter(m => m.leagueName === selectedLeague)
-
-  // Calculate standings
-  const teamStats: Record<string, StandingsRow> = {}
-
-  filteredMatches.forEach(match => {
-    const homeTeam = match.homeTeamName
-    const awayTeam = match.awayTeamName
-    const homeScore = match.homeTeamScore || 0
-    const awayScore = match.awayTeamScore || 0
+  const leagues = ['All Leagues', ...Array.from(new Set(rows.map(r => r.league))).sort()]
 
-    // Initialize team stats if not exists
-    if (!teamStats[homeTeam]) {
-      teamStats[homeTeam] = {
-        position: 0,
-        team: homeTeam,
-        played: 0,
-        won: 0,
-        drawn: 0,
-        lost: 0,
-        goalsFor: 0,
-        goalsAgainst: 0,
-        goalDifference: 0,
-        points: 0,
-        elo: data.current_elos[homeTeam] || 1500,
-        eloRank: 0
-      }
-    }
-    if (!teamStats[awayTeam]) {
-      teamStats[awayTeam] = {
-        position: 0,
-        team: awayTeam,
-        played: 0,
-        won: 0,
-        drawn: 0,
-        lost: 0,
-        goalsFor: 0,
-        goalsAgainst: 0,
-        goalDifference: 0,
-        points: 0,
-        elo: data.current_elos[awayTeam] || 1500,
-        eloRank: 0
-      }
-    }
-
-    // Update stats
-    teamStats[homeTeam].played++
-    teamStats[awayTeam].played++
-    teamStats[homeTeam].goalsFor += homeScore
-    teamStats[homeTeam].goalsAgainst += awayScore
-    teamStats[awayTeam].goalsFor += awayScore
-    teamStats[awayTeam].goalsAgainst += homeScore
-
-    if (homeScore > awayScore) {
-      // Home win
-      teamStats[homeTeam].won++
-      teamStats[homeTeam].points += 3
-      teamStats[awayTeam].lost++
-    } else if (homeScore < awayScore) {
-      // Away win
-      teamStats[awayTeam].won++
-      teamStats[awayTeam].points += 3
-      teamStats[homeTeam].lost++
-    } else {
-      // Draw
-      teamStats[homeTeam].drawn++
-      teamStats[homeTeam].points++
-      teamStats[awayTeam].drawn++
-      teamStats[awayTeam].points++
-    }
-  })
-
-  // Calculate goal difference
-  Object.values(teamStats).forEach(team => {
-    team.goalDifference = team.goalsFor - team.goalsAgainst
-  })
+  // Filter teams by selected league
+  const filteredRows = (selectedLeague === 'All Leagues'
+    ? rows
+    : rows.filter(r => r.league === selectedLeague)
+  ).map(r => ({ ...r }))
 
   // Sort by points, then goal difference, then goals for
-  const standings = Object.values(teamStats).sort((a, b) => {
+  const standings = filteredRows.sort((a, b) => {
     if (b.points !== a.points) return b.points - a.points
     if (b.goalDifference !== a.goalDifference) return b.goalDifference - a.goalDifference
     return b.goalsFor - a.goalsFor
@@ -141,12 +148,9 @@ export default function StandingsPage() {
   })
 
   // Get ELO rankings
-  const eloRankings = Object.values(teamStats).sort((a, b) => b.elo - a.elo)
+  const eloRankings = [...standings].sort((a, b) => b.elo - a.elo)
   eloRankings.forEach((team, index) => {
-    const teamInStandings = standings.find(t => t.team === team.team)
-    if (teamInStandings) {
-      teamInStandings.eloRank = index + 1
-    }
+    team.eloRank = index + 1
   })
 
   return (
@@ -192,6 +196,7 @@ export default function StandingsPage() {
                   <TableHead className="text-center hidden md:table-cell">GA</TableHead>
                   <TableHead className="text-center">GD</TableHead>
                   <TableHead className="text-center whitespace-nowrap">Pts</TableHead>
+                  <TableHead className="text-center hidden md:table-cell">Streak</TableHead>
                   <TableHead className="text-center hidden lg:table-cell">ELO</TableHead>
                   <TableHead className="text-center hidden lg:table-cell whitespace-nowrap">ELO Rank</TableHead>
                   <TableHead className="text-center hidden xl:table-cell">Diff</TableHead>
@@ -216,6 +221,7 @@ export default function StandingsPage() {
                         </span>
                       </TableCell>
                       <TableCell className="text-center font-black text-sm md:text-lg">{team.points}</TableCell>
+                      <TableCell className="text-center font-bold hidden md:table-cell">{team.streak}</TableCell>
                       <TableCell className="text-center font-bold hidden lg:table-cell">{Math.round(team.elo)}</TableCell>
                       <TableCell className="text-center font-bold hidden lg:table-cell">{team.eloRank}</TableCell>
                       <TableCell className="text-center hidden xl:table-cell">
@@ -248,7 +254,7 @@ export default function StandingsPage() {
         <h3 className="font-black uppercase mb-2 text-sm md:text-base">Legend</h3>
         <div className="space-y-1 text-xs md:text-sm font-bold">
           <div><span className="font-black">P</span> = Played, <span className="font-black">W</span> = Won, <span className="font-black">D</span> = Drawn, <span className="font-black">L</span> = Lost</div>
-          <div><span className="font-black">GF</span> = Goals For, <span className="font-black">GA</span> = Goals Against, <span className="font-black">GD</span> = Goal Difference</div>
+          <div><span className="font-black">GF</span> = Goals For, <span className="font-black">GA</span> = Goals Against, <span className="font-black">GD</span> = Goal Difference, <span className="font-black">Streak</span> = Current run of results (W3 = three wins)</div>
           <div><span className="font-black">Diff</span> = Difference between actual position and ELO-predicted position</div>
           <div className="flex flex-col md:flex-row items-start md:items-center gap-2 md:gap-4 mt-2">
             <div className="flex items-center text-green-600">
@@ -0,0 +1,28 @@
+// Keyset pagination for PostgREST reads (scripts/supabase_stream.py): order by
+// a unique key and ask for the rows after the last key seen. Offset paging
+// (.range) over a non-unique order column can skip or repeat tied rows across
+// page boundaries.
+
+/**
+ * A filter value quoted for PostgREST logic trees (timestamps contain ':' and '+')
+ */
+function quote(value: unknown): string {
+  const text = String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"')
+  return `"${text}"`
+}
+
+/**
+ * PostgREST or=(...) body selecting rows strictly after `last` in key order:
+ * k0 > v0, or k0 = v0 and k1 > v1, ...
+ */
+export function keysetFilter(keys: readonly string[], last: Record<string, unknown>): string {
+  return keys
+    .map((key, i) => {
+      const terms = [
+        ...keys.slice(0, i).map((k) => `${k}.eq.${quote(last[k])}`),
+        `${key}.gt.${quote(last[key])}`
+      ]
+      return terms.length === 1 ? terms[0] : `and(${terms.join(',')})`
+    })
+    .join(',')
+}
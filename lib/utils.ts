@@ -101,12 +101,12 @@ export function calculatePredictionAccuracy(
     if (pred.recommended_bet === actualResult) {
       correct++
     } else if (
-      pred.recommended_bet === 'Home/Draw' &&
+      pred.recommended_bet === 'Home Win/Draw' &&
       (actualResult === 'Home Win' || actualResult === 'Draw')
     ) {
       correct++
     } else if (
-      pred.recommended_bet === 'Away/Draw' &&
+      pred.recommended_bet === 'Away Win/Draw' &&
       (actualResult === 'Away Win' || actualResult === 'Draw')
     ) {
       correct++
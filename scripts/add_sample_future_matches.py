@@ -8,6 +8,9 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from supabase import create_client
 
+from elo_params import parameters_from_rows
+from prediction_kernel import predict_fixtures
+
 load_dotenv('.env.local')
 
 supabase = create_client(
@@ -114,63 +117,23 @@ if matches_to_insert:
     # Now regenerate predictions
     print("\nRegenerating predictions...")
 
-    # Get home advantage
-    params = supabase.table('parameters').select('*').execute()
-    params_dict = {p['param_key']: p['param_value'] for p in params.data}
-    home_advantage = params_dict.get('baseline_stats', {}).get('avg_home_advantage', 46.8)
+    # Get model parameters
+    params_response = supabase.table('parameters').select('*').execute()
+    params = parameters_from_rows(params_response.data)
 
     # Get current ELOs
     current_elos = {team['name']: team['current_elo'] for team in teams_response.data}
 
-    # Generate predictions
-    predictions = []
-    for match in matches_to_insert:
-        home_elo = current_elos.get(match['home_team_name'], 1500)
-        away_elo = current_elos.get(match['away_team_name'], 1500)
-
-        # Basic prediction calculation
-        expected_home = 1 / (1 + 10 ** ((away_elo - home_elo - home_advantage) / 400))
-        base_draw = 0.2494
-        elo_diff = abs(home_elo - away_elo)
-        closeness_bonus = max(0, (200 - min(elo_diff, 200)) / 2000)
-        draw_prob = max(0.15, min(0.40, base_draw * (1 + closeness_bonus)))
-
-        remaining = 1 - draw_prob
-        home_win_prob = expected_home * remaining
-        away_win_prob = (1 - expected_home) * remaining
-
-        home_or_draw = home_win_prob + draw_prob
-        away_or_draw = away_win_prob + draw_prob
-
-        # Determine recommendation
-        if home_win_prob >= 0.40:
-            recommended = ('Home Win', home_win_prob)
-        elif away_win_prob >= 0.40:
-            recommended = ('Away Win', away_win_prob)
-        elif draw_prob >= 0.40:
-            recommended = ('Draw', draw_prob)
-        elif home_or_draw > 0.60:
-            recommended = ('Home Win/Draw', home_or_draw)
-        elif away_or_draw > 0.60:
-            recommended = ('Away Win/Draw', away_or_draw)
-        else:
-            recommended = ('Home Win' if home_win_prob > away_win_prob else 'Away Win',
-                          max(home_win_prob, away_win_prob))
-
-        predictions.append({
+    # Predict the new matches in one batch
+    predictions = [
+        {
             'event_id': match['event_id'],
             'match_id': None,  # Will be populated after match is inserted
-            'home_elo': home_elo,
-            'away_elo': away_elo,
-            'home_win_prob': round(home_win_prob, 4),
-            'draw_prob': round(draw_prob, 4),
-            'away_win_prob': round(away_win_prob, 4),
-            'home_or_draw_prob': round(home_or_draw, 4),
-            'away_or_draw_prob': round(away_or_draw, 4),
-            'recommended_bet': recommended[0],
-            'recommended_prob': round(recommended[1], 4),
-            'confidence': 'High' if recommended[1] > 0.6 else ('Medium' if recommended[1] > 0.5 else 'Low')
-        })
+            **prediction
+        }
+        for match, prediction in zip(matches_to_insert,
+                                     predict_fixtures(matches_to_insert, current_elos, params))
+    ]
 
     # Get match IDs for the inserted matches
     inserted_matches = supabase.table('matches').select('id, event_id').in_('event_id', [m['event_id'] for m in matches_to_insert]).execute()
@@ -0,0 +1,136 @@
+"""
+Record a score with the apply_score() database function
+One RPC call locks the pending match and both teams, updates the ratings and
+rolling team state, and removes the match's prediction in a single
+transaction (see supabase/schema.sql). Concurrent entries for the same team
+wait for each other instead of both starting from the same rating.
+
+--bench compares it with the request-per-step path /api/update-score used
+before (fetch match, teams and parameters, update match, update both teams,
+delete prediction). Both sides run without changing any data: the RPC as
+preview_score(), which rolls its writes back, and the old path with writes
+that leave every row as it was.
+
+Usage:
+    python apply_score.py 736838 2 1
+    python apply_score.py 736838 2 1 --dry-run
+    python apply_score.py --bench [--rounds 50] [--event 736838]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+from migrate_to_supabase import supabase_client
+
+BENCH_ROUNDS = 20
+
+
+def apply_score(client, event_id: int, home_score: int, away_score: int, dry_run: bool = False) -> Dict:
+    """
+    Record a pending match's score in one round trip; returns the rating
+    changes and both teams' new ratings. dry_run computes the same result
+    without keeping any change.
+    """
+    function = 'preview_score' if dry_run else 'apply_score'
+    return client.rpc(function, {
+        'p_event_id': event_id,
+        'p_home_score': home_score,
+        'p_away_score': away_score
+    }).execute().data
+
+
+def request_per_step(client, event_id: int):
+    """
+    The round trips of the old score entry path, with writes that change
+    nothing (the match stays pending, the teams keep their values)
+    """
+    match = client.table('matches').select('*').eq('event_id', event_id).eq('is_completed', False) \
+        .single().execute().data
+    teams = client.table('teams') \
+        .select('name, current_elo, recent_form, matches_played, goals_for, goals_against, clean_sheets') \
+        .in_('name', [match['home_team_name'], match['away_team_name']]).execute().data
+    client.table('parameters').select('*').execute()
+    client.table('matches').update({'is_completed': False}).eq('id', match['id']).execute()
+    for team in teams:
+        client.table('teams').update({'current_elo': team['current_elo']}).eq('name', team['name']).execute()
+    client.table('predictions').delete().eq('event_id', -1).execute()
+
+
+def _timings(call: Callable, rounds: int) -> List[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summary(timings: List[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"median {statistics.median(ordered):7.1f} ms   p95 {p95:7.1f} ms"
+
+
+def bench(client, event_id: int, rounds: int = BENCH_ROUNDS):
+    print("="*80)
+    print(f"SCORE ENTRY BENCHMARK (event {event_id}, {rounds} rounds each)")
+    print("="*80)
+
+    # One untimed call each to warm up connections
+    apply_score(client, event_id, 1, 0, dry_run=True)
+    request_per_step(client, event_id)
+
+    rpc = _timings(lambda: apply_score(client, event_id, 1, 0, dry_run=True), rounds)
+    steps = _timings(lambda: request_per_step(client, event_id), rounds)
+
+    print(f"\napply_score() RPC   (1 round trip):   {_summary(rpc)}")
+    print(f"Request per step    (7 round trips):  {_summary(steps)}")
+    print(f"\nSpeedup (median): {statistics.median(steps) / statistics.median(rpc):.1f}x")
+    print("(Both paths then call /api/regenerate-predictions for the two teams.)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a score with one database call")
+    parser.add_argument('event_id', nargs='?', type=int)
+    parser.add_argument('home_score', nargs='?', type=int)
+    parser.add_argument('away_score', nargs='?', type=int)
+    parser.add_argument('--dry-run', action='store_true', help="show the result without saving it")
+    parser.add_argument('--bench', action='store_true', help="compare with the request-per-step path")
+    parser.add_argument('--rounds', type=int, default=BENCH_ROUNDS)
+    parser.add_argument('--event', type=int, help="pending match to benchmark with (default: the next one)")
+    args = parser.parse_args()
+
+    client = supabase_client()
+
+    if args.bench:
+        event_id = args.event
+        if event_id is None:
+            pending = client.table('matches').select('event_id').eq('is_completed', False) \
+                .order('match_date').limit(1).execute().data
+            if not pending:
+                print("No pending matches to benchmark with")
+                sys.exit(1)
+            event_id = pending[0]['event_id']
+        bench(client, event_id, args.rounds)
+        return
+
+    if args.away_score is None:
+        parser.error("event_id, home_score and away_score are required")
+
+    result = apply_score(client, args.event_id, args.home_score, args.away_score, args.dry_run)
+
+    print(f"{result['home_team_name']} {args.home_score}-{args.away_score} {result['away_team_name']}"
+          + (" (dry run, nothing saved)" if args.dry_run else ""))
+    print(f"  {result['home_team_name']}: {result['home_elo_change']:+.2f} -> {result['home_elo_new']:.2f}")
+    print(f"  {result['away_team_name']}: {result['away_elo_change']:+.2f} -> {result['away_elo_new']:.2f}")
+    if not args.dry_run:
+        print(f"\nRefresh their predictions with:\n"
+              f"  python regenerate_all_predictions.py --teams \"{result['home_team_name']}\" "
+              f"\"{result['away_team_name']}\"")
+
+
+if __name__ == "__main__":
+    main()
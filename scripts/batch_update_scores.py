@@ -0,0 +1,148 @@
+"""
+Enter a whole matchday of scores in one run
+Reads a CSV (eventId,home_score,away_score; header optional) or a JSON list of
+{"eventId", "home_score", "away_score"} objects or [eventId, home, away] rows,
+applies the results in kickoff order with one season load, one log commit and
+one season file write, and regenerates predictions once at the end (only for
+the fixtures of teams whose ratings changed). Each match is reported the same
+way update_single_match.py reports it.
+
+Usage:
+    python batch_update_scores.py results.csv
+    python batch_update_scores.py results.json
+    python batch_update_scores.py -            (CSV or JSON on stdin)
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+from typing import Dict, List, Tuple
+
+from correct_result import SEASON_FILE, HISTORY_FILE, load_history, refresh_pending, save_json
+from elo_params import load_parameters
+from fixture_index import changed_teams
+from rolling_state import push_form, result_letters
+from score_log import LOG_FILE, ScoreLog, SEQ_KEY, current_elos, current_form, file_lock, fold, lock_path
+from update_single_match import compute_score_entry, score_result
+
+Result = Tuple[int, int, int]
+
+
+def parse_results(text: str) -> List[Result]:
+    """(eventId, home_score, away_score) rows from CSV or JSON text"""
+    stripped = text.lstrip()
+    if stripped.startswith('[') or stripped.startswith('{'):
+        rows = json.loads(stripped)
+        if isinstance(rows, dict):
+            rows = rows.get('results', [])
+        results = []
+        for row in rows:
+            if isinstance(row, dict):
+                row = (row['eventId'], row['home_score'], row['away_score'])
+            event_id, home_score, away_score = row
+            results.append((int(event_id), int(home_score), int(away_score)))
+        return results
+
+    results = []
+    for row in csv.reader(io.StringIO(text)):
+        if not row or not row[0].strip():
+            continue
+        try:
+            event_id, home_score, away_score = (int(value) for value in row[:3])
+        except ValueError:
+            # Header row
+            if not results:
+                continue
+            raise ValueError(f"Bad result row: {','.join(row)}")
+        results.append((event_id, home_score, away_score))
+    return results
+
+
+def update_match_scores(results: List[Result], season_file: str = SEASON_FILE,
+                        log_file: str = LOG_FILE, history_file: str = HISTORY_FILE) -> Dict:
+    """
+    Apply a batch of results in kickoff order. Scores are committed to the
+    score log in one write, then the log is folded into the season file and
+    predictions are regenerated, all under the log lock.
+    """
+    params = load_parameters()
+
+    with file_lock(lock_path(log_file)):
+        with open(season_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        log = ScoreLog(log_file, base_seq=data.get(SEQ_KEY, 0))
+
+        pending = {m['eventId']: m for m in data['pending_matches']}
+        errors = []
+        accepted = {}
+        for event_id, home_score, away_score in results:
+            if event_id not in pending or event_id in log:
+                errors.append({'event_id': event_id, 'error': 'Match not found'})
+            elif event_id in accepted:
+                errors.append({'event_id': event_id, 'error': 'Duplicate result in batch'})
+            else:
+                accepted[event_id] = (home_score, away_score)
+
+        # Kickoff order, so each result sees the ELOs and form of the earlier ones
+        order = sorted(accepted, key=lambda event_id: pending[event_id]['date'])
+        elos = current_elos(data, log)
+        form, window = current_form(data, log)
+        entries = []
+        for event_id in order:
+            home_score, away_score = accepted[event_id]
+            entry = compute_score_entry(pending[event_id], home_score, away_score, elos, form, params, window)
+            elos[entry['home_team']] = entry['home_elo_post']
+            elos[entry['away_team']] = entry['away_elo_post']
+            home_result, away_result = result_letters(home_score, away_score)
+            push_form(form, entry['home_team'], home_result, window)
+            push_form(form, entry['away_team'], away_result, window)
+            entries.append(entry)
+
+        # Commit every score with one fsync before touching the season file
+        entries = log.append_many(entries)
+
+        history = load_history(data, history_file)
+        before = dict(data['current_elos'])
+        fold(data, history, log)
+        # Only the fixtures of teams whose ratings moved get new predictions
+        data.setdefault('predictions', [])
+        refresh_pending(data, params, changed_teams(before, data['current_elos']))
+        save_json(season_file, data)
+        save_json(history_file, history)
+        log.reset()
+
+    return {
+        'success': not errors,
+        'results': [score_result(pending[entry['event_id']], entry) for entry in entries],
+        'errors': errors,
+        'predictions': len(data['predictions'])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enter a batch of match scores")
+    parser.add_argument('results', help="CSV or JSON results file, or - for stdin")
+    parser.add_argument('--season-file', default=SEASON_FILE)
+    parser.add_argument('--log-file', default=LOG_FILE)
+    parser.add_argument('--history-file', default=HISTORY_FILE)
+    args = parser.parse_args()
+
+    if args.results == '-':
+        text = sys.stdin.read()
+    else:
+        with open(args.results, 'r', encoding='utf-8-sig') as f:
+            text = f.read()
+
+    try:
+        results = parse_results(text)
+    except (ValueError, KeyError, TypeError) as e:
+        print(json.dumps({'error': f"Could not read results: {e}"}))
+        sys.exit(1)
+
+    print(json.dumps(update_match_scores(results, args.season_file, args.log_file, args.history_file)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Concurrent, resumable, idempotent bulk writer
+Upserts rows on their natural key (event_id, param_key, name, or a compound
+key such as 'team_id,event_id'), so a rerun never fails on a unique
+constraint or leaves duplicates. Rows are sent in chunks from a bounded
+thread pool:
+- The chunk size grows while requests come back quickly and halves when
+  a request fails or is slow.
+- Transient failures are retried with exponential backoff.
+- Every finished chunk's keys and row hashes go into a checkpoint file, so
+  an interrupted load resumes with the rows that were not written yet, or
+  whose content has changed since.
+
+The destination is a sink: SupabaseSink (supabase-py, which also works
+against a local PostgREST) or PostgresSink (psycopg, plain
+INSERT ... ON CONFLICT against any Postgres, e.g. a local container). Both
+also look up match ids by event_id in the same database they write to.
+
+Usage:
+    writer = BulkWriter(SupabaseSink(client), checkpoint_file=CHECKPOINT_FILE)
+    writer.write('matches', rows, 'event_id')
+"""
+
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+CHECKPOINT_VERSION = 2
+
+# Rows per matches lookup request
+LOOKUP_PAGE_SIZE = 1000
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+CHECKPOINT_FILE = os.path.join(DATA_DIR, '.cache', 'bulk_writer_checkpoint.json')
+
+DEFAULT_WORKERS = 4
+INITIAL_CHUNK = 500
+MIN_CHUNK = 25
+MAX_CHUNK = 2000
+# Chunks that take longer than this shrink, faster ones grow
+TARGET_SECONDS = 2.0
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 0.5
+
+# Postgres error classes that no retry will fix (integrity, syntax/schema, permissions)
+PERMANENT_SQLSTATE_CLASSES = ('22', '23', '42')
+
+
+class BulkWriteError(Exception):
+    """A chunk could not be written after every retry"""
+
+
+def is_transient(error: Exception) -> bool:
+    """False for errors a retry cannot fix (constraint violations, bad columns)"""
+    code = getattr(error, 'code', None) or getattr(error, 'sqlstate', None)
+    return not (isinstance(code, str) and code[:2] in PERMANENT_SQLSTATE_CLASSES)
+
+
+def conflict_columns(on_conflict: str) -> List[str]:
+    return [c.strip() for c in on_conflict.split(',')]
+
+
+def row_key(row: Dict, on_conflict: str) -> Hashable:
+    """A row's natural key: the column value, or a tuple for a compound key"""
+    columns = conflict_columns(on_conflict)
+    return row[columns[0]] if len(columns) == 1 else tuple(row[c] for c in columns)
+
+
+def row_digest(row: Dict) -> str:
+    """Hash of a row's content, independent of key order"""
+    canonical = json.dumps(row, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+class SupabaseSink:
+    """Upserts through a supabase-py client (PostgREST)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def upsert(self, table: str, rows: List[Dict], on_conflict: str):
+        self.client.table(table).upsert(rows, on_conflict=on_conflict).execute()
+
+    def match_ids(self, event_ids: Iterable[int]) -> Dict[int, int]:
+        """{event_id: id} for the given matches, one page at a time"""
+        event_ids = list(event_ids)
+        ids = {}
+        for start in range(0, len(event_ids), LOOKUP_PAGE_SIZE):
+            result = self.client.table('matches').select('id, event_id') \
+                .in_('event_id', event_ids[start:start + LOOKUP_PAGE_SIZE]).execute()
+            ids.update({row['event_id']: row['id'] for row in result.data})
+        return ids
+
+
+class PostgresSink:
+    """Upserts straight into Postgres with INSERT ... ON CONFLICT DO UPDATE"""
+
+    def __init__(self, dsn: str):
+        try:
+            import psycopg
+        except ImportError:
+            raise ImportError("PostgresSink needs psycopg: pip install 'psycopg[binary]'")
+        self.psycopg = psycopg
+        self.dsn = dsn
+        self.json_columns: Dict[str, Set[str]] = {}
+
+    def _json_columns(self, conn, table: str) -> Set[str]:
+        """The table's json/jsonb columns (scalars bound to them need wrapping too)"""
+        if table not in self.json_columns:
+            rows = conn.execute(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_name = %s AND data_type IN ('json', 'jsonb')", (table,)).fetchall()
+            self.json_columns[table] = {name for name, in rows}
+        return self.json_columns[table]
+
+    def upsert(self, table: str, rows: List[Dict], on_conflict: str):
+        from psycopg import sql
+        from psycopg.types.json import Jsonb
+
+        columns = list(rows[0])
+        keys = conflict_columns(on_conflict)
+        statement = sql.SQL(
+            "INSERT INTO {table} ({columns}) VALUES ({values}) "
+            "ON CONFLICT ({key}) DO UPDATE SET {updates}"
+        ).format(
+            table=sql.Identifier(table),
+            columns=sql.SQL(', ').join(map(sql.Identifier, columns)),
+            values=sql.SQL(', ').join(sql.Placeholder() * len(columns)),
+            key=sql.SQL(', ').join(map(sql.Identifier, keys)),
+            updates=sql.SQL(', ').join(
+                sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c)) for c in columns if c not in keys)
+        )
+        # One connection per call keeps the sink safe to share between threads
+        with self.psycopg.connect(self.dsn) as conn:
+            json_columns = self._json_columns(conn, table)
+            values = [
+                [Jsonb(row[c]) if c in json_columns or isinstance(row[c], (dict, list)) else row[c]
+                 for c in columns]
+                for row in rows
+            ]
+            with conn.cursor() as cur:
+                cur.executemany(statement, values)
+
+    def match_ids(self, event_ids: Iterable[int]) -> Dict[int, int]:
+        """{event_id: id} for the given matches"""
+        with self.psycopg.connect(self.dsn) as conn:
+            rows = conn.execute("SELECT event_id, id FROM matches WHERE event_id = ANY(%s)",
+                                (list(event_ids),)).fetchall()
+        return dict(rows)
+
+
+class Checkpoint:
+    """
+    Keys already written and a hash of what was written for each, per table,
+    persisted after every chunk. A row whose content changed since is written
+    again; a checkpoint from before the hashes were stored is ignored.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.done: Dict[str, Dict[Hashable, str]] = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('version') == CHECKPOINT_VERSION:
+                # Compound keys come back from JSON as lists
+                self.done = {
+                    table: {tuple(key) if isinstance(key, list) else key: digest for key, digest in entries}
+                    for table, entries in saved.get('tables', {}).items()
+                }
+
+    def written(self, table: str) -> Dict[Hashable, str]:
+        return self.done.setdefault(table, {})
+
+    def add(self, table: str, entries: Sequence[Tuple[Hashable, str]]):
+        self.written(table).update(entries)
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_file = self.path + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': CHECKPOINT_VERSION,
+                'tables': {table: sorted(([key, digest] for key, digest in entries.items()), key=str)
+                           for table, entries in self.done.items()}
+            }, f)
+        os.replace(tmp_file, self.path)
+
+    def clear(self):
+        self.done = {}
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BulkWriter:
+    """Upsert row lists table by table through a sink (see module docstring)"""
+
+    def __init__(self, sink, checkpoint_file: Optional[str] = None, workers: int = DEFAULT_WORKERS,
+                 chunk_size: int = INITIAL_CHUNK, min_chunk: int = MIN_CHUNK, max_chunk: int = MAX_CHUNK,
+                 target_seconds: float = TARGET_SECONDS, max_attempts: int = MAX_ATTEMPTS,
+                 backoff_seconds: float = BACKOFF_SECONDS, verbose: bool = True):
+        self.sink = sink
+        self.checkpoint = Checkpoint(checkpoint_file)
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.target_seconds = target_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.verbose = verbose
+
+    def _send(self, table: str, rows: List[Dict], on_conflict: str) -> float:
+        """Upsert one chunk with retries; returns the seconds the successful request took"""
+        for attempt in range(1, self.max_attempts + 1):
+            start = time.perf_counter()
+            try:
+                self.sink.upsert(table, rows, on_conflict)
+                return time.perf_counter() - start
+            except Exception as e:
+                if not is_transient(e) or attempt == self.max_attempts:
+                    raise
+                # Exponential backoff with jitter so workers do not retry in step
+                time.sleep(self.backoff_seconds * 2 ** (attempt - 1) * (1 + random.random()))
+
+    def _resize(self, rows: int, seconds: float):
+        if seconds > self.target_seconds:
+            self.chunk_size = max(self.min_chunk, rows // 2)
+        elif seconds < self.target_seconds / 2 and rows >= self.chunk_size:
+            self.chunk_size = min(self.max_chunk, self.chunk_size * 2)
+
+    def write(self, table: str, rows: Sequence[Dict], on_conflict: str) -> int:
+        """
+        Upsert rows into a table keyed by the on_conflict column, skipping
+        rows the checkpoint says are already written with the same content.
+        Returns rows written.
+        """
+        written = self.checkpoint.written(table)
+        # One row per key: an upsert chunk may not touch the same row twice
+        unique = {row_key(row, on_conflict): row for row in rows}
+        digests = {key: row_digest(row) for key, row in unique.items()}
+        remaining = [row for key, row in unique.items() if written.get(key) != digests[key]]
+        skipped = len(unique) - len(remaining)
+        if self.verbose and skipped:
+            print(f"   {table}: {skipped} rows already written, resuming with {len(remaining)}")
+
+        position = 0
+        # Chunks that failed are split and sent again before new rows
+        retry: List[List[Dict]] = []
+        count = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            in_flight = {}
+            while in_flight or retry or position < len(remaining):
+                while len(in_flight) < self.workers and (retry or position < len(remaining)):
+                    if retry:
+                        chunk = retry.pop()
+                    else:
+                        chunk = remaining[position:position + self.chunk_size]
+                        position += len(chunk)
+                    in_flight[pool.submit(self._send, table, chunk, on_conflict)] = chunk
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    chunk = in_flight.pop(future)
+                    try:
+                        seconds = future.result()
+                    except Exception as e:
+                        # Retries are used up: a smaller chunk may still get through
+                        if not is_transient(e) or len(chunk) <= self.min_chunk:
+                            raise BulkWriteError(
+                                f"Writing {len(chunk)} rows to {table} failed: {e}") from e
+                        half = len(chunk) // 2
+                        # Never grow back to a size that has failed
+                        self.max_chunk = max(self.min_chunk, min(self.max_chunk, half))
+                        self.chunk_size = min(self.chunk_size, self.max_chunk)
+                        retry.extend((chunk[half:], chunk[:half]))
+                        continue
+                    self._resize(len(chunk), seconds)
+                    keys = [row_key(row, on_conflict) for row in chunk]
+                    self.checkpoint.add(table, [(key, digests[key]) for key in keys])
+                    count += len(chunk)
+
+        if self.verbose:
+            print(f"   ✓ Upserted {count} rows into {table}")
+        return count
+
+    def finish(self):
+        """Forget the checkpoint once a whole load has gone through"""
+        self.checkpoint.clear()
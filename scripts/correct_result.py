@@ -0,0 +1,463 @@
+"""
+Correct, revert or undo completed 2025-26 results
+Keeps ratings checkpoints (ELOs + form every CHECKPOINT_INTERVAL completed
+matches) next to the season file, so editing or reverting a past score restores
+the nearest checkpoint before it and replays only the matches after that point.
+Score entries also push a reversible delta onto an undo stack, so the last N
+entries can be taken back LIFO without any replay.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from elo_params import EloParameters, load_parameters
+from fixture_index import add_fixture, fixtures_for, season_index
+from form_tracker import RESULT_CODES
+from process_data import ELOCalculator
+from prediction_kernel import predict_fixtures
+from rolling_state import FORM_KEY, match_stats, push_form, result_letters, season_state
+from standings import add_completed, add_match, recount_streaks, season_standings
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+SEASON_FILE = os.path.join(DATA_DIR, 'season_2025_26.json')
+HISTORY_FILE = os.path.join(DATA_DIR, 'season_2025_26_history.json')
+
+HISTORY_VERSION = 1
+CHECKPOINT_INTERVAL = 50
+FORM_WINDOW = 5
+
+# Fields a completed match gains on top of the pending fixture
+RESULT_FIELDS = (
+    'home_elo_pre', 'away_elo_pre', 'home_elo_post', 'away_elo_post',
+    'home_elo_change', 'away_elo_change', 'home_result', 'away_result',
+    'goal_diff', 'home_multipliers', 'away_multipliers'
+)
+
+
+class CorrectionError(Exception):
+    """The requested correction cannot be applied to the season file"""
+
+
+def load_json(path: str, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json(path: str, data: Dict):
+    """Write through a temp file so a crash never leaves half a season file"""
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_file, path)
+
+
+def prefix_hashes(matches: List[Dict], positions: List[int]) -> Dict[int, str]:
+    """
+    SHA-256 of (eventId, scores) over matches[:position] for each position,
+    which ties a checkpoint to the exact results that led up to it
+    """
+    wanted = set(positions)
+    digest = hashlib.sha256()
+    hashes = {0: digest.hexdigest()} if 0 in wanted else {}
+    for i, m in enumerate(matches, 1):
+        digest.update(f"{m['eventId']}:{m['homeTeamScore']}:{m['awayTeamScore']};".encode('utf-8'))
+        if i in wanted:
+            hashes[i] = digest.hexdigest()
+    return hashes
+
+
+def season_start_elos(data: Dict) -> Dict[str, float]:
+    """Ratings before the first completed match: each team's first pre-match ELO"""
+    elos = dict(data['current_elos'])
+    seen = set()
+    for m in data['completed_matches']:
+        for team, elo in ((m['homeTeamName'], m['home_elo_pre']), (m['awayTeamName'], m['away_elo_pre'])):
+            if team not in seen:
+                seen.add(team)
+                elos[team] = elo
+    return elos
+
+
+def build_checkpoints(data: Dict, interval: int = CHECKPOINT_INTERVAL,
+                      window: int = FORM_WINDOW) -> List[Dict]:
+    """
+    Checkpoints every `interval` completed matches, taken from the stored
+    post-match ELOs (no replay), so they match the season file exactly
+    """
+    matches = data['completed_matches']
+    positions = list(range(0, len(matches) + 1, interval))
+    hashes = prefix_hashes(matches, positions)
+
+    elos = season_start_elos(data)
+    form: Dict[str, List[str]] = {}
+    checkpoints = [_checkpoint(0, hashes[0], elos, form, window)]
+    for i, m in enumerate(matches, 1):
+        home, away = m['homeTeamName'], m['awayTeamName']
+        elos[home] = m['home_elo_post']
+        elos[away] = m['away_elo_post']
+        home_result, away_result = result_letters(m['homeTeamScore'], m['awayTeamScore'])
+        push_form(form, home, home_result, window)
+        push_form(form, away, away_result, window)
+        if i in hashes:
+            checkpoints.append(_checkpoint(i, hashes[i], elos, form, window))
+    return checkpoints
+
+
+def _checkpoint(position: int, prefix: str, elos: Dict[str, float],
+                form: Dict[str, List[str]], window: int) -> Dict:
+    return {
+        'position': position,
+        'prefix': prefix,
+        'elos': dict(elos),
+        'form': {'window': window, 'results': {team: list(r) for team, r in form.items()}}
+    }
+
+
+def load_history(data: Dict, path: str = HISTORY_FILE) -> Dict:
+    """The checkpoint/undo history for a season, rebuilding the checkpoints if missing"""
+    history = load_json(path)
+    if not history or history.get('version') != HISTORY_VERSION:
+        history = {'version': HISTORY_VERSION, 'interval': CHECKPOINT_INTERVAL, 'undo': []}
+    if not history.get('checkpoints'):
+        history['checkpoints'] = build_checkpoints(data, history['interval'])
+    return history
+
+
+def nearest_checkpoint(data: Dict, history: Dict, position: int) -> Dict:
+    """
+    The latest checkpoint at or before `position` whose prefix hash still
+    matches the season file. Stale checkpoints (e.g. after a full rerun of
+    process_data.py) trigger a rebuild from the stored match records.
+    """
+    matches = data['completed_matches']
+    candidates = [cp for cp in history['checkpoints'] if cp['position'] <= min(position, len(matches))]
+    if candidates:
+        best = max(candidates, key=lambda cp: cp['position'])
+        if prefix_hashes(matches, [best['position']])[best['position']] == best['prefix']:
+            return best
+
+    history['checkpoints'] = build_checkpoints(data, history['interval'])
+    return max((cp for cp in history['checkpoints'] if cp['position'] <= position),
+               key=lambda cp: cp['position'])
+
+
+def replay_from(data: Dict, history: Dict, position: int, params: EloParameters,
+                teams: Iterable[str] = ()) -> int:
+    """
+    Restore the nearest checkpoint at or before `position`, fast-forward through
+    the unchanged stored results up to `position`, then replay every completed
+    match from `position` on. Returns the number of matches replayed.
+    Only `teams` and the teams whose replayed post-match ELOs differ from the
+    stored ones get a new current ELO; the rest keep theirs, since
+    current_elos need not equal the end of the stored chain.
+    """
+    matches = data['completed_matches']
+    checkpoint = nearest_checkpoint(data, history, position)
+    interval = history['interval']
+
+    calculator = ELOCalculator(params, checkpoint['form'].get('window', FORM_WINDOW))
+    calculator.team_elos = checkpoint['elos']
+    calculator.load_form_state(checkpoint['form'])
+
+    # Matches between the checkpoint and the edit keep their stored ratings
+    for m in matches[checkpoint['position']:position]:
+        home_result, away_result = result_letters(m['homeTeamScore'], m['awayTeamScore'])
+        calculator.set_elo(m['homeTeamName'], m['home_elo_post'])
+        calculator.set_elo(m['awayTeamName'], m['away_elo_post'])
+        calculator.form.push(calculator.team_index(m['homeTeamName']), RESULT_CODES[home_result])
+        calculator.form.push(calculator.team_index(m['awayTeamName']), RESULT_CODES[away_result])
+
+    # Checkpoints after the edit are rewritten as the tail is replayed
+    checkpoints = [cp for cp in history['checkpoints'] if cp['position'] <= position]
+    undo_by_event = {entry['event_id']: entry for entry in history['undo']}
+    hashes = prefix_hashes(matches, list(range(position + 1, len(matches) + 1))) if position < len(matches) else {}
+
+    moved = set(teams)
+    for i in range(position, len(matches)):
+        m = matches[i]
+        entry = undo_by_event.get(m['eventId'])
+        if entry:
+            _refresh_undo_entry(entry, calculator)
+        matches[i] = calculator.process_match(m, i, params.home_advantage)
+        for side in ('home', 'away'):
+            if matches[i][f'{side}_elo_post'] != m.get(f'{side}_elo_post'):
+                moved.add(m[f'{side}TeamName'])
+        if entry:
+            entry['home_elo_post'] = matches[i]['home_elo_post']
+            entry['away_elo_post'] = matches[i]['away_elo_post']
+        if (i + 1) % interval == 0:
+            checkpoints.append({
+                'position': i + 1,
+                'prefix': hashes[i + 1],
+                'elos': calculator.team_elos,
+                'form': calculator.form_state()
+            })
+
+    history['checkpoints'] = checkpoints
+    elos = calculator.team_elos
+    data['current_elos'].update((team, elos[team]) for team in moved)
+    data[FORM_KEY] = calculator.form_state()
+    refresh_pending(data, params, moved)
+    return len(matches) - position
+
+
+def refresh_pending(data: Dict, params: EloParameters, teams: Optional[Iterable[str]] = None):
+    """
+    Bring pending fixtures (and their predictions, if any) in line with
+    current_elos. With `teams`, only the fixtures of those teams (plus any
+    fixture without a prediction) are recomputed; the rest are unchanged.
+    """
+    elos = data['current_elos']
+    pending = data['pending_matches']
+    predictions = {p['eventId']: p for p in data.get('predictions', [])}
+    if teams is None:
+        targets = pending
+    else:
+        event_ids = fixtures_for(season_index(data), teams)
+        targets = [m for m in pending
+                   if m['eventId'] in event_ids or ('predictions' in data and m['eventId'] not in predictions)]
+
+    for m in targets:
+        m['home_elo_current'] = elos.get(m['homeTeamName'], params.initial_elo)
+        m['away_elo_current'] = elos.get(m['awayTeamName'], params.initial_elo)
+
+    if 'predictions' in data:
+        for match, prediction in zip(
+                targets, predict_fixtures(targets, elos, params, 'homeTeamName', 'awayTeamName')):
+            predictions[match['eventId']] = {**match, **prediction}
+        data['predictions'] = [predictions[m['eventId']] for m in pending]
+
+
+def _find_completed(data: Dict, event_id: int) -> int:
+    for i, m in enumerate(data['completed_matches']):
+        if m['eventId'] == event_id:
+            return i
+    raise CorrectionError(f"Completed match {event_id} not found")
+
+
+def _refresh_undo_entry(entry: Dict, calculator: ELOCalculator):
+    """Keep an undo entry's pre-match state in step with a replayed tail"""
+    form = calculator.form
+    for side in ('home', 'away'):
+        team = entry[f'{side}_team']
+        entry[f'{side}_elo_pre'] = calculator.state.get(team)
+        entry[f'{side}_form'] = form.recent(calculator.team_index(team))
+
+
+def pending_fixture(match: Dict, data: Dict, params: EloParameters) -> Dict:
+    """A completed match turned back into a pending fixture"""
+    fixture = {key: value for key, value in match.items() if key not in RESULT_FIELDS}
+    fixture.update({
+        'homeTeamScore': None,
+        'awayTeamScore': None,
+        'homeTeamWinner': None,
+        'awayTeamWinner': None,
+        'home_elo_current': data['current_elos'].get(match['homeTeamName'], params.initial_elo),
+        'away_elo_current': data['current_elos'].get(match['awayTeamName'], params.initial_elo)
+    })
+    return fixture
+
+
+def correct_match(data: Dict, history: Dict, event_id: int, home_score: int, away_score: int,
+                  params: EloParameters) -> Dict:
+    """Change the score of a completed match and replay the matches after it"""
+    position = _find_completed(data, event_id)
+    match = data['completed_matches'][position]
+    old_score = (match['homeTeamScore'], match['awayTeamScore'])
+
+    _, stats = season_state(data)
+    match_stats(stats, match['homeTeamName'], match['awayTeamName'], *old_score, sign=-1)
+    match_stats(stats, match['homeTeamName'], match['awayTeamName'], home_score, away_score)
+    standings = season_standings(data)
+    add_match(standings, match['leagueName'], match['homeTeamName'], match['awayTeamName'], *old_score, sign=-1)
+    add_match(standings, match['leagueName'], match['homeTeamName'], match['awayTeamName'], home_score, away_score)
+
+    data['completed_matches'][position] = {
+        **match,
+        'homeTeamScore': home_score,
+        'awayTeamScore': away_score,
+        'homeTeamWinner': home_score > away_score,
+        'awayTeamWinner': away_score > home_score
+    }
+    recount_streaks(standings, data['completed_matches'], (match['homeTeamName'], match['awayTeamName']))
+    replayed = replay_from(data, history, position, params)
+
+    return {
+        'success': True,
+        'event_id': event_id,
+        'old_score': list(old_score),
+        'new_score': [home_score, away_score],
+        'replayed_matches': replayed,
+        'match': data['completed_matches'][position]
+    }
+
+
+def revert_match(data: Dict, history: Dict, event_id: int, params: EloParameters) -> Dict:
+    """Move a completed match back to pending and replay the matches after it"""
+    position = _find_completed(data, event_id)
+    _, stats = season_state(data)
+    standings = season_standings(data)
+    match = data['completed_matches'].pop(position)
+    match_stats(stats, match['homeTeamName'], match['awayTeamName'],
+                match['homeTeamScore'], match['awayTeamScore'], sign=-1)
+    add_completed(standings, match, sign=-1)
+    recount_streaks(standings, data['completed_matches'], (match['homeTeamName'], match['awayTeamName']))
+    history['undo'] = [entry for entry in history['undo'] if entry['event_id'] != event_id]
+
+    replayed = replay_from(data, history, position, params, (match['homeTeamName'], match['awayTeamName']))
+    fixture = pending_fixture(match, data, params)
+    add_fixture(season_index(data), fixture)
+    data['pending_matches'].append(fixture)
+    data['pending_matches'].sort(key=lambda m: str(m['date']))
+    refresh_pending(data, params, ())
+
+    return {'success': True, 'event_id': event_id, 'replayed_matches': replayed}
+
+
+def record_score_entry(history: Dict, data: Dict, match: Dict, pending_match: Dict,
+                       home_form: Optional[List[str]] = None, away_form: Optional[List[str]] = None):
+    """
+    Push the reversible delta for a match that was just appended to
+    completed_matches, and checkpoint if it completes an interval.
+    home_form / away_form are the teams' recent results before the match;
+    the season file's rolling team state (form and counters) is brought up to
+    date here, so callers load it with season_state() (and the standings with
+    season_standings()) before appending.
+    """
+    home, away = match['homeTeamName'], match['awayTeamName']
+    form, stats = season_state(data)
+    standings = season_standings(data)
+    results = form['results']
+    if home_form is None:
+        home_form = list(results.get(home, []))
+    if away_form is None:
+        away_form = list(results.get(away, []))
+
+    history['undo'].append({
+        'event_id': match['eventId'],
+        'home_team': home,
+        'away_team': away,
+        'home_elo_pre': match['home_elo_pre'],
+        'away_elo_pre': match['away_elo_pre'],
+        'home_elo_post': match['home_elo_post'],
+        'away_elo_post': match['away_elo_post'],
+        'home_form': home_form,
+        'away_form': away_form,
+        'pending_match': pending_match
+    })
+
+    home_result, away_result = result_letters(match['homeTeamScore'], match['awayTeamScore'])
+    push_form(results, home, home_result, form['window'])
+    push_form(results, away, away_result, form['window'])
+    match_stats(stats, home, away, match['homeTeamScore'], match['awayTeamScore'])
+    add_completed(standings, match)
+
+    position = len(data['completed_matches'])
+    if position % history['interval'] == 0:
+        history['checkpoints'] = [cp for cp in history['checkpoints'] if cp['position'] < position]
+        history['checkpoints'].append(_checkpoint(
+            position, prefix_hashes(data['completed_matches'], [position])[position],
+            data['current_elos'], results, form['window']))
+
+
+def undo_entries(data: Dict, history: Dict, count: int, params: EloParameters) -> List[int]:
+    """
+    Take back the last `count` score entries, newest first. Each must still be
+    the latest completed match; ratings and form go back to the stored pre-match
+    state and the fixture returns to pending. Returns the undone event ids.
+    """
+    undone = []
+    teams = set()
+    for _ in range(count):
+        if not history['undo']:
+            break
+        entry = history['undo'][-1]
+        completed = data['completed_matches']
+        if not completed or completed[-1]['eventId'] != entry['event_id']:
+            raise CorrectionError(
+                f"Match {entry['event_id']} is no longer the latest result; use revert instead")
+
+        home, away = entry['home_team'], entry['away_team']
+        elos = data['current_elos']
+        if elos.get(home) != entry['home_elo_post'] or elos.get(away) != entry['away_elo_post']:
+            raise CorrectionError(f"Ratings changed since match {entry['event_id']} was entered")
+
+        form, stats = season_state(data)
+        standings = season_standings(data)
+        history['undo'].pop()
+        match = completed.pop()
+        elos[home] = entry['home_elo_pre']
+        elos[away] = entry['away_elo_pre']
+        form['results'][home] = entry['home_form']
+        form['results'][away] = entry['away_form']
+        match_stats(stats, home, away, match['homeTeamScore'], match['awayTeamScore'], sign=-1)
+        add_completed(standings, match, sign=-1)
+        recount_streaks(standings, completed, (home, away))
+
+        add_fixture(season_index(data), entry['pending_match'])
+        data['pending_matches'].append(entry['pending_match'])
+        teams.update((home, away))
+        history['checkpoints'] = [cp for cp in history['checkpoints'] if cp['position'] <= len(completed)]
+        undone.append(entry['event_id'])
+
+    data['pending_matches'].sort(key=lambda m: str(m['date']))
+    refresh_pending(data, params, teams)
+    return undone
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Correct, revert or undo completed 2025-26 results")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    edit = commands.add_parser('edit', help="change the score of a completed match")
+    edit.add_argument('event_id', type=int)
+    edit.add_argument('home_score', type=int)
+    edit.add_argument('away_score', type=int)
+
+    revert = commands.add_parser('revert', help="move a completed match back to pending")
+    revert.add_argument('event_id', type=int)
+
+    undo = commands.add_parser('undo', help="take back the last N score entries")
+    undo.add_argument('count', type=int, nargs='?', default=1)
+
+    commands.add_parser('checkpoint', help="rebuild the ratings checkpoints")
+
+    parser.add_argument('--season-file', default=SEASON_FILE)
+    parser.add_argument('--history-file', default=HISTORY_FILE)
+    args = parser.parse_args()
+
+    # Fold any logged scores into the season file first (score_log imports this module)
+    from score_log import compact
+    compact(args.season_file, history_file=args.history_file)
+
+    data = load_json(args.season_file)
+    history = load_history(data, args.history_file)
+    params = load_parameters()
+
+    try:
+        if args.command == 'edit':
+            result = correct_match(data, history, args.event_id, args.home_score, args.away_score, params)
+        elif args.command == 'revert':
+            result = revert_match(data, history, args.event_id, params)
+        elif args.command == 'undo':
+            result = {'success': True, 'undone': undo_entries(data, history, args.count, params)}
+        else:
+            history['checkpoints'] = build_checkpoints(data, history['interval'])
+            result = {'success': True, 'checkpoints': len(history['checkpoints'])}
+    except CorrectionError as e:
+        print(json.dumps({'error': str(e)}))
+        sys.exit(1)
+
+    save_json(args.season_file, data)
+    save_json(args.history_file, history)
+    print(json.dumps({key: value for key, value in result.items() if key != 'match'}, default=str))
+
+
+if __name__ == "__main__":
+    main()
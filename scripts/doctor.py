@@ -0,0 +1,205 @@
+"""
+Database diagnostics and repair
+Replaces check_matches.py, check_future_matches.py, fix_is_completed.py and
+check_excel_data.py. Diagnostics are one call to the match_diagnostics()
+function in supabase/schema.sql:
+- grouped counts by season, league and status
+- every consistency check
+--fix runs repair_matches(), one set-based statement per kind of
+inconsistency (e.g. is_completed set from score nullness in a single UPDATE).
+On a database without the functions it falls back to head-only counts
+and the same set-based updates through the REST API.
+
+Usage:
+    python doctor.py                  # 2025-26 diagnostics
+    python doctor.py --season all
+    python doctor.py --fix
+    python doctor.py --excel          # also summarize the source workbook
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+SEASON_YEAR = 2025
+
+# Checks reported by match_diagnostics() and what they mean
+ISSUES = {
+    'completed_without_scores': "completed but missing a score",
+    'scored_not_completed': "scored but not marked completed",
+    'unknown_status': "is_completed is NULL",
+    'winner_mismatch': "winner flags disagree with the score",
+    'completed_in_future': "completed with a kickoff in the future",
+    'pending_in_past': "pending with a kickoff in the past (score not entered yet)",
+    'pending_without_prediction': "pending without a prediction",
+    'predictions_for_completed': "completed but still has a prediction"
+}
+# Issues --fix repairs (the rest need a score or a prediction run)
+FIXABLE = ('completed_without_scores', 'scored_not_completed', 'unknown_status',
+           'winner_mismatch', 'predictions_for_completed')
+
+
+def connect():
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    load_dotenv('.env.local')
+    return create_client(os.getenv('NEXT_PUBLIC_SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+
+
+def _missing_function(error: Exception) -> bool:
+    # PostgREST reports an unknown RPC as PGRST202 (42883 from Postgres)
+    return getattr(error, 'code', None) in ('PGRST202', '42883')
+
+
+def _count(query) -> int:
+    """Row count of a filtered query without downloading any rows"""
+    return query.execute().count
+
+
+def fallback_diagnostics(supabase, season_year: Optional[int]) -> Dict:
+    """
+    The same checks as head-only counts, for a database without
+    match_diagnostics() (no grouped counts, one request per check)
+    """
+    def matches():
+        query = supabase.table('matches').select('id', count='exact', head=True)
+        return query.eq('season_year', season_year) if season_year is not None else query
+
+    now = datetime.now(timezone.utc).isoformat()
+    issues = {
+        'completed_without_scores': _count(
+            matches().eq('is_completed', True).or_('home_team_score.is.null,away_team_score.is.null')),
+        'scored_not_completed': _count(
+            matches().not_.is_('is_completed', 'true')
+            .not_.is_('home_team_score', 'null').not_.is_('away_team_score', 'null')),
+        'unknown_status': _count(matches().is_('is_completed', 'null')),
+        'completed_in_future': _count(matches().eq('is_completed', True).gt('match_date', now)),
+        'pending_in_past': _count(matches().eq('is_completed', False).lt('match_date', now))
+    }
+    return {
+        'groups': [
+            {'season_year': season_year, 'league_name': '(all)', 'is_completed': status,
+             'matches': _count(matches().eq('is_completed', status))}
+            for status in (True, False)
+        ],
+        'issues': issues,
+        'predictions': _count(supabase.table('predictions').select('id', count='exact', head=True)),
+        'teams': _count(supabase.table('teams').select('id', count='exact', head=True))
+    }
+
+
+def diagnostics(supabase, season_year: Optional[int]) -> Dict:
+    try:
+        return supabase.rpc('match_diagnostics', {'p_season_year': season_year}).execute().data
+    except Exception as e:
+        if not _missing_function(e):
+            raise
+        print("(match_diagnostics() is not installed: run supabase/schema.sql for the full report)")
+        return fallback_diagnostics(supabase, season_year)
+
+
+def repair(supabase, season_year: Optional[int]) -> Dict:
+    try:
+        return supabase.rpc('repair_matches', {'p_season_year': season_year}).execute().data
+    except Exception as e:
+        if not _missing_function(e):
+            raise
+
+    # Without the function: the is_completed repair as two set-based PATCHes
+    def scoped(query):
+        return query.eq('season_year', season_year) if season_year is not None else query
+
+    unscored = scoped(supabase.table('matches').update({'is_completed': False}, count='exact')
+                      .or_('home_team_score.is.null,away_team_score.is.null')
+                      .not_.is_('is_completed', 'false')).execute()
+    scored = scoped(supabase.table('matches').update({'is_completed': True}, count='exact')
+                    .not_.is_('home_team_score', 'null').not_.is_('away_team_score', 'null')
+                    .not_.is_('is_completed', 'true')).execute()
+    return {'status_fixed': (unscored.count or 0) + (scored.count or 0)}
+
+
+def excel_summary(path: Optional[str]):
+    """One streaming pass over the source workbook"""
+    from excel_reader import ExcelMatchReader, STATUS_SCHEDULED, WORKBOOK_FILE
+
+    reader = ExcelMatchReader(path or WORKBOOK_FILE)
+    scheduled = sum(1 for match in reader if match['statusId'] == STATUS_SCHEDULED)
+    stats = reader.stats
+
+    print("\n" + "="*80)
+    print("SOURCE WORKBOOK")
+    print("="*80)
+    print(f"Rows: {stats.rows}  (first {stats.first_date}, last {stats.last_date})")
+    print(f"Still scheduled: {scheduled}")
+    print("Matches per season:")
+    for season, count in sorted(stats.seasons.items(), key=lambda x: str(x[0])):
+        print(f"  {season}: {count}")
+
+
+def print_report(report: Dict):
+    print(f"\n{'Season':<8} {'League':<24} {'Status':<10} {'Matches':>8}  Dates")
+    for group in report['groups']:
+        status = 'completed' if group['is_completed'] else 'pending'
+        dates = f"{group.get('first_date', '')[:10]} .. {group.get('last_date', '')[:10]}" \
+            if group.get('first_date') else ''
+        print(f"{group['season_year']!s:<8} {group['league_name']:<24} {status:<10} {group['matches']:>8}  {dates}")
+
+    print(f"\nTeams: {report['teams']}   Predictions: {report['predictions']}")
+    if report.get('orphaned_predictions'):
+        print(f"Predictions without a match: {report['orphaned_predictions']}")
+    if report.get('unknown_teams'):
+        print(f"Teams in matches but not in teams: {', '.join(report['unknown_teams'])}")
+
+    print("\nChecks:")
+    for key, description in ISSUES.items():
+        if key not in report['issues']:
+            continue
+        count = report['issues'][key]
+        mark = '✓' if count == 0 else ('✗' if key in FIXABLE else '!')
+        print(f"  {mark} {count:>6}  {description}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check (and repair) the matches database")
+    parser.add_argument('--season', default=str(SEASON_YEAR), help="season year, or 'all'")
+    parser.add_argument('--fix', action='store_true', help="repair what can be repaired in place")
+    parser.add_argument('--excel', nargs='?', const='', help="also summarize the workbook (optional path)")
+    parser.add_argument('--json', action='store_true', help="print the raw report as JSON")
+    args = parser.parse_args()
+    season_year = None if args.season == 'all' else int(args.season)
+
+    supabase = connect()
+
+    print("="*80)
+    print(f"DATABASE DOCTOR ({'all seasons' if season_year is None else f'season {season_year}'})")
+    print("="*80)
+
+    report = diagnostics(supabase, season_year)
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+
+    problems = sum(report['issues'].get(key, 0) for key in FIXABLE)
+    if args.fix and problems:
+        print("\nRepairing...")
+        for key, count in repair(supabase, season_year).items():
+            print(f"  {key}: {count}")
+        report = diagnostics(supabase, season_year)
+        print_report(report)
+        problems = sum(report['issues'].get(key, 0) for key in FIXABLE)
+    elif problems:
+        print("\nRun with --fix to repair the ✗ items")
+
+    if args.excel is not None:
+        excel_summary(args.excel or None)
+
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
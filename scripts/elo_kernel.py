@@ -0,0 +1,245 @@
+"""
+Shared ELO rating kernel
+The one implementation of the match rating update, used by the full rebuild
+(process_data.ELOCalculator), the online score entry (update_single_match.py,
+batch_update_scores.py) and mirrored line for line by apply_score() in
+supabase/schema.sql, which computes in double precision and stores its
+ratings in DOUBLE PRECISION columns.
+match_changes() is the scalar entry point (one match, no allocations),
+match_changes_array() the vectorized one (many independent matches at once,
+same formulas and multiplication order). No rounding is applied anywhere, so
+incremental updates and a full rebuild produce the same ratings.
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from elo_params import EloParameters
+
+# Win "actual" score by min(abs(goal_diff), 4)
+WIN_ACTUAL_SCORES = (1.0, 1.0, 1.1, 1.2, 1.3)
+
+FORM_WINDOW = 5
+
+
+def form_score_from_counts(wins: int, losses: int, window: int = FORM_WINDOW) -> int:
+    """
+    Form score from win/loss counts over the form window. The FORM_MULTIPLIERS
+    keys are named for a 5-game window (5 = every game won, 4 = 4 of 5, ...);
+    other windows use the same shares of their length.
+    """
+    if wins == window:
+        return 5
+    elif wins * 5 >= 4 * window:
+        return 4
+    elif wins * 5 >= 3 * window:
+        return 3
+    elif losses * 5 >= 3 * window:
+        return -3
+    return 0
+
+
+def build_form_table(form_multipliers: Dict[int, float], window: int = FORM_WINDOW) -> Tuple[Tuple[float, ...], ...]:
+    """Form multipliers indexed by [wins][losses] over the form window"""
+    return tuple(
+        tuple(form_multipliers.get(form_score_from_counts(w, l, window), 1.0) for l in range(window + 1))
+        for w in range(window + 1)
+    )
+
+
+def form_multiplier(params: EloParameters, results: Iterable[str], window: int = FORM_WINDOW) -> float:
+    """Form multiplier for a team's recent results ('W'/'D'/'L', oldest first)"""
+    recent = list(results)[-window:]
+    return params.form_multipliers.get(form_score_from_counts(recent.count('W'), recent.count('L'), window), 1.0)
+
+
+def side_change(params: EloParameters, team_elo: float, opponent_elo: float, is_home: bool,
+                goals_scored: int, goals_conceded: int, form: float,
+                home_advantage: float) -> tuple:
+    """
+    Rating change for one side of a match with every intermediate value.
+    Returns (elo_change, expected, actual, opponent, venue, gd, form, defense,
+             k_adjusted, k_cap, k_final) without allocating any dicts.
+    """
+    # Expected score
+    if is_home:
+        expected = 1 / (1 + 10 ** ((opponent_elo - team_elo - home_advantage) / 400))
+    else:
+        expected = 1 - 1 / (1 + 10 ** ((team_elo - opponent_elo - home_advantage) / 400))
+
+    gd = goals_scored - goals_conceded
+    abs_gd = gd if gd >= 0 else -gd
+    if abs_gd > 4:
+        abs_gd = 4
+
+    if gd > 0:
+        # Win, with GD enhancement
+        actual = WIN_ACTUAL_SCORES[abs_gd]
+
+        # 1. Opponent Quality
+        if team_elo < opponent_elo:
+            opponent_mult = min(1.0 + ((opponent_elo - team_elo) / 400), 2.0)
+        else:
+            opponent_mult = max(1.0 - ((team_elo - opponent_elo) / 800), 0.6)
+
+        # 2. Venue
+        venue = params.venue_home_win if is_home else params.venue_away_win
+
+        # 3. Goal Difference
+        gd_mult = params.gd_win[abs_gd]
+
+        # 5. Defense (clean sheet, conceded 1, conceded 2+)
+        defense = params.win_defense[goals_conceded if goals_conceded < 2 else 2]
+    else:
+        actual = 0.5 if gd == 0 else 0.0
+        opponent_mult = 1.0
+        venue = params.venue_home_draw if is_home else params.venue_away_draw
+        gd_mult = params.gd_loss[abs_gd]
+        if gd < 0 and goals_scored == 0:
+            defense = params.shutout_loss_defense
+        else:
+            defense = 1.0
+
+    # Apply all multipliers (4. is form)
+    k_adjusted = params.base_k_factor * opponent_mult * venue * gd_mult * form * defense
+
+    # Apply K-factor cap
+    k_cap = params.k_cap_values[bisect_right(params.k_cap_thresholds, team_elo)]
+    k_final = k_adjusted if k_adjusted < k_cap else k_cap
+
+    elo_change = k_final * (actual - expected)
+
+    return (elo_change, expected, actual, opponent_mult, venue, gd_mult, form, defense,
+            k_adjusted, k_cap, k_final)
+
+
+def match_changes(params: EloParameters, home_elo: float, away_elo: float,
+                  home_score: int, away_score: int, home_form: float = 1.0, away_form: float = 1.0,
+                  home_advantage: Optional[float] = None) -> Tuple[float, float]:
+    """
+    (home_change, away_change) for one match. Both sides are computed inline
+    with the same formulas (and multiplication order) as side_change;
+    multipliers that are exactly 1.0 are skipped.
+    """
+    if home_advantage is None:
+        home_advantage = params.home_advantage
+    base_k = params.base_k_factor
+
+    expected_home = 1 / (1 + 10 ** ((away_elo - home_elo - home_advantage) / 400))
+    expected_away = 1 - expected_home
+
+    gd = home_score - away_score
+    if gd > 0:
+        abs_gd = gd if gd < 4 else 4
+        if home_elo < away_elo:
+            opponent_mult = min(1.0 + ((away_elo - home_elo) / 400), 2.0)
+        else:
+            opponent_mult = max(1.0 - ((home_elo - away_elo) / 800), 0.6)
+        home_k = (base_k * opponent_mult * params.venue_home_win * params.gd_win[abs_gd]
+                  * home_form * params.win_defense[away_score if away_score < 2 else 2])
+        away_k = base_k * params.venue_away_draw * params.gd_loss[abs_gd] * away_form
+        if away_score == 0:
+            away_k *= params.shutout_loss_defense
+        home_actual = WIN_ACTUAL_SCORES[abs_gd]
+        away_actual = 0.0
+    elif gd < 0:
+        abs_gd = -gd if gd > -4 else 4
+        if away_elo < home_elo:
+            opponent_mult = min(1.0 + ((home_elo - away_elo) / 400), 2.0)
+        else:
+            opponent_mult = max(1.0 - ((away_elo - home_elo) / 800), 0.6)
+        away_k = (base_k * opponent_mult * params.venue_away_win * params.gd_win[abs_gd]
+                  * away_form * params.win_defense[home_score if home_score < 2 else 2])
+        home_k = base_k * params.venue_home_draw * params.gd_loss[abs_gd] * home_form
+        if home_score == 0:
+            home_k *= params.shutout_loss_defense
+        home_actual = 0.0
+        away_actual = WIN_ACTUAL_SCORES[abs_gd]
+    else:
+        home_k = base_k * params.venue_home_draw * params.gd_loss[0] * home_form
+        away_k = base_k * params.venue_away_draw * params.gd_loss[0] * away_form
+        home_actual = away_actual = 0.5
+
+    # Apply K-factor caps
+    k_cap_values = params.k_cap_values
+    k_cap = k_cap_values[bisect_right(params.k_cap_thresholds, home_elo)]
+    if home_k > k_cap:
+        home_k = k_cap
+    k_cap = k_cap_values[bisect_right(params.k_cap_thresholds, away_elo)]
+    if away_k > k_cap:
+        away_k = k_cap
+
+    return home_k * (home_actual - expected_home), away_k * (away_actual - expected_away)
+
+
+def match_changes_array(params: EloParameters, home_elo: Sequence[float], away_elo: Sequence[float],
+                        home_score: Sequence[int], away_score: Sequence[int],
+                        home_form: Optional[Sequence[float]] = None,
+                        away_form: Optional[Sequence[float]] = None,
+                        home_advantage: Optional[float] = None) -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Vectorized match_changes over independent matches (each computed from its
+    own pre-match ratings and form). Returns (home_changes, away_changes).
+    The only part of the kernel that needs NumPy.
+    """
+    import numpy as np
+
+    if home_advantage is None:
+        home_advantage = params.home_advantage
+    home_elo = np.asarray(home_elo, dtype=np.float64)
+    away_elo = np.asarray(away_elo, dtype=np.float64)
+    home_score = np.asarray(home_score, dtype=np.int64)
+    away_score = np.asarray(away_score, dtype=np.int64)
+    home_form = np.ones(len(home_elo)) if home_form is None else np.asarray(home_form, dtype=np.float64)
+    away_form = np.ones(len(home_elo)) if away_form is None else np.asarray(away_form, dtype=np.float64)
+
+    # float_power matches Python's float ** bit for bit, np.power does not
+    expected_home = 1 / (1 + np.float_power(10.0, (away_elo - home_elo - home_advantage) / 400))
+    expected_away = 1 - expected_home
+
+    gd = home_score - away_score
+    abs_gd = np.minimum(np.abs(gd), 4)
+    home_win = gd > 0
+    away_win = gd < 0
+
+    # Winner's opponent quality multiplier (loser and draw sides use 1.0)
+    winner_elo = np.where(home_win, home_elo, away_elo)
+    loser_elo = np.where(home_win, away_elo, home_elo)
+    opponent_mult = np.where(
+        winner_elo < loser_elo,
+        np.minimum(1.0 + ((loser_elo - winner_elo) / 400), 2.0),
+        np.maximum(1.0 - ((winner_elo - loser_elo) / 800), 0.6)
+    )
+
+    gd_win = np.array(params.gd_win)[abs_gd]
+    gd_loss = np.array(params.gd_loss)[abs_gd]
+    win_defense = np.array(params.win_defense)
+    base_k = params.base_k_factor
+
+    # Winner: base * opponent * venue * gd * form * defense; others: base * venue * gd * form [* shutout]
+    home_k = np.where(
+        home_win,
+        base_k * opponent_mult * params.venue_home_win * gd_win * home_form
+        * win_defense[np.minimum(away_score, 2)],
+        base_k * params.venue_home_draw * gd_loss * home_form
+    )
+    home_k = np.where(away_win & (home_score == 0), home_k * params.shutout_loss_defense, home_k)
+    away_k = np.where(
+        away_win,
+        base_k * opponent_mult * params.venue_away_win * gd_win * away_form
+        * win_defense[np.minimum(home_score, 2)],
+        base_k * params.venue_away_draw * gd_loss * away_form
+    )
+    away_k = np.where(home_win & (away_score == 0), away_k * params.shutout_loss_defense, away_k)
+
+    win_actual = np.array(WIN_ACTUAL_SCORES)[abs_gd]
+    home_actual = np.where(home_win, win_actual, np.where(away_win, 0.0, 0.5))
+    away_actual = np.where(away_win, win_actual, np.where(home_win, 0.0, 0.5))
+
+    # Apply K-factor caps
+    k_cap_values = np.array(params.k_cap_values)
+    thresholds = np.array(params.k_cap_thresholds)
+    home_k = np.minimum(home_k, k_cap_values[np.searchsorted(thresholds, home_elo, side='right')])
+    away_k = np.minimum(away_k, k_cap_values[np.searchsorted(thresholds, away_elo, side='right')])
+
+    return home_k * (home_actual - expected_home), away_k * (away_actual - expected_away)
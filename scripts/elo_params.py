@@ -0,0 +1,193 @@
+"""
+Precompiled ELO parameter model
+Compiles data/parameters.json (or rows of the Supabase `parameters` table) into
+an immutable EloParameters object with bisect-ready K-cap thresholds and
+flattened multiplier lookups. Compiled models are cached on disk by content hash,
+and every model carries a stable fingerprint for cache invalidation.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+PARAMS_FILE = os.path.join(DATA_DIR, 'parameters.json')
+CACHE_DIR = os.path.join(DATA_DIR, '.cache')
+
+# Bump when EloParameters changes shape so stale cached models are ignored
+MODEL_VERSION = 2
+
+DEFAULT_HOME_ADVANTAGE = 50
+DEFAULT_DEFENSIVE_SCORE = 0.5
+
+# Draw model used by the predictions (see prediction_kernel.draw_probabilities)
+DEFAULT_DRAW_MODEL = {
+    'base': 0.2494,             # 24.94% draws in the 2024-25 season
+    'closeness_range': 200,     # ELO gap below which closeness adds to the draw chance
+    'closeness_scale': 2000,    # closeness bonus = (range - gap) / scale
+    'elite_threshold': 1650,    # both teams above this are "elite"
+    'elite_bonus': 0.08,
+    'defensive_scale': 0.06,    # bonus = (avg defensive score - 0.5) * scale
+    'min': 0.15,
+    'max': 0.40
+}
+
+
+@dataclass(frozen=True, eq=False)
+class EloParameters:
+    initial_elo: float
+    promoted_team_elo: float
+    base_k_factor: float
+
+    # K caps: value i applies while elo < k_cap_thresholds[i]; the last value applies above all
+    k_cap_thresholds: Tuple[float, ...]
+    k_cap_values: Tuple[float, ...]
+
+    venue_home_win: float
+    venue_home_draw: float
+    venue_away_win: float
+    venue_away_draw: float
+
+    # Indexed by min(abs(goal_diff), 4)
+    gd_win: Tuple[float, ...]
+    gd_loss: Tuple[float, ...]
+
+    # Form score (5, 4, 3, 0, -3) -> multiplier
+    form_multipliers: Mapping[int, float]
+
+    # Win by goals conceded (0, 1, 2+), and shutout loss
+    win_defense: Tuple[float, float, float]
+    shutout_loss_defense: float
+
+    home_advantage: float
+    draw_model: Mapping[str, float]
+    team_home_advantages: Mapping[str, float]
+    defensive_scores: Mapping[str, float]
+
+    source: Mapping
+    fingerprint: str
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, EloParameters) and other.fingerprint == self.fingerprint
+
+    def __hash__(self) -> int:
+        return hash(self.fingerprint)
+
+    def k_cap(self, elo: float) -> float:
+        """K-factor cap for a rating (O(log n) bisect over the thresholds)"""
+        return self.k_cap_values[bisect_right(self.k_cap_thresholds, elo)]
+
+    def gd_multiplier(self, goal_diff: int, is_winner: bool) -> float:
+        abs_gd = min(abs(goal_diff), 4)
+        return self.gd_win[abs_gd] if is_winner else self.gd_loss[abs_gd]
+
+    def defensive_score(self, team: str) -> float:
+        return self.defensive_scores.get(team, DEFAULT_DEFENSIVE_SCORE)
+
+    def to_dict(self) -> Dict:
+        """The parameters in parameters.json form"""
+        return json.loads(json.dumps(self.source))
+
+
+def parameters_fingerprint(raw: Mapping) -> str:
+    """Stable SHA-256 of the parameters, independent of key order and formatting"""
+    # Round-trip through JSON first so int keys (module constants) and string
+    # keys (parameters.json / JSONB rows) hash the same
+    return _fingerprint_normalized(json.loads(json.dumps(raw, default=str)))
+
+
+def _fingerprint_normalized(normalized: Mapping) -> str:
+    canonical = json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _numeric_keys(table: Mapping, cast=int) -> Dict:
+    return {cast(key): value for key, value in table.items()}
+
+
+def compile_parameters(raw: Mapping) -> EloParameters:
+    """Compile a parameters.json-style dict into an EloParameters model"""
+    normalized = json.loads(json.dumps(raw, default=str))
+    k_caps = _numeric_keys(raw['k_caps'], float)
+    thresholds = tuple(sorted(k_caps))
+    cap_values = tuple(k_caps[t] for t in thresholds) + (k_caps[thresholds[-1]],)
+
+    venue = raw['venue_multipliers']
+    gd_win = _numeric_keys(raw['gd_multipliers']['win'])
+    gd_loss = _numeric_keys(raw['gd_multipliers']['loss'])
+    defensive = raw['defensive_multipliers']
+    baseline = raw.get('baseline_stats') or {}
+
+    return EloParameters(
+        initial_elo=raw['initial_elo'],
+        promoted_team_elo=raw['promoted_team_elo'],
+        base_k_factor=raw['base_k_factor'],
+        k_cap_thresholds=thresholds,
+        k_cap_values=cap_values,
+        venue_home_win=venue['home_win'],
+        venue_home_draw=venue['home_draw'],
+        venue_away_win=venue['away_win'],
+        venue_away_draw=venue['away_draw'],
+        # Same fallbacks as ELOCalculator.calculate_gd_multiplier (index 0 = draw)
+        gd_win=tuple(gd_win.get(gd, 1.5) for gd in range(5)),
+        gd_loss=tuple(gd_loss.get(gd, 0.7) for gd in range(5)),
+        form_multipliers=_numeric_keys(raw['form_multipliers']),
+        win_defense=(
+            defensive['clean_sheet_win'],
+            defensive['win_concede_1'],
+            defensive['win_concede_2plus']
+        ),
+        shutout_loss_defense=defensive['shutout_loss'],
+        home_advantage=baseline.get('avg_home_advantage', DEFAULT_HOME_ADVANTAGE),
+        draw_model={**DEFAULT_DRAW_MODEL, **raw.get('draw_model', {})},
+        team_home_advantages=dict(baseline.get('team_home_advantages', {})),
+        defensive_scores={
+            team: quality.get('defensive_score', DEFAULT_DEFENSIVE_SCORE)
+            for team, quality in baseline.get('team_defensive_quality', {}).items()
+        },
+        source=normalized,
+        fingerprint=_fingerprint_normalized(normalized)
+    )
+
+
+def load_parameters(path: str = PARAMS_FILE, cache_dir: Optional[str] = CACHE_DIR) -> EloParameters:
+    """
+    Load and compile a parameters file, reusing the compiled model cached
+    under cache_dir when the file content hash matches
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    cache_file = None
+    if cache_dir:
+        content_hash = hashlib.sha256(content).hexdigest()
+        cache_file = os.path.join(cache_dir, f'parameters-v{MODEL_VERSION}-{content_hash[:16]}.pickle')
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'rb') as f:
+                    return pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                pass
+
+    params = compile_parameters(json.loads(content.decode('utf-8')))
+
+    if cache_file:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = cache_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(params, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+
+    return params
+
+
+def parameters_from_rows(rows: Iterable[Mapping]) -> EloParameters:
+    """Compile rows of the Supabase `parameters` table (param_key, param_value)"""
+    return compile_parameters({row['param_key']: row['param_value'] for row in rows})
@@ -0,0 +1,272 @@
+"""
+Point-in-time ELO snapshot index
+Built from replayed match records (the dicts ELOCalculator.process_match
+returns). Stores, per season, one row of ratings at the end of every matchday
+for the teams in that season, plus a per-team change log (day, rating after
+the matchday) in CSR form. elo_at(), table_at() and rank_changes() answer
+"ratings as of date D" by binary search instead of replaying from the start.
+Everything is held in flat NumPy arrays, so memory grows with matchdays x
+teams-per-season rather than with Python objects per match.
+"""
+
+import argparse
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from elo_state import parse_match_date
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+SNAPSHOT_FILE = os.path.join(DATA_DIR, 'elo_snapshots.npz')
+
+SECONDS_PER_DAY = 86400
+
+DateLike = Union[str, date, datetime, int]
+
+
+def day_number(value: DateLike) -> int:
+    """Days since 1970-01-01 for a match date, ISO date string, date/datetime or day number"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return parse_match_date(value) // SECONDS_PER_DAY
+
+
+class EloSnapshotIndex:
+    """
+    Immutable query index. Seasons are stored as blocks:
+      block_start[b]            first matchday of block b (blocks sorted by start)
+      block_days[b]             matchdays of the block, ascending
+      block_teams[b]            team ids (columns) in the block
+      block_ratings[b]          ratings at the end of each matchday, shape (days, teams)
+      block_leagues[b]          league id of each column
+    and per team, log_days/log_elos[log_offsets[t]:log_offsets[t + 1]] is its change log.
+    """
+
+    def __init__(self, teams: List[str], leagues: List[str], start_elos: np.ndarray,
+                 log_offsets: np.ndarray, log_days: np.ndarray, log_elos: np.ndarray,
+                 block_start: np.ndarray, block_days: List[np.ndarray], block_teams: List[np.ndarray],
+                 block_ratings: List[np.ndarray], block_leagues: List[np.ndarray]):
+        self.teams = teams
+        self.leagues = leagues
+        self.start_elos = start_elos
+        self.log_offsets = log_offsets
+        self.log_days = log_days
+        self.log_elos = log_elos
+        self.block_start = block_start
+        self.block_days = block_days
+        self.block_teams = block_teams
+        self.block_ratings = block_ratings
+        self.block_leagues = block_leagues
+        self.team_ids = {team: i for i, team in enumerate(teams)}
+        self.league_ids = {league: i for i, league in enumerate(leagues)}
+
+    @classmethod
+    def from_matches(cls, matches: Iterable[Mapping]) -> 'EloSnapshotIndex':
+        """
+        Build from processed match records in replay order. Each needs date,
+        seasonYear, leagueName, home/awayTeamName and home/away_elo_pre/post.
+        """
+        team_ids: Dict[str, int] = {}
+        league_ids: Dict[str, int] = {}
+        start_elos: List[float] = []
+        changes: Dict[int, Dict[int, float]] = defaultdict(dict)   # team -> {day: elo}
+        seasons: Dict[int, Dict] = {}
+
+        for m in matches:
+            day = day_number(m['date'])
+            league = league_ids.setdefault(m['leagueName'], len(league_ids))
+            season = seasons.setdefault(m['seasonYear'], {'days': {}, 'teams': {}, 'start': {}})
+            for side in ('home', 'away'):
+                name = m[f'{side}TeamName']
+                team = team_ids.get(name)
+                if team is None:
+                    team = team_ids[name] = len(team_ids)
+                    start_elos.append(m[f'{side}_elo_pre'])
+                if team not in season['teams']:
+                    season['teams'][team] = league
+                    season['start'][team] = m[f'{side}_elo_pre']
+                changes[team][day] = m[f'{side}_elo_post']
+            # Ratings at the end of the day win because later matches overwrite them
+            season['days'][day] = None
+
+        # Per-team change logs, CSR
+        n_teams = len(team_ids)
+        log_offsets = np.zeros(n_teams + 1, dtype=np.int64)
+        for team in range(n_teams):
+            log_offsets[team + 1] = log_offsets[team] + len(changes[team])
+        log_days = np.empty(log_offsets[-1], dtype=np.int32)
+        log_elos = np.empty(log_offsets[-1], dtype=np.float64)
+        for team in range(n_teams):
+            entries = sorted(changes[team].items())
+            lo, hi = log_offsets[team], log_offsets[team + 1]
+            log_days[lo:hi] = [day for day, _ in entries]
+            log_elos[lo:hi] = [elo for _, elo in entries]
+
+        index = cls(list(team_ids), list(league_ids), np.array(start_elos, dtype=np.float64),
+                    log_offsets, log_days, log_elos, np.empty(0, dtype=np.int32), [], [], [], [])
+
+        # Season blocks: each column is filled from the team's change log
+        blocks = sorted(seasons.values(), key=lambda s: min(s['days']))
+        for season in blocks:
+            days = np.array(sorted(season['days']), dtype=np.int32)
+            teams = np.array(list(season['teams']), dtype=np.int32)
+            ratings = np.empty((len(days), len(teams)), dtype=np.float64)
+            for col, team in enumerate(teams.tolist()):
+                lo, hi = log_offsets[team], log_offsets[team + 1]
+                team_days = log_days[lo:hi]
+                pos = np.searchsorted(team_days, days, side='right') - 1
+                # Before the team's first match of the season it holds its season start rating
+                first = np.searchsorted(team_days, days[0], side='left')
+                ratings[:, col] = np.where(pos >= first, log_elos[lo + np.maximum(pos, 0)],
+                                           season['start'][team])
+            index.block_days.append(days)
+            index.block_teams.append(teams)
+            index.block_ratings.append(ratings)
+            index.block_leagues.append(np.array([season['teams'][t] for t in teams.tolist()], dtype=np.int16))
+        index.block_start = np.array([days[0] for days in index.block_days], dtype=np.int32)
+        return index
+
+    def elo_at(self, team: str, when: DateLike) -> Optional[float]:
+        """
+        A team's rating at the end of `when`. Before its first match this is
+        its starting rating; None for unknown teams.
+        """
+        idx = self.team_ids.get(team)
+        if idx is None:
+            return None
+        lo, hi = self.log_offsets[idx], self.log_offsets[idx + 1]
+        pos = np.searchsorted(self.log_days[lo:hi], day_number(when), side='right')
+        return float(self.log_elos[lo + pos - 1]) if pos else float(self.start_elos[idx])
+
+    def _row_at(self, when: DateLike) -> Optional[Tuple[int, int]]:
+        """(block, row) of the last matchday on or before `when`"""
+        day = day_number(when)
+        block = int(np.searchsorted(self.block_start, day, side='right')) - 1
+        if block < 0:
+            return None
+        row = int(np.searchsorted(self.block_days[block], day, side='right')) - 1
+        return block, row
+
+    def table_at(self, league: Optional[str], when: DateLike) -> List[Tuple[str, float]]:
+        """
+        (team, elo) for a league (or every team with league=None) at the end of
+        `when`, highest first. Uses the season in progress on that date.
+        """
+        found = self._row_at(when)
+        if found is None:
+            return []
+        block, row = found
+        ratings = self.block_ratings[block][row]
+        teams = self.block_teams[block]
+        if league is not None:
+            league_id = self.league_ids.get(league)
+            if league_id is None:
+                return []
+            mask = self.block_leagues[block] == league_id
+            ratings = ratings[mask]
+            teams = teams[mask]
+        order = np.argsort(-ratings, kind='stable')
+        return [(self.teams[t], float(r)) for t, r in zip(teams[order].tolist(), ratings[order].tolist())]
+
+    def rank_changes(self, start: DateLike, end: DateLike, league: Optional[str] = None) -> List[Dict]:
+        """
+        Rank and rating movement of every team ranked on both dates, biggest
+        climbers first
+        """
+        before = {team: (rank, elo) for rank, (team, elo) in enumerate(self.table_at(league, start), 1)}
+        after = self.table_at(league, end)
+        changes = [
+            {
+                'team': team,
+                'rank_before': before[team][0],
+                'rank_after': rank,
+                'rank_change': before[team][0] - rank,
+                'elo_before': before[team][1],
+                'elo_after': elo,
+                'elo_change': elo - before[team][1]
+            }
+            for rank, (team, elo) in enumerate(after, 1) if team in before
+        ]
+        changes.sort(key=lambda c: (-c['rank_change'], c['rank_after']))
+        return changes
+
+    def save(self, path: str = SNAPSHOT_FILE):
+        arrays = {
+            'teams': np.array(self.teams),
+            'leagues': np.array(self.leagues),
+            'start_elos': self.start_elos,
+            'log_offsets': self.log_offsets,
+            'log_days': self.log_days,
+            'log_elos': self.log_elos,
+            'block_start': self.block_start
+        }
+        for b in range(len(self.block_days)):
+            arrays[f'block{b}_days'] = self.block_days[b]
+            arrays[f'block{b}_teams'] = self.block_teams[b]
+            arrays[f'block{b}_ratings'] = self.block_ratings[b]
+            arrays[f'block{b}_leagues'] = self.block_leagues[b]
+        tmp_file = path + '.tmp.npz'
+        np.savez_compressed(tmp_file, **arrays)
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path: str = SNAPSHOT_FILE) -> 'EloSnapshotIndex':
+        with np.load(path) as npz:
+            n_blocks = len(npz['block_start'])
+            return cls(
+                npz['teams'].tolist(), npz['leagues'].tolist(), npz['start_elos'],
+                npz['log_offsets'], npz['log_days'], npz['log_elos'], npz['block_start'],
+                [npz[f'block{b}_days'] for b in range(n_blocks)],
+                [npz[f'block{b}_teams'] for b in range(n_blocks)],
+                [npz[f'block{b}_ratings'] for b in range(n_blocks)],
+                [npz[f'block{b}_leagues'] for b in range(n_blocks)]
+            )
+
+
+def build_from_season_files(data_dir: str = DATA_DIR) -> EloSnapshotIndex:
+    """Index the replayed 2024-25 matches and completed 2025-26 matches"""
+    with open(os.path.join(data_dir, 'season_2024_25.json'), 'r', encoding='utf-8') as f:
+        matches = sorted(json.load(f)['matches'], key=lambda x: x['date'])
+    with open(os.path.join(data_dir, 'season_2025_26.json'), 'r', encoding='utf-8') as f:
+        matches += json.load(f)['completed_matches']
+    return EloSnapshotIndex.from_matches(matches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the point-in-time ELO snapshot index")
+    parser.add_argument('--rebuild', action='store_true', help="rebuild from the season files")
+    parser.add_argument('--team', help="print the team's rating on --date")
+    parser.add_argument('--league', help="print the league table on --date")
+    parser.add_argument('--date', help="query date (YYYY-MM-DD)")
+    parser.add_argument('--since', help="with --date, print rank changes since this date")
+    args = parser.parse_args()
+
+    if args.rebuild or not os.path.exists(SNAPSHOT_FILE):
+        index = build_from_season_files()
+        index.save()
+        print(f"Indexed {len(index.teams)} teams, {len(index.log_days)} team-matchdays "
+              f"in {len(index.block_days)} seasons -> {SNAPSHOT_FILE}")
+    else:
+        index = EloSnapshotIndex.load()
+
+    if not args.date:
+        return
+    if args.team:
+        print(f"{args.team} on {args.date}: {index.elo_at(args.team, args.date)}")
+    if args.since:
+        for change in index.rank_changes(args.since, args.date, args.league):
+            print(f"  {change['team']:30s} {change['rank_before']:3d} -> {change['rank_after']:3d} "
+                  f"({change['elo_change']:+.1f})")
+    elif args.league:
+        for rank, (team, elo) in enumerate(index.table_at(args.league, args.date), 1):
+            print(f"  {rank:2d}. {team:30s}: {elo:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Compact team state for the scalar ELO path
+Teams get dense integer ids (from homeTeamId/awayTeamId), ratings live in an
+array('d'), and matches are __slots__ records with dates parsed once into
+epoch seconds.
+"""
+
+import calendar
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+
+def parse_match_date(value: Union[str, datetime, None]) -> int:
+    """Parse a match date ('YYYY-MM-DD HH:MM:SS', ISO string or datetime) into epoch seconds (UTC)"""
+    if value is None:
+        return 0
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        return int(value.timestamp())
+    return calendar.timegm(value.timetuple())
+
+
+class MatchRecord:
+    """
+    A completed match in index form; ELO fields (and the form multipliers
+    each side played with) are filled in by the replay
+    """
+    __slots__ = ('home', 'away', 'home_score', 'away_score', 'ts', 'event_id',
+                 'home_elo_pre', 'away_elo_pre', 'home_elo_change', 'away_elo_change',
+                 'home_form', 'away_form')
+
+    def __init__(self, home: int, away: int, home_score: int, away_score: int,
+                 ts: int = 0, event_id: Optional[int] = None):
+        self.home = home
+        self.away = away
+        self.home_score = home_score
+        self.away_score = away_score
+        self.ts = ts
+        self.event_id = event_id
+        self.home_elo_pre = 0.0
+        self.away_elo_pre = 0.0
+        self.home_elo_change = 0.0
+        self.away_elo_change = 0.0
+        self.home_form = 1.0
+        self.away_form = 1.0
+
+
+class TeamState:
+    """Dense team index with array-backed ratings"""
+    __slots__ = ('initial_elo', 'names', 'ratings', '_by_id', '_by_name')
+
+    def __init__(self, initial_elo: float = 1500):
+        self.initial_elo = float(initial_elo)
+        self.names: List[str] = []
+        self.ratings = array('d')
+        self._by_id: Dict[int, int] = {}
+        self._by_name: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def index(self, name: str, team_id: Optional[int] = None) -> int:
+        """Return the dense index for a team, registering it at the initial ELO if new"""
+        if team_id is not None:
+            idx = self._by_id.get(team_id)
+            if idx is not None:
+                return idx
+        idx = self._by_name.get(name)
+        if idx is None:
+            idx = len(self.names)
+            self.names.append(name)
+            self.ratings.append(self.initial_elo)
+            self._by_name[name] = idx
+        if team_id is not None:
+            self._by_id[team_id] = idx
+        return idx
+
+    def find(self, name: str) -> Optional[int]:
+        """Index for a team name, or None if the team has not been seen"""
+        return self._by_name.get(name)
+
+    def get(self, name: str, default: Optional[float] = None) -> Optional[float]:
+        idx = self._by_name.get(name)
+        return default if idx is None else self.ratings[idx]
+
+    def set(self, name: str, elo: float) -> int:
+        idx = self.index(name)
+        self.ratings[idx] = elo
+        return idx
+
+    def load(self, elos: Dict[str, float]):
+        """Set ratings from a {team_name: elo} dict"""
+        for name, elo in elos.items():
+            self.set(name, elo)
+
+    def to_dict(self) -> Dict[str, float]:
+        return dict(zip(self.names, self.ratings))
+
+    def compile_matches(self, matches: Iterable[Dict]) -> List[MatchRecord]:
+        """Convert completed match dicts into MatchRecords (pending matches are skipped)"""
+        records = []
+        append = records.append
+        index = self.index
+        # Many fixtures share a kickoff time, so each distinct date is parsed once
+        timestamps: Dict[object, int] = {}
+        for m in matches:
+            home_score = m['homeTeamScore']
+            away_score = m['awayTeamScore']
+            if home_score is None or away_score is None:
+                continue
+            date = m.get('date')
+            ts = timestamps.get(date)
+            if ts is None:
+                ts = timestamps[date] = parse_match_date(date)
+            append(MatchRecord(
+                index(m['homeTeamName'], m.get('homeTeamId')),
+                index(m['awayTeamName'], m.get('awayTeamId')),
+                home_score, away_score, ts, m.get('eventId')
+            ))
+        return records
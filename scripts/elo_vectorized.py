@@ -0,0 +1,179 @@
+"""
+Vectorized ELO replay engine
+Replays completed matches in batches of fixtures that share no team, computing
+expected scores, multipliers, K caps and rating deltas as NumPy array operations.
+Produces exactly the same ratings as ELOCalculator.process_match.
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from elo_kernel import FORM_WINDOW, build_form_table, match_changes_array
+from elo_params import EloParameters
+from process_data import ELOCalculator, DEFAULT_PARAMETERS
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+
+def schedule_batches(home_idx: np.ndarray, away_idx: np.ndarray, n_teams: int) -> np.ndarray:
+    """
+    Assign each match to a batch so that no team appears twice in a batch.
+    A match goes into the batch after the latest batch either team played in,
+    which keeps every team's matches in their original order.
+    """
+    last_batch = [-1] * n_teams
+    batches = np.empty(len(home_idx), dtype=np.int64)
+    for i, (h, a) in enumerate(zip(home_idx.tolist(), away_idx.tolist())):
+        batch = max(last_batch[h], last_batch[a]) + 1
+        last_batch[h] = batch
+        last_batch[a] = batch
+        batches[i] = batch
+    return batches
+
+
+def replay_vectorized(matches: List[Dict], home_advantage: float = 50,
+                      initial_elos: Optional[Dict[str, float]] = None,
+                      params: Optional[EloParameters] = None) -> Dict:
+    """
+    Replay matches (already sorted by date) and return final ELOs plus
+    per-match pre-match ratings and changes, in input order. Each batch is
+    one elo_kernel.match_changes_array call.
+    Matches without scores are skipped, as in ELOCalculator.process_match.
+    """
+    params = params or DEFAULT_PARAMETERS
+
+    # Form multipliers indexed by [wins, losses]
+    form_table = np.array(build_form_table(params.form_multipliers, FORM_WINDOW))
+
+    played = [m for m in matches
+              if m['homeTeamScore'] is not None and m['awayTeamScore'] is not None]
+
+    team_index: Dict[str, int] = {}
+    for team in (initial_elos or {}):
+        team_index.setdefault(team, len(team_index))
+    for m in played:
+        team_index.setdefault(m['homeTeamName'], len(team_index))
+        team_index.setdefault(m['awayTeamName'], len(team_index))
+    n_teams = len(team_index)
+
+    elos = np.full(n_teams, float(params.initial_elo))
+    for team, elo in (initial_elos or {}).items():
+        elos[team_index[team]] = elo
+
+    n = len(played)
+    home_idx = np.fromiter((team_index[m['homeTeamName']] for m in played), dtype=np.int64, count=n)
+    away_idx = np.fromiter((team_index[m['awayTeamName']] for m in played), dtype=np.int64, count=n)
+    home_score = np.fromiter((m['homeTeamScore'] for m in played), dtype=np.int64, count=n)
+    away_score = np.fromiter((m['awayTeamScore'] for m in played), dtype=np.int64, count=n)
+
+    home_elo_pre = np.empty(n)
+    away_elo_pre = np.empty(n)
+    home_elo_change = np.empty(n)
+    away_elo_change = np.empty(n)
+
+    # Rolling last-5 results per team: 1 = W, -1 = L, 0 = D / empty slot
+    form_ring = np.zeros((n_teams, FORM_WINDOW), dtype=np.int8)
+    games_played = np.zeros(n_teams, dtype=np.int64)
+    wins = np.zeros(n_teams, dtype=np.int64)
+    losses = np.zeros(n_teams, dtype=np.int64)
+
+    batches = schedule_batches(home_idx, away_idx, n_teams)
+    order = np.argsort(batches, kind='stable')
+    bounds = np.flatnonzero(np.diff(batches[order])) + 1
+
+    for rows in np.split(order, bounds):
+        h = home_idx[rows]
+        a = away_idx[rows]
+        hs = home_score[rows]
+        aws = away_score[rows]
+        h_elo = elos[h]
+        a_elo = elos[a]
+
+        home_change, away_change = match_changes_array(
+            params, h_elo, a_elo, hs, aws,
+            form_table[wins[h], losses[h]], form_table[wins[a], losses[a]], home_advantage
+        )
+        elos[h] += home_change
+        elos[a] += away_change
+
+        # Both sides of every match in one array: home rows first, then away
+        team = np.concatenate((h, a))
+        scored = np.concatenate((hs, aws))
+        conceded = np.concatenate((aws, hs))
+        won = scored > conceded
+        lost = scored < conceded
+
+        # Push results into the rolling form window
+        result = np.where(won, 1, np.where(lost, -1, 0)).astype(np.int8)
+        slot = games_played[team] % FORM_WINDOW
+        dropped = form_ring[team, slot]
+        wins[team] += (result == 1).astype(np.int64) - (dropped == 1)
+        losses[team] += (result == -1).astype(np.int64) - (dropped == -1)
+        form_ring[team, slot] = result
+        games_played[team] += 1
+
+        home_elo_pre[rows] = h_elo
+        away_elo_pre[rows] = a_elo
+        home_elo_change[rows] = home_change
+        away_elo_change[rows] = away_change
+
+    team_names = list(team_index)
+    return {
+        'final_elos': {team: float(elos[i]) for i, team in enumerate(team_names)},
+        'matches': played,
+        'home_elo_pre': home_elo_pre,
+        'away_elo_pre': away_elo_pre,
+        'home_elo_change': home_elo_change,
+        'away_elo_change': away_elo_change,
+        'n_batches': len(bounds) + 1 if n else 0
+    }
+
+
+def main():
+    """Replay the 2024-25 season with each engine and compare"""
+    print("="*80)
+    print("VECTORIZED REPLAY - 2024-25 SEASON")
+    print("="*80)
+
+    with open(os.path.join(DATA_DIR, 'season_2024_25.json'), 'r', encoding='utf-8') as f:
+        season = json.load(f)
+
+    matches = sorted(season['matches'], key=lambda x: x['date'])
+    home_advantage = season['baseline_stats']['avg_home_advantage']
+
+    start = time.perf_counter()
+    calculator = ELOCalculator()
+    for idx, match in enumerate(matches):
+        calculator.process_match(match, idx, home_advantage)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compact = ELOCalculator()
+    compact.replay(matches, home_advantage)
+    compact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = replay_vectorized(matches, home_advantage)
+    vector_time = time.perf_counter() - start
+
+    compact_elos = compact.team_elos
+    mismatches = [team for team, elo in calculator.team_elos.items()
+                  if result['final_elos'].get(team) != elo or compact_elos.get(team) != elo]
+
+    print(f"\nMatches: {len(result['matches'])} in {result['n_batches']} batches")
+    print(f"Scalar replay:     {scalar_time * 1000:.1f} ms")
+    print(f"Compact replay:    {compact_time * 1000:.1f} ms")
+    print(f"Vectorized replay: {vector_time * 1000:.1f} ms")
+    print(f"Teams with different final ELO: {len(mismatches)}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
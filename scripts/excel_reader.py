@@ -0,0 +1,157 @@
+"""
+Streaming Excel match reader
+Opens the match workbook in openpyxl read-only mode, resolves columns by header
+name (not position) and yields one typed match dict per row from a generator,
+collecting the row count, date range and per-season counts in the same pass.
+Memory stays flat however many seasons the workbook holds.
+"""
+
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import openpyxl
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+WORKBOOK_FILE = os.path.join(REPO_DIR, 'archive', 'Football-Top5-Past-And-Current-Data.xlsx')
+MATCH_SHEET = 'Super Data'
+
+# Columns every match workbook must have
+REQUIRED_COLUMNS = (
+    'seasonName', 'seasonYear', 'leagueName', 'eventId', 'date',
+    'homeTeamName', 'awayTeamName', 'homeTeamScore', 'awayTeamScore'
+)
+
+INT_COLUMNS = frozenset((
+    'Rn', 'seasonType', 'seasonYear', 'leagueId', 'eventId', 'venueId', 'attendance',
+    'homeTeamId', 'awayTeamId', 'homeTeamScore', 'awayTeamScore',
+    'homeTeamShootoutScore', 'awayTeamShootoutScore', 'statusId'
+))
+BOOL_COLUMNS = frozenset(('homeTeamWinner', 'awayTeamWinner'))
+DATE_COLUMNS = frozenset(('date', 'updateTime'))
+
+# statusId of fixtures that have not been played yet
+STATUS_SCHEDULED = 1
+
+
+def _to_int(value):
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+def _to_bool(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
+    return bool(value)
+
+
+def _to_datetime(value):
+    if value is None or value == '' or isinstance(value, datetime):
+        return value or None
+    return datetime.fromisoformat(str(value))
+
+
+def _converter(column: str):
+    if column in INT_COLUMNS:
+        return _to_int
+    if column in BOOL_COLUMNS:
+        return _to_bool
+    if column in DATE_COLUMNS:
+        return _to_datetime
+    return None
+
+
+class WorkbookStats:
+    """Summary of the rows a reader has yielded so far"""
+
+    def __init__(self):
+        self.rows = 0
+        self.completed = 0
+        self.first_date: Optional[datetime] = None
+        self.last_date: Optional[datetime] = None
+        self.seasons: Counter = Counter()
+
+    def update(self, record: Dict):
+        self.rows += 1
+        if record.get('homeTeamScore') is not None and record.get('awayTeamScore') is not None:
+            self.completed += 1
+        match_date = record.get('date')
+        if isinstance(match_date, datetime):
+            if self.first_date is None or match_date < self.first_date:
+                self.first_date = match_date
+            if self.last_date is None or match_date > self.last_date:
+                self.last_date = match_date
+        self.seasons[record.get('seasonName')] += 1
+
+
+class ExcelMatchReader:
+    """
+    Iterate a match workbook row by row:
+
+        reader = ExcelMatchReader()
+        for match in reader:
+            ...
+        print(reader.stats.rows, reader.stats.first_date)
+
+    `columns` restricts the dicts to those headers (all columns by default).
+    """
+
+    def __init__(self, path: str = WORKBOOK_FILE, sheet: Optional[str] = MATCH_SHEET,
+                 columns: Optional[Sequence[str]] = None,
+                 required: Sequence[str] = REQUIRED_COLUMNS):
+        self.path = path
+        self.sheet = sheet
+        self.columns = list(columns) if columns is not None else None
+        self.required = tuple(required)
+        self.headers: List[str] = []
+        self.stats = WorkbookStats()
+
+    def __iter__(self) -> Iterator[Dict]:
+        wb = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            ws = wb[self.sheet] if self.sheet else wb.active
+            rows = ws.iter_rows(values_only=True)
+            header_row = next(rows, None) or ()
+            self.headers = [str(h).strip() if h is not None else '' for h in header_row]
+            positions = self._resolve(self.headers)
+            fields = [(column, pos, _converter(column)) for column, pos in positions.items()]
+
+            self.stats = WorkbookStats()
+            for row in rows:
+                if not any(value is not None for value in row):
+                    continue
+                record = {}
+                for column, pos, convert in fields:
+                    value = row[pos] if pos < len(row) else None
+                    record[column] = convert(value) if convert else value
+                self.stats.update(record)
+                yield record
+        finally:
+            wb.close()
+
+    def _resolve(self, headers: List[str]) -> Dict[str, int]:
+        """Header name -> column position, checking the required columns exist"""
+        positions = {}
+        for pos, header in enumerate(headers):
+            if header and header not in positions:
+                positions[header] = pos
+
+        missing = [c for c in self.required if c not in positions]
+        if self.columns is not None:
+            missing += [c for c in self.columns if c not in positions and c not in missing]
+        if missing:
+            raise KeyError(f"{self.path}: missing column(s) {', '.join(missing)}")
+
+        if self.columns is None:
+            return positions
+        return {column: positions[column] for column in self.columns}
+
+
+def read_matches(path: str = WORKBOOK_FILE, sheet: Optional[str] = MATCH_SHEET,
+                 columns: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+    """Generator of typed match dicts (see ExcelMatchReader)"""
+    return iter(ExcelMatchReader(path, sheet, columns))
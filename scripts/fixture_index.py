@@ -0,0 +1,101 @@
+"""
+Team -> pending fixture inverted index
+A score entry only changes the ratings of the two teams involved, so only
+their pending fixtures need new predictions. The index maps every team to the
+eventIds of its pending fixtures; it is kept in the season file next to
+pending_matches (updated as fixtures leave or return to pending) and rebuilt
+in memory from the matches table for Supabase. Fresh predictions are compared
+with the stored ones so only rows whose probabilities changed are written.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+INDEX_KEY = 'fixture_index'
+
+# Predictions table columns that decide whether a stored row is out of date
+PREDICTION_COLUMNS = ('home_win_prob', 'draw_prob', 'away_win_prob',
+                      'home_or_draw_prob', 'away_or_draw_prob',
+                      'recommended_bet', 'recommended_prob', 'confidence')
+
+
+def add_fixture(index: Dict[str, List[int]], fixture: Mapping, home_key: str = 'homeTeamName',
+                away_key: str = 'awayTeamName', id_key: str = 'eventId'):
+    for team in (fixture[home_key], fixture[away_key]):
+        index.setdefault(team, []).append(fixture[id_key])
+
+
+def drop_fixture(index: Dict[str, List[int]], fixture: Mapping, home_key: str = 'homeTeamName',
+                 away_key: str = 'awayTeamName', id_key: str = 'eventId'):
+    for team in (fixture[home_key], fixture[away_key]):
+        event_ids = index.get(team)
+        if event_ids and fixture[id_key] in event_ids:
+            event_ids.remove(fixture[id_key])
+            if not event_ids:
+                del index[team]
+
+
+def build_index(fixtures: Iterable[Mapping], home_key: str = 'homeTeamName',
+                away_key: str = 'awayTeamName', id_key: str = 'eventId') -> Dict[str, List[int]]:
+    """{team: [eventId, ...]} over the given pending fixtures"""
+    index: Dict[str, List[int]] = {}
+    for fixture in fixtures:
+        add_fixture(index, fixture, home_key, away_key, id_key)
+    return index
+
+
+def season_index(data: Dict) -> Dict[str, List[int]]:
+    """
+    The season file's fixture index, rebuilt from pending_matches if it is
+    missing or does not cover every pending fixture (a file written by a
+    script that does not maintain it)
+    """
+    index = data.get(INDEX_KEY)
+    if index is None or sum(len(ids) for ids in index.values()) != 2 * len(data['pending_matches']):
+        index = data[INDEX_KEY] = build_index(data['pending_matches'])
+    return index
+
+
+def fixtures_for(index: Mapping[str, Sequence[int]], teams: Iterable[str]) -> Set[int]:
+    """eventIds of every pending fixture involving any of the teams"""
+    event_ids: Set[int] = set()
+    for team in teams:
+        event_ids.update(index.get(team, ()))
+    return event_ids
+
+
+def changed_teams(before: Mapping[str, float], after: Mapping[str, float]) -> Set[str]:
+    """Teams whose rating differs between two {team: elo} maps"""
+    return {team for team in before.keys() | after.keys() if before.get(team) != after.get(team)}
+
+
+def stale_teams(fixtures: Iterable[Mapping], stored: Mapping[int, Mapping], elos: Mapping[str, float],
+                home_key: str = 'home_team_name', away_key: str = 'away_team_name',
+                id_key: str = 'event_id', default_elo: Optional[float] = None) -> Set[str]:
+    """
+    Teams whose current rating differs from the one their stored predictions
+    were made with (stored: {event_id: prediction row with home_elo/away_elo})
+    """
+    teams: Set[str] = set()
+    for fixture in fixtures:
+        row = stored.get(fixture[id_key])
+        if row is None:
+            continue
+        for team, elo_key in ((fixture[home_key], 'home_elo'), (fixture[away_key], 'away_elo')):
+            if team not in teams and row.get(elo_key) is not None \
+                    and float(row[elo_key]) != elos.get(team, default_elo):
+                teams.add(team)
+    return teams
+
+
+def prediction_changed(old: Optional[Mapping], new: Mapping) -> bool:
+    """True if a fresh prediction differs from the stored row in any probability or recommendation"""
+    if old is None:
+        return True
+    for column in PREDICTION_COLUMNS:
+        old_value, new_value = old.get(column), new[column]
+        if isinstance(new_value, float):
+            if old_value is None or float(old_value) != new_value:
+                return True
+        elif old_value != new_value:
+            return True
+    return False
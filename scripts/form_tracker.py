@@ -0,0 +1,115 @@
+"""
+Rolling form tracker
+Keeps each team's last N results in a fixed-size ring buffer with running
+win/loss counts, so form lookups and updates are O(1) per team regardless
+of how many matches have been replayed.
+"""
+
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Result codes stored in the ring buffer
+WIN, DRAW, LOSS = 1, 0, -1
+RESULT_CODES = {'W': WIN, 'D': DRAW, 'L': LOSS}
+RESULT_LETTERS = {WIN: 'W', DRAW: 'D', LOSS: 'L'}
+
+
+class FormTracker:
+    """Per-team ring buffers of the last `window` results, indexed by dense team id"""
+    __slots__ = ('window', 'results', 'wins', 'losses', 'played')
+
+    def __init__(self, window: int = 5, n_teams: int = 0):
+        if window < 1:
+            raise ValueError("Form window must be at least 1")
+        self.window = window
+        self.results = array('b')
+        self.wins = array('l')
+        self.losses = array('l')
+        self.played = array('l')
+        self.ensure(n_teams)
+
+    def __len__(self) -> int:
+        return len(self.played)
+
+    def ensure(self, n_teams: int):
+        """Grow the tracker to hold at least n_teams teams"""
+        missing = n_teams - len(self.played)
+        if missing > 0:
+            self.results.extend(bytes(missing * self.window))
+            self.wins.extend([0] * missing)
+            self.losses.extend([0] * missing)
+            self.played.extend([0] * missing)
+
+    def push(self, team: int, result: int):
+        """Record a result (WIN/DRAW/LOSS) for a team, dropping the oldest once the window is full"""
+        played = self.played[team]
+        slot = team * self.window + played % self.window
+        if played >= self.window:
+            dropped = self.results[slot]
+            if dropped == WIN:
+                self.wins[team] -= 1
+            elif dropped == LOSS:
+                self.losses[team] -= 1
+        self.results[slot] = result
+        if result == WIN:
+            self.wins[team] += 1
+        elif result == LOSS:
+            self.losses[team] += 1
+        self.played[team] = played + 1
+
+    def push_match(self, home: int, away: int, home_result: int):
+        """push() for both sides of a match (the away result is the home result reversed)"""
+        window = self.window
+        results = self.results
+        wins = self.wins
+        losses = self.losses
+        played = self.played
+        for team, result in ((home, home_result), (away, -home_result)):
+            count = played[team]
+            slot = team * window + count % window
+            if count >= window:
+                dropped = results[slot]
+                if dropped == WIN:
+                    wins[team] -= 1
+                elif dropped == LOSS:
+                    losses[team] -= 1
+            results[slot] = result
+            if result == WIN:
+                wins[team] += 1
+            elif result == LOSS:
+                losses[team] += 1
+            played[team] = count + 1
+
+    def counts(self, team: int) -> Tuple[int, int]:
+        """(wins, losses) over the team's current window"""
+        return self.wins[team], self.losses[team]
+
+    def recent(self, team: int) -> List[str]:
+        """The team's results in the window as 'W'/'D'/'L', oldest first"""
+        played = self.played[team]
+        size = min(played, self.window)
+        base = team * self.window
+        start = played - size
+        return [RESULT_LETTERS[self.results[base + (start + i) % self.window]] for i in range(size)]
+
+    def to_dict(self, names: Optional[List[str]] = None) -> Dict:
+        """
+        Serializable state: the window size and each team's recent results
+        (oldest first), keyed by team name when names are given, else by index
+        """
+        keys = names if names is not None else [str(i) for i in range(len(self))]
+        return {
+            'window': self.window,
+            'results': {key: self.recent(i) for i, key in enumerate(keys) if i < len(self)}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, index: Callable[[str], int] = int) -> 'FormTracker':
+        """Rebuild a tracker from to_dict() output; `index` maps each key to a team index"""
+        tracker = cls(data.get('window', 5))
+        for key, results in data['results'].items():
+            team = index(key)
+            tracker.ensure(team + 1)
+            for result in results:
+                tracker.push(team, RESULT_CODES[result])
+        return tracker
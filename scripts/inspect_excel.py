@@ -1,35 +1,40 @@
 """Inspect Excel file structure"""
-import openpyxl
-from datetime import datetime
+from excel_reader import ExcelMatchReader
 
-wb = openpyxl.load_workbook(r'C:\Users\sidda\Desktop\Github Repositories\football-elo\archive\Football-Top5-Past-And-Current-Data.xlsx')
-ws = wb.active
+reader = ExcelMatchReader(
+    r'C:\Users\sidda\Desktop\Github Repositories\football-elo\archive\Football-Top5-Past-And-Current-Data.xlsx',
+    required=()
+)
+
+# One streaming pass: keep the first 3 rows and the last one
+first_rows = []
+last_row = None
+for match in reader:
+    if len(first_rows) < 3:
+        first_rows.append(match)
+    last_row = match
+
+headers = reader.headers
 
 # Print headers
 print("Column Headers:")
-headers = []
-for i, cell in enumerate(ws[1], 1):
-    headers.append(cell.value)
-    print(f"{i}. {cell.value}")
+for i, header in enumerate(headers, 1):
+    print(f"{i}. {header}")
 
 print("\n" + "="*80)
 print("First 3 data rows:")
 print("="*80)
 
-for row_num in range(2, 5):
-    row_data = []
-    for cell in ws[row_num]:
-        row_data.append(cell.value)
-
+for row_num, row_data in enumerate(first_rows, 2):
     print(f"\nRow {row_num}:")
-    for i, (header, value) in enumerate(zip(headers, row_data), 1):
-        print(f"  {i}. {header}: {value}")
+    for i, header in enumerate(headers, 1):
+        print(f"  {i}. {header}: {row_data.get(header)}")
 
 # Check last row
 print("\n" + "="*80)
-print(f"Last row (row {ws.max_row}):")
+print(f"Last row (row {reader.stats.rows + 1}):")
 print("="*80)
 
-last_row = list(ws[ws.max_row])
-for i, (header, cell) in enumerate(zip(headers, last_row), 1):
-    print(f"  {i}. {header}: {cell.value}")
+if last_row is not None:
+    for i, header in enumerate(headers, 1):
+        print(f"  {i}. {header}: {last_row.get(header)}")
@@ -1,26 +1,34 @@
 """
 Migrate JSON data to Supabase database
 Run this AFTER setting up the schema in Supabase
+Every table is upserted on its natural key (param_key, name, event_id,
+team_id + event_id for elo_history and league_name + team_name for
+standings) through bulk_writer.py, so the migration
+can be rerun safely; an interrupted run resumes from its checkpoint (--fresh
+starts over).
 """
 
+import argparse
 import json
 import os
 import sys
 import codecs
 from datetime import datetime
 
+import numpy as np
+
+from bulk_writer import BulkWriter, CHECKPOINT_FILE, DEFAULT_WORKERS, PostgresSink, SupabaseSink
+from rolling_state import season_state, team_context
+from season_store import current_store
+from standings import league_table, season_standings
+
 # Fix Windows encoding issues
 if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
-# You'll need to install supabase-py: pip install supabase
-try:
-    from supabase import create_client, Client
-except ImportError:
-    print("ERROR: Please install supabase-py first:")
-    print("pip install supabase")
-    exit(1)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
 
 # Configuration - Load from .env.local file
 def load_env_file():
@@ -34,166 +42,33 @@ def load_env_file():
                     key, value = line.split('=', 1)
                     os.environ[key] = value
 
-load_env_file()
-
-SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-    print("ERROR: Missing Supabase credentials")
-    print("Please ensure .env.local exists with:")
-    print("  NEXT_PUBLIC_SUPABASE_URL=...")
-    print("  SUPABASE_SERVICE_KEY=...")
-    exit(1)
-
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
-
-print("="*80)
-print("MIGRATING JSON DATA TO SUPABASE")
-print("="*80)
-
-# Load JSON data
-print("\n1. Loading JSON files...")
-with open(r'C:\Users\sidda\Desktop\Github Repositories\football-elo\data\season_2024_25.json', 'r') as f:
-    season_2024 = json.load(f)
-
-with open(r'C:\Users\sidda\Desktop\Github Repositories\football-elo\data\season_2025_26.json', 'r') as f:
-    season_2025 = json.load(f)
-
-with open(r'C:\Users\sidda\Desktop\Github Repositories\football-elo\data\parameters.json', 'r') as f:
-    params = json.load(f)
-
-print(f"   ✓ Loaded 2024-25 season: {len(season_2024['matches'])} matches")
-print(f"   ✓ Loaded 2025-26 season: {len(season_2025['completed_matches'])} completed, {len(season_2025['pending_matches'])} pending")
-print(f"   ✓ Loaded parameters")
-
-# 2. Insert parameters
-print("\n2. Inserting parameters...")
-param_rows = []
-for key, value in params.items():
-    param_rows.append({
-        'param_key': key,
-        'param_value': value,
-        'description': f'ELO parameter: {key}'
-    })
-
-result = supabase.table('parameters').insert(param_rows).execute()
-print(f"   ✓ Inserted {len(param_rows)} parameter records")
-
-# 3. Extract and insert teams with current ELO
-print("\n3. Inserting teams...")
-teams_set = set()
-team_leagues = {}
-
-# Get all unique teams from both seasons
-for match in season_2024['matches'] + season_2025['completed_matches'] + season_2025['pending_matches']:
-    teams_set.add(match['homeTeamName'])
-    teams_set.add(match['awayTeamName'])
-    team_leagues[match['homeTeamName']] = {
-        'league_id': match['leagueId'],
-        'league_name': match['leagueName']
-    }
-    team_leagues[match['awayTeamName']] = {
-        'league_id': match['leagueId'],
-        'league_name': match['leagueName']
-    }
 
-team_rows = []
-for team in teams_set:
-    current_elo = season_2025['current_elos'].get(team, 1500)
-    is_promoted = current_elo == 1400  # Promoted teams start at 1400
-
-    team_rows.append({
-        'name': team,
-        'league_id': team_leagues[team]['league_id'],
-        'league_name': team_leagues[team]['league_name'],
-        'current_elo': current_elo,
-        'is_promoted': is_promoted
-    })
-
-result = supabase.table('teams').insert(team_rows).execute()
-print(f"   ✓ Inserted {len(team_rows)} teams")
-
-# 4. Insert completed matches from 2024-25
-print("\n4. Inserting 2024-25 completed matches...")
-match_rows = []
-for match in season_2024['matches']:
-    match_rows.append({
-        'event_id': match['eventId'],
-        'season_type': match['seasonType'],
-        'season_name': match['seasonName'],
-        'season_year': match['seasonYear'],
-        'league_id': match['leagueId'],
-        'league_name': match['leagueName'],
-        'match_date': match['date'],
-        'venue_id': match.get('venueId'),
-        'attendance': match.get('attendance'),
-        'home_team_id': match['homeTeamId'],
-        'home_team_name': match['homeTeamName'],
-        'away_team_id': match['awayTeamId'],
-        'away_team_name': match['awayTeamName'],
-        'home_team_score': match.get('homeTeamScore'),
-        'away_team_score': match.get('awayTeamScore'),
-        'home_team_winner': match.get('homeTeamWinner'),
-        'away_team_winner': match.get('awayTeamWinner'),
-        'home_elo_pre': match.get('home_elo_pre'),
-        'away_elo_pre': match.get('away_elo_pre'),
-        'home_elo_change': match.get('home_elo_change'),
-        'away_elo_change': match.get('away_elo_change'),
-        'home_elo_post': match.get('home_elo_post'),
-        'away_elo_post': match.get('away_elo_post'),
-        'is_completed': True
-    })
-
-# Insert in batches of 500
-batch_size = 500
-for i in range(0, len(match_rows), batch_size):
-    batch = match_rows[i:i+batch_size]
-    result = supabase.table('matches').insert(batch).execute()
-    print(f"   ✓ Inserted batch {i//batch_size + 1}/{(len(match_rows)-1)//batch_size + 1}")
-
-print(f"   ✓ Inserted {len(match_rows)} matches from 2024-25")
-
-# 5. Insert completed matches from 2025-26
-print("\n5. Inserting 2025-26 completed matches...")
-match_rows = []
-for match in season_2025['completed_matches']:
-    match_rows.append({
-        'event_id': match['eventId'],
-        'season_type': match['seasonType'],
-        'season_name': match['seasonName'],
-        'season_year': match['seasonYear'],
-        'league_id': match['leagueId'],
-        'league_name': match['leagueName'],
-        'match_date': match['date'],
-        'venue_id': match.get('venueId'),
-        'attendance': match.get('attendance'),
-        'home_team_id': match['homeTeamId'],
-        'home_team_name': match['homeTeamName'],
-        'away_team_id': match['awayTeamId'],
-        'away_team_name': match['awayTeamName'],
-        'home_team_score': match.get('homeTeamScore'),
-        'away_team_score': match.get('awayTeamScore'),
-        'home_team_winner': match.get('homeTeamWinner'),
-        'away_team_winner': match.get('awayTeamWinner'),
-        'home_elo_pre': match.get('home_elo_pre'),
-        'away_elo_pre': match.get('away_elo_pre'),
-        'home_elo_change': match.get('home_elo_change'),
-        'away_elo_change': match.get('away_elo_change'),
-        'home_elo_post': match.get('home_elo_post'),
-        'away_elo_post': match.get('away_elo_post'),
-        'is_completed': True
-    })
-
-result = supabase.table('matches').insert(match_rows).execute()
-print(f"   ✓ Inserted {len(match_rows)} completed matches from 2025-26")
-
-# 6. Insert pending matches from 2025-26
-print("\n6. Inserting 2025-26 pending matches...")
-pending_rows = []
-for match in season_2025['pending_matches']:
-    pending_rows.append({
+def supabase_client():
+    # You'll need to install supabase-py: pip install supabase
+    try:
+        from supabase import create_client
+    except ImportError:
+        print("ERROR: Please install supabase-py first:")
+        print("pip install supabase")
+        exit(1)
+
+    load_env_file()
+    supabase_url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+    supabase_service_key = os.getenv("SUPABASE_SERVICE_KEY")
+
+    if not supabase_url or not supabase_service_key:
+        print("ERROR: Missing Supabase credentials")
+        print("Please ensure .env.local exists with:")
+        print("  NEXT_PUBLIC_SUPABASE_URL=...")
+        print("  SUPABASE_SERVICE_KEY=...")
+        exit(1)
+
+    return create_client(supabase_url, supabase_service_key)
+
+
+def match_row(match, is_completed):
+    """A season file match as a matches table row"""
+    row = {
         'event_id': match['eventId'],
         'season_type': match['seasonType'],
         'season_name': match['seasonName'],
@@ -207,48 +82,268 @@ for match in season_2025['pending_matches']:
         'home_team_name': match['homeTeamName'],
         'away_team_id': match['awayTeamId'],
         'away_team_name': match['awayTeamName'],
-        'is_completed': False
-    })
+        'is_completed': is_completed
+    }
+    if is_completed:
+        row.update({
+            'home_team_score': match.get('homeTeamScore'),
+            'away_team_score': match.get('awayTeamScore'),
+            'home_team_winner': match.get('homeTeamWinner'),
+            'away_team_winner': match.get('awayTeamWinner'),
+            'home_elo_pre': match.get('home_elo_pre'),
+            'away_elo_pre': match.get('away_elo_pre'),
+            'home_elo_change': match.get('home_elo_change'),
+            'away_elo_change': match.get('away_elo_change'),
+            'home_elo_post': match.get('home_elo_post'),
+            'away_elo_post': match.get('away_elo_post')
+        })
+    return row
 
-result = supabase.table('matches').insert(pending_rows).execute()
-print(f"   ✓ Inserted {len(pending_rows)} pending matches from 2025-26")
 
-# 7. Insert predictions
-print("\n7. Inserting predictions...")
-if 'predictions' in season_2025 and season_2025['predictions']:
-    # First, get match IDs for event IDs
-    result = supabase.table('matches').select('id, event_id').eq('is_completed', False).execute()
-    event_to_match_id = {row['event_id']: row['id'] for row in result.data}
+def elo_history_rows(season, section, data_dir=DATA_DIR):
+    """
+    elo_history table rows (one per team) for replayed completed matches,
+    read column-wise from the season store rather than the season JSON
+    """
+    store = current_store(season, data_dir)
+    kinds = store.manifest(season)['sections'][section]['kinds']
+    event_ids = store.column(season, section, 'eventId').tolist()
+    dates = store.column(season, section, 'date').tolist()
 
-    prediction_rows = []
-    for pred in season_2025['predictions']:
-        if pred['eventId'] in event_to_match_id:
-            prediction_rows.append({
-                'match_id': event_to_match_id[pred['eventId']],
-                'event_id': pred['eventId'],
-                'home_elo': pred['home_elo'],
-                'away_elo': pred['away_elo'],
-                'home_win_prob': pred['home_win_prob'],
-                'draw_prob': pred['draw_prob'],
-                'away_win_prob': pred['away_win_prob'],
-                'home_or_draw_prob': pred['home_or_draw_prob'],
-                'away_or_draw_prob': pred['away_or_draw_prob'],
-                'recommended_bet': pred['recommended_bet'],
-                'recommended_prob': pred['recommended_prob'],
-                'confidence': pred['confidence']
+    sides = []
+    for side in ('home', 'away'):
+        pre, post, change = f'{side}_elo_pre', f'{side}_elo_post', f'{side}_elo_change'
+        if pre not in kinds or post not in kinds:
+            continue
+        elo_pre = store.column(season, section, pre)
+        elo_post = store.column(season, section, post)
+        delta = elo_post - elo_pre
+        if change in kinds:
+            delta = np.where(store.present(season, section, change), store.column(season, section, change), delta)
+        keep = store.present(season, section, pre) & store.present(season, section, post)
+        sides.append((store.column(season, section, f'{side}TeamId').tolist(), elo_pre.tolist(),
+                      elo_post.tolist(), delta.tolist(), keep.tolist()))
+
+    rows = []
+    for i, (event_id, date) in enumerate(zip(event_ids, dates)):
+        for team_ids, elo_pre, elo_post, delta, keep in sides:
+            if not keep[i]:
+                continue
+            rows.append({
+                'team_id': team_ids[i],
+                'event_id': event_id,
+                'match_date': date,
+                'elo_pre': elo_pre[i],
+                'elo_post': elo_post[i],
+                'delta': delta[i]
             })
+    return rows
+
+
+def standings_rows(season_2025):
+    """The 2025-26 standings as standings table rows"""
+    rows = []
+    for row in league_table(season_standings(season_2025)):
+        row = dict(row)
+        row['league_name'] = row.pop('league')
+        row['team_name'] = row.pop('team')
+        del row['position']
+        rows.append(row)
+    return rows
+
+
+def parameter_rows(params):
+    """parameters.json as parameters table rows"""
+    return [
+        {
+            'param_key': key,
+            'param_value': value,
+            'description': f'ELO parameter: {key}'
+        }
+        for key, value in params.items()
+    ]
+
+
+def team_rows(season_2024, season_2025):
+    """Every team of both seasons with its current ELO and rolling 2025-26 state"""
+    teams_set = set()
+    team_leagues = {}
+
+    # Get all unique teams from both seasons
+    for match in season_2024['matches'] + season_2025['completed_matches'] + season_2025['pending_matches']:
+        teams_set.add(match['homeTeamName'])
+        teams_set.add(match['awayTeamName'])
+        team_leagues[match['homeTeamName']] = {
+            'league_id': match['leagueId'],
+            'league_name': match['leagueName']
+        }
+        team_leagues[match['awayTeamName']] = {
+            'league_id': match['leagueId'],
+            'league_name': match['leagueName']
+        }
+
+    # Rolling 2025-26 state (recent form, counters) for O(1) online updates
+    team_form, team_stats = season_state(season_2025)
+
+    rows = []
+    for team in sorted(teams_set):
+        current_elo = season_2025['current_elos'].get(team, 1500)
+        is_promoted = current_elo == 1400  # Promoted teams start at 1400
+        context = team_context(team_form, team_stats, team)
+
+        rows.append({
+            'name': team,
+            'league_id': team_leagues[team]['league_id'],
+            'league_name': team_leagues[team]['league_name'],
+            'current_elo': current_elo,
+            'is_promoted': is_promoted,
+            'recent_form': context['form'],
+            'matches_played': context['played'],
+            'goals_for': context['goals_for'],
+            'goals_against': context['goals_against'],
+            'clean_sheets': context['clean_sheets']
+        })
+    return rows
+
+
+def prediction_row(pred):
+    """A season file prediction as a predictions table row (without match_id)"""
+    return {
+        'event_id': pred['eventId'],
+        'home_elo': pred['home_elo'],
+        'away_elo': pred['away_elo'],
+        'home_win_prob': pred['home_win_prob'],
+        'draw_prob': pred['draw_prob'],
+        'away_win_prob': pred['away_win_prob'],
+        'home_or_draw_prob': pred['home_or_draw_prob'],
+        'away_or_draw_prob': pred['away_or_draw_prob'],
+        'recommended_bet': pred['recommended_bet'],
+        'recommended_prob': pred['recommended_prob'],
+        'confidence': pred['confidence']
+    }
+
+
+def load_season_files():
+    """(2024-25 season, 2025-26 season, parameters) from the data directory"""
+    with open(os.path.join(DATA_DIR, 'season_2024_25.json'), 'r') as f:
+        season_2024 = json.load(f)
+
+    with open(os.path.join(DATA_DIR, 'season_2025_26.json'), 'r') as f:
+        season_2025 = json.load(f)
+
+    with open(os.path.join(DATA_DIR, 'parameters.json'), 'r') as f:
+        params = json.load(f)
+
+    return season_2024, season_2025, params
+
+
+def migrate(writer):
+    """Upsert every table from the season files through a BulkWriter; returns row counts"""
+    # Load JSON data
+    print("\n1. Loading JSON files...")
+    season_2024, season_2025, params = load_season_files()
+
+    print(f"   ✓ Loaded 2024-25 season: {len(season_2024['matches'])} matches")
+    print(f"   ✓ Loaded 2025-26 season: {len(season_2025['completed_matches'])} completed, {len(season_2025['pending_matches'])} pending")
+    print(f"   ✓ Loaded parameters")
+
+    # 2. Upsert parameters
+    print("\n2. Upserting parameters...")
+    param_rows = parameter_rows(params)
+    writer.write('parameters', param_rows, 'param_key')
+
+    # 3. Extract and upsert teams with current ELO
+    print("\n3. Upserting teams...")
+    teams = team_rows(season_2024, season_2025)
+    writer.write('teams', teams, 'name')
+
+    # 4. Upsert completed matches from 2024-25
+    print("\n4. Upserting 2024-25 completed matches...")
+    writer.write('matches', [match_row(match, True) for match in season_2024['matches']], 'event_id')
+
+    # 5. Upsert completed matches from 2025-26
+    print("\n5. Upserting 2025-26 completed matches...")
+    writer.write('matches', [match_row(match, True) for match in season_2025['completed_matches']], 'event_id')
+
+    # 6. Upsert pending matches from 2025-26
+    print("\n6. Upserting 2025-26 pending matches...")
+    pending_rows = [match_row(match, False) for match in season_2025['pending_matches']]
+    writer.write('matches', pending_rows, 'event_id')
+
+    # 7. Upsert predictions
+    print("\n7. Upserting predictions...")
+    prediction_rows = []
+    if 'predictions' in season_2025 and season_2025['predictions']:
+        # First, get match IDs for event IDs from the database being written
+        event_to_match_id = writer.sink.match_ids(pred['eventId'] for pred in season_2025['predictions'])
+
+        for pred in season_2025['predictions']:
+            if pred['eventId'] in event_to_match_id:
+                prediction_rows.append({'match_id': event_to_match_id[pred['eventId']], **prediction_row(pred)})
+
+        writer.write('predictions', prediction_rows, 'event_id')
+
+    # 8. Upsert the rating history of every completed match
+    print("\n8. Upserting ELO history...")
+    history_rows = (elo_history_rows('season_2024_25', 'matches')
+                    + elo_history_rows('season_2025_26', 'completed_matches'))
+    writer.write('elo_history', history_rows, 'team_id,event_id')
+
+    # 9. Upsert the league standings
+    print("\n9. Upserting standings...")
+    table_rows = standings_rows(season_2025)
+    writer.write('standings', table_rows, 'league_name,team_name')
+
+    # Everything is in: the next run starts from scratch
+    writer.finish()
+
+    return {
+        'parameters': len(param_rows),
+        'teams': len(teams),
+        'matches_2024': len(season_2024['matches']),
+        'completed_2025': len(season_2025['completed_matches']),
+        'pending_2025': len(pending_rows),
+        'predictions': len(prediction_rows),
+        'elo_history': len(history_rows),
+        'standings': len(table_rows)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate the JSON season files to Supabase")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='concurrent requests')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE, help='resume file')
+    parser.add_argument('--fresh', action='store_true', help='ignore an existing checkpoint')
+    parser.add_argument('--postgres-dsn', help='write straight to Postgres (e.g. a local stand-in) '
+                                               'instead of through the Supabase API')
+    args = parser.parse_args()
+
+    sink = PostgresSink(args.postgres_dsn) if args.postgres_dsn else SupabaseSink(supabase_client())
+    writer = BulkWriter(sink, checkpoint_file=args.checkpoint, workers=args.workers)
+    if args.fresh:
+        writer.checkpoint.clear()
+
+    print("="*80)
+    print("MIGRATING JSON DATA TO SUPABASE")
+    print("="*80)
+
+    counts = migrate(writer)
+
+    print("\n" + "="*80)
+    print("MIGRATION COMPLETED SUCCESSFULLY!")
+    print("="*80)
+    print(f"\nSummary:")
+    print(f"  - Parameters: {counts['parameters']} records")
+    print(f"  - Teams: {counts['teams']} teams")
+    print(f"  - Matches (2024-25): {counts['matches_2024']} completed")
+    print(f"  - Matches (2025-26): {counts['completed_2025']} completed, {counts['pending_2025']} pending")
+    if counts['predictions']:
+        print(f"  - Predictions: {counts['predictions']} predictions")
+    print(f"  - ELO history: {counts['elo_history']} rows")
+    print(f"  - Standings: {counts['standings']} teams")
+    print(f"\nFinished at {datetime.now():%Y-%m-%d %H:%M:%S}")
+    print("\nYou can now use Supabase as your database!")
+
 
-    result = supabase.table('predictions').insert(prediction_rows).execute()
-    print(f"   ✓ Inserted {len(prediction_rows)} predictions")
-
-print("\n" + "="*80)
-print("MIGRATION COMPLETED SUCCESSFULLY!")
-print("="*80)
-print(f"\nSummary:")
-print(f"  - Parameters: {len(param_rows)} records")
-print(f"  - Teams: {len(team_rows)} teams")
-print(f"  - Matches (2024-25): {len(season_2024['completed_matches'])} completed")
-print(f"  - Matches (2025-26): {len(season_2025['completed_matches'])} completed, {len(pending_rows)} pending")
-if 'predictions' in season_2025 and season_2025['predictions']:
-    print(f"  - Predictions: {len(prediction_rows)} predictions")
-print("\nYou can now use Supabase as your database!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""
+Stage-cached refresh pipeline: ingest -> replay -> parameters -> predict -> publish
+Replaces running process_data.py, create_predictions.py and
+migrate_to_supabase.py by hand. Each stage declares the stages it depends on,
+the inputs it reads (whole files, or only the keys of a JSON file it uses) and
+the constants it depends on. Its fingerprint is the SHA-256 of those, and a
+stage whose fingerprint matches the one recorded after its last run, and
+whose outputs are still what it left behind, is skipped. Downstream fingerprints are taken from
+the files upstream stages actually wrote, so a stage that reruns but writes
+the same content does not invalidate the stages after it.
+
+- ingest: workbook -> content-hashed column cache (workbook_cache)
+- replay: workbook rows + rating constants -> season files, snapshots, store
+- parameters: 2024-25 baseline stats + model constants -> parameters.json
+- predict: 2025-26 season (scores folded in, without predictions) + parameters -> predictions
+- publish: the data files -> database (COPY with a connection string, else the Supabase API)
+
+The replay depends on the rating constants only, so changing the draw model
+rewrites parameters.json and reruns the predictions but neither the workbook
+parse nor the ELO replay.
+
+Usage:
+    python pipeline.py                  # run the stages whose inputs changed
+    python pipeline.py --status         # show what would run
+    python pipeline.py --force replay   # rerun a stage whatever its fingerprint
+    python pipeline.py --until predict  # stop before publishing
+    python pipeline.py --dsn postgresql://...   (or DATABASE_URL; otherwise the Supabase API)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from correct_result import save_json
+from create_predictions import add_predictions
+from elo_params import PARAMS_FILE, load_parameters, parameters_fingerprint
+from elo_snapshots import SNAPSHOT_FILE
+from excel_reader import MATCH_SHEET, WORKBOOK_FILE
+from process_data import default_parameters, replay_seasons, save_seasons
+from score_log import LOG_FILE, compact
+from season_store import STORE_DIR
+from workbook_cache import CACHE_VERSION, cache_path, load_columns, load_matches
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+SEASON_2024_FILE = os.path.join(DATA_DIR, 'season_2024_25.json')
+SEASON_2025_FILE = os.path.join(DATA_DIR, 'season_2025_26.json')
+MANIFEST_FILE = os.path.join(DATA_DIR, '.cache', 'pipeline_manifest.json')
+
+MISSING = 'missing'
+
+
+@dataclass
+class PipelineConfig:
+    workbook: str = WORKBOOK_FILE
+    dsn: Optional[str] = None
+    replace: bool = False
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    deps: Tuple[str, ...]
+    # {input name: digest} of everything the stage reads
+    inputs: Callable[[PipelineConfig], Dict[str, str]]
+    run: Callable[[PipelineConfig], None]
+    # {output name: digest} of what the stage leaves behind
+    outputs: Callable[[PipelineConfig], Dict[str, str]] = lambda config: {}
+    # Bump when a stage's logic changes so its old fingerprints no longer match
+    version: int = 1
+
+
+# Digests are memoized per (path, size, mtime) so a file is hashed once per version
+_digests: Dict[Tuple, str] = {}
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's bytes ('missing' if it does not exist)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return MISSING
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _digests:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _digests[key] = digest.hexdigest()
+    return _digests[key]
+
+
+def exists_digest(path: str) -> str:
+    """Digest for outputs that later steps legitimately change: only whether they exist"""
+    return 'present' if os.path.exists(path) else MISSING
+
+
+def json_digest(path: str, include: Optional[Sequence[str]] = None, exclude: Sequence[str] = ()) -> str:
+    """Digest of only some top-level keys of a JSON file, independent of formatting"""
+    if not os.path.exists(path):
+        return MISSING
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    keys = include if include is not None else [k for k in data if k not in exclude]
+    return parameters_fingerprint({k: data.get(k) for k in keys})
+
+
+def rating_constants() -> Dict:
+    """The constants the ELO replay uses: everything but the draw model and baseline"""
+    constants = default_parameters()
+    constants.pop('draw_model')
+    constants.pop('baseline_stats')
+    return constants
+
+
+# Stages
+
+def ingest_inputs(config: PipelineConfig) -> Dict[str, str]:
+    return {'workbook': file_digest(config.workbook), 'cache_version': str(CACHE_VERSION)}
+
+
+def ingest(config: PipelineConfig):
+    load_columns(config.workbook, MATCH_SHEET)
+
+
+def replay_inputs(config: PipelineConfig) -> Dict[str, str]:
+    return {'workbook': file_digest(config.workbook), 'constants': parameters_fingerprint(rating_constants())}
+
+
+def replay(config: PipelineConfig):
+    output_2024, output_2025 = replay_seasons(load_matches(config.workbook, MATCH_SHEET))
+    save_seasons(output_2024, output_2025, SEASON_2024_FILE, SEASON_2025_FILE)
+
+
+def parameters_inputs(config: PipelineConfig) -> Dict[str, str]:
+    return {
+        'baseline_stats': json_digest(SEASON_2024_FILE, include=['baseline_stats']),
+        'constants': parameters_fingerprint(default_parameters())
+    }
+
+
+def write_parameters(config: PipelineConfig):
+    with open(SEASON_2024_FILE, 'r', encoding='utf-8') as f:
+        baseline_stats = json.load(f)['baseline_stats']
+    save_json(PARAMS_FILE, default_parameters(baseline_stats))
+    print(f"Saved parameters to {PARAMS_FILE}")
+
+
+def predict_inputs(config: PipelineConfig) -> Dict[str, str]:
+    return {
+        'season': json_digest(SEASON_2025_FILE, exclude=['predictions']),
+        'score_log': file_digest(LOG_FILE),
+        'parameters': file_digest(PARAMS_FILE)
+    }
+
+
+def predict(config: PipelineConfig):
+    # Fold logged scores into the season file before predicting from it
+    compact(SEASON_2025_FILE, LOG_FILE)
+    with open(SEASON_2025_FILE, 'r', encoding='utf-8') as f:
+        data_2025 = json.load(f)
+    predictions = add_predictions(data_2025, load_parameters())
+    save_json(SEASON_2025_FILE, data_2025)
+    print(f"Generated predictions for {len(predictions)} pending matches")
+
+
+def publish_inputs(config: PipelineConfig) -> Dict[str, str]:
+    target = config.dsn or os.getenv('NEXT_PUBLIC_SUPABASE_URL') or ''
+    return {
+        'season_2024': file_digest(SEASON_2024_FILE),
+        'season_2025': file_digest(SEASON_2025_FILE),
+        'parameters': file_digest(PARAMS_FILE),
+        'target': hashlib.sha256(f"{target}:{config.replace}".encode('utf-8')).hexdigest()
+    }
+
+
+def publish(config: PipelineConfig):
+    if config.dsn:
+        from pg_copy_loader import load, source_rows
+
+        timings = load(config.dsn, source_rows(), config.replace)
+        print(f"Loaded with COPY: {', '.join(f'{phase} {seconds:.2f}s' for phase, seconds in timings.items())}")
+    else:
+        from bulk_writer import BulkWriter, CHECKPOINT_FILE, SupabaseSink
+        from migrate_to_supabase import migrate, supabase_client
+
+        migrate(BulkWriter(SupabaseSink(supabase_client()), checkpoint_file=CHECKPOINT_FILE))
+
+
+STAGES = (
+    Stage('ingest', (), ingest_inputs, ingest,
+          lambda config: {'cache': exists_digest(cache_path(config.workbook, MATCH_SHEET))}),
+    # Score entry and predict change the season files later on: only their existence counts here.
+    # Version 2: the 2025-26 season file carries the standings
+    Stage('replay', ('ingest',), replay_inputs, replay,
+          lambda config: {path: exists_digest(path)
+                          for path in (SEASON_2024_FILE, SEASON_2025_FILE, SNAPSHOT_FILE, STORE_DIR)},
+          version=2),
+    Stage('parameters', ('replay',), parameters_inputs, write_parameters,
+          lambda config: {'parameters': exists_digest(PARAMS_FILE)}),
+    # A replay rewrites the season file without predictions, which predict's inputs do not cover
+    Stage('predict', ('replay', 'parameters'), predict_inputs, predict,
+          lambda config: {'predictions': json_digest(SEASON_2025_FILE, include=['predictions'])}),
+    Stage('publish', ('predict',), publish_inputs, publish)
+)
+
+
+def topological_order(stages: Iterable[Stage]) -> List[Stage]:
+    """Stages ordered so every stage comes after its dependencies"""
+    by_name = {stage.name: stage for stage in stages}
+    ordered: List[Stage] = []
+    state: Dict[str, str] = {}
+
+    def visit(name: str):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"Pipeline stages form a cycle through {name}")
+        if name not in by_name:
+            raise ValueError(f"Unknown pipeline stage: {name}")
+        state[name] = 'visiting'
+        for dep in by_name[name].deps:
+            visit(dep)
+        state[name] = 'done'
+        ordered.append(by_name[name])
+
+    for name in by_name:
+        visit(name)
+    return ordered
+
+
+def downstream(stages: Iterable[Stage], names: Iterable[str]) -> set:
+    """The given stages and every stage that depends on them"""
+    result = set(names)
+    for stage in topological_order(stages):
+        if result.intersection(stage.deps):
+            result.add(stage.name)
+    return result
+
+
+def _upstream(stages: Sequence[Stage], name: str) -> set:
+    by_name = {stage.name: stage for stage in stages}
+    result, todo = set(), list(by_name[name].deps)
+    while todo:
+        dep = todo.pop()
+        if dep not in result:
+            result.add(dep)
+            todo.extend(by_name[dep].deps)
+    return result
+
+
+def fingerprint(stage: Stage, config: PipelineConfig) -> str:
+    canonical = json.dumps({'stage': stage.name, 'version': stage.version, 'inputs': stage.inputs(config)},
+                           sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def load_manifest(path: str = MANIFEST_FILE) -> Dict:
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def save_manifest(manifest: Dict, path: str = MANIFEST_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    save_json(path, manifest)
+
+
+def is_fresh(stage: Stage, config: PipelineConfig, manifest: Dict) -> bool:
+    recorded = manifest.get(stage.name, {})
+    return (recorded.get('fingerprint') == fingerprint(stage, config)
+            and recorded.get('outputs') == stage.outputs(config))
+
+
+def run_pipeline(config: PipelineConfig, stages: Sequence[Stage] = STAGES, force: Iterable[str] = (),
+                 until: Optional[str] = None, manifest_file: str = MANIFEST_FILE) -> Dict[str, str]:
+    """
+    Run the stale stages in dependency order, recording each one's
+    fingerprint as soon as it finishes. Returns {stage: 'ran' | 'skipped'}.
+    """
+    manifest = load_manifest(manifest_file)
+    ordered = topological_order(stages)
+    if until is not None:
+        keep = {until} | _upstream(ordered, until)
+        ordered = [stage for stage in ordered if stage.name in keep]
+
+    force = set(force)
+    results = {}
+    for stage in ordered:
+        if stage.name not in force and is_fresh(stage, config, manifest):
+            print(f"\n[{stage.name}] up to date, skipped")
+            results[stage.name] = 'skipped'
+            continue
+
+        print("\n" + "="*80)
+        print(f"[{stage.name}]")
+        print("="*80)
+        start = time.perf_counter()
+        stage.run(config)
+        seconds = time.perf_counter() - start
+
+        # Recorded after the run: a stage may consume its inputs (predict folds the score log)
+        manifest[stage.name] = {
+            'fingerprint': fingerprint(stage, config),
+            'outputs': stage.outputs(config),
+            'seconds': round(seconds, 3),
+            'finished_at': datetime.now().isoformat(timespec='seconds')
+        }
+        save_manifest(manifest, manifest_file)
+        results[stage.name] = 'ran'
+    return results
+
+
+def status(config: PipelineConfig, stages: Sequence[Stage] = STAGES,
+           manifest_file: str = MANIFEST_FILE) -> Dict[str, str]:
+    """{stage: 'up to date' | 'stale' | 'after <stage>'} without running anything"""
+    manifest = load_manifest(manifest_file)
+    result = {}
+    stale: List[str] = []
+    for stage in topological_order(stages):
+        if not is_fresh(stage, config, manifest):
+            result[stage.name] = 'stale'
+            stale.append(stage.name)
+        elif stage.name in downstream(stages, stale):
+            # Fresh now, but reruns if an upstream stage writes different output
+            upstream = [s for s in stale if s in _upstream(stages, stage.name)]
+            result[stage.name] = f"after {upstream[-1]}"
+        else:
+            result[stage.name] = 'up to date'
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh everything, rerunning only the stages whose inputs changed")
+    parser.add_argument('--status', action='store_true', help="show which stages would run")
+    parser.add_argument('--force', nargs='+', default=[], metavar='STAGE', help="rerun these stages")
+    parser.add_argument('--until', metavar='STAGE', help="stop after this stage (e.g. predict)")
+    parser.add_argument('--workbook', default=WORKBOOK_FILE)
+    parser.add_argument('--dsn', help="publish with COPY to this Postgres (default: DATABASE_URL, "
+                                      "else through the Supabase API)")
+    parser.add_argument('--replace', action='store_true', help="publish: also delete rows not in the files")
+    args = parser.parse_args()
+
+    names = {stage.name for stage in STAGES}
+    for name in args.force + ([args.until] if args.until else []):
+        if name not in names:
+            parser.error(f"unknown stage {name!r} (stages: {', '.join(s.name for s in STAGES)})")
+
+    from migrate_to_supabase import load_env_file
+    load_env_file()
+    config = PipelineConfig(workbook=args.workbook, dsn=args.dsn or os.getenv('DATABASE_URL'),
+                            replace=args.replace)
+
+    if args.status:
+        manifest = load_manifest()
+        for name, state in status(config).items():
+            last = manifest.get(name, {}).get('finished_at', 'never')
+            print(f"  {name:<12} {state:<18} last run: {last}")
+        return
+
+    print("="*80)
+    print("REFRESH PIPELINE")
+    print("="*80)
+
+    start = time.perf_counter()
+    results = run_pipeline(config, force=args.force, until=args.until)
+
+    print("\n" + "="*80)
+    print(f"PIPELINE COMPLETE in {time.perf_counter() - start:.1f}s")
+    print("="*80)
+    for name, result in results.items():
+        print(f"  {name:<12} {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Bulk prediction kernel
+Computes home/draw/away and double-chance probabilities, the recommended bet and
+its confidence for whole arrays of fixtures at once. create_predictions.py,
+regenerate_all_predictions.py, import_future_matches_from_excel.py and
+add_sample_future_matches.py all use it, so they share one draw model and one
+set of recommendation rules.
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from elo_params import EloParameters, DEFAULT_DRAW_MODEL, DEFAULT_DEFENSIVE_SCORE
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# Recommendation codes index into this tuple (singles first, then double chance)
+RECOMMENDATIONS = ('Home Win', 'Draw', 'Away Win', 'Home Win/Draw', 'Away Win/Draw')
+CONFIDENCE_LEVELS = ('Low', 'Medium', 'High')
+
+# Prefer a single outcome at >= 40%, otherwise a double chance above 60%
+SINGLE_THRESHOLD = 0.40
+DOUBLE_THRESHOLD = 0.60
+HIGH_CONFIDENCE = 0.6
+MEDIUM_CONFIDENCE = 0.5
+
+PREDICTION_DECIMALS = 4
+
+
+def draw_probabilities(home_elo: np.ndarray, away_elo: np.ndarray, avg_defense: ArrayLike,
+                       draw_model: Mapping[str, ArrayLike] = DEFAULT_DRAW_MODEL) -> np.ndarray:
+    """
+    Draw probability from:
+    - ELO difference (closer teams = higher draw %)
+    - Team quality (elite teams = more tactical/defensive = higher draw %)
+    - Defensive capabilities
+    Model values may be scalars or arrays that broadcast against the ELOs.
+    """
+    closeness_range = draw_model['closeness_range']
+    elo_diff = np.abs(home_elo - away_elo)
+    closeness_bonus = np.maximum(
+        0, (closeness_range - np.minimum(elo_diff, closeness_range)) / draw_model['closeness_scale'])
+
+    elite_threshold = draw_model['elite_threshold']
+    elite_bonus = np.where((home_elo > elite_threshold) & (away_elo > elite_threshold),
+                           draw_model['elite_bonus'], 0.0)
+
+    defensive_bonus = (np.asarray(avg_defense) - 0.5) * draw_model['defensive_scale']
+
+    draw = draw_model['base'] * (1 + closeness_bonus + elite_bonus + defensive_bonus)
+    return np.maximum(draw_model['min'], np.minimum(draw_model['max'], draw))
+
+
+def match_probabilities(home_elo: np.ndarray, away_elo: np.ndarray, home_advantage: ArrayLike,
+                        avg_defense: ArrayLike = DEFAULT_DEFENSIVE_SCORE,
+                        draw_model: Mapping[str, ArrayLike] = DEFAULT_DRAW_MODEL
+                        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Home win, draw and away win probabilities (they sum to 1 by construction)"""
+    # float_power matches Python's float ** bit for bit, np.power does not
+    expected_home = 1 / (1 + np.float_power(10.0, (away_elo - home_elo - home_advantage) / 400))
+    draw = draw_probabilities(home_elo, away_elo, avg_defense, draw_model)
+
+    # Share what is left after the draw in proportion to the ELO expectation
+    remaining = 1 - draw
+    return expected_home * remaining, draw, (1 - expected_home) * remaining
+
+
+def predict_batch(home_elo: ArrayLike, away_elo: ArrayLike, home_advantage: ArrayLike,
+                  draw_model: Mapping[str, ArrayLike] = DEFAULT_DRAW_MODEL,
+                  home_defense: ArrayLike = DEFAULT_DEFENSIVE_SCORE,
+                  away_defense: ArrayLike = DEFAULT_DEFENSIVE_SCORE) -> Dict[str, np.ndarray]:
+    """
+    All five probabilities plus the recommendation for every fixture.
+    'recommended' and 'confidence' are codes into RECOMMENDATIONS and CONFIDENCE_LEVELS.
+    """
+    home_elo = np.asarray(home_elo, dtype=np.float64)
+    away_elo = np.asarray(away_elo, dtype=np.float64)
+    avg_defense = (np.asarray(home_defense, dtype=np.float64) + np.asarray(away_defense, dtype=np.float64)) / 2
+
+    home_win, draw, away_win = match_probabilities(home_elo, away_elo, home_advantage, avg_defense, draw_model)
+    home_or_draw = home_win + draw
+    away_or_draw = away_win + draw
+
+    # argmax keeps the first maximum, so ties go Home > Draw > Away as before
+    singles = np.stack((home_win, draw, away_win))
+    doubles = np.stack((home_or_draw, away_or_draw))
+    best_single = singles.argmax(axis=0)
+    best_double = doubles.argmax(axis=0)
+    best_single_prob = singles.max(axis=0)
+    best_double_prob = doubles.max(axis=0)
+
+    use_double = (best_single_prob < SINGLE_THRESHOLD) & (best_double_prob > DOUBLE_THRESHOLD)
+    recommended = np.where(use_double, 3 + best_double, best_single)
+    recommended_prob = np.where(use_double, best_double_prob, best_single_prob)
+    confidence = np.where(recommended_prob > HIGH_CONFIDENCE, 2,
+                          np.where(recommended_prob > MEDIUM_CONFIDENCE, 1, 0))
+
+    return {
+        'home_win_prob': home_win,
+        'draw_prob': draw,
+        'away_win_prob': away_win,
+        'home_or_draw_prob': home_or_draw,
+        'away_or_draw_prob': away_or_draw,
+        'recommended': recommended,
+        'recommended_prob': recommended_prob,
+        'confidence': confidence
+    }
+
+
+def prediction_records(batch: Mapping[str, np.ndarray]) -> List[Dict]:
+    """predict_batch output as one rounded dict per fixture (the predictions table columns)"""
+    columns = {
+        key: np.round(batch[key], PREDICTION_DECIMALS).tolist()
+        for key in ('home_win_prob', 'draw_prob', 'away_win_prob',
+                    'home_or_draw_prob', 'away_or_draw_prob', 'recommended_prob')
+    }
+    recommended = [RECOMMENDATIONS[code] for code in batch['recommended'].tolist()]
+    confidence = [CONFIDENCE_LEVELS[code] for code in batch['confidence'].tolist()]
+
+    return [
+        {
+            'home_win_prob': columns['home_win_prob'][i],
+            'draw_prob': columns['draw_prob'][i],
+            'away_win_prob': columns['away_win_prob'][i],
+            'home_or_draw_prob': columns['home_or_draw_prob'][i],
+            'away_or_draw_prob': columns['away_or_draw_prob'][i],
+            'recommended_bet': recommended[i],
+            'recommended_prob': columns['recommended_prob'][i],
+            'confidence': confidence[i]
+        }
+        for i in range(len(recommended))
+    ]
+
+
+def predict_fixtures(fixtures: Sequence[Mapping], elos: Mapping[str, float], params: EloParameters,
+                     home_key: str = 'home_team_name', away_key: str = 'away_team_name',
+                     default_elo: Optional[float] = None) -> List[Dict]:
+    """
+    Predictions for a list of fixture dicts, in order. Each result holds the
+    ELOs used ('home_elo', 'away_elo') and the prediction columns.
+    """
+    n = len(fixtures)
+    if default_elo is None:
+        default_elo = params.initial_elo
+    home_teams = [f[home_key] for f in fixtures]
+    away_teams = [f[away_key] for f in fixtures]
+
+    home_elo = np.fromiter((elos.get(t, default_elo) for t in home_teams), dtype=np.float64, count=n)
+    away_elo = np.fromiter((elos.get(t, default_elo) for t in away_teams), dtype=np.float64, count=n)
+    home_defense = np.fromiter((params.defensive_score(t) for t in home_teams), dtype=np.float64, count=n)
+    away_defense = np.fromiter((params.defensive_score(t) for t in away_teams), dtype=np.float64, count=n)
+
+    batch = predict_batch(home_elo, away_elo, params.home_advantage, params.draw_model,
+                          home_defense, away_defense)
+
+    return [
+        {'home_elo': h, 'away_elo': a, **record}
+        for h, a, record in zip(home_elo.tolist(), away_elo.tolist(), prediction_records(batch))
+    ]
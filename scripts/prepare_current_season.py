@@ -3,8 +3,12 @@ Prepare 2025-26 season data by removing future match scores
 """
 
 import json
+import os
 from datetime import datetime
 
+from elo_snapshots import EloSnapshotIndex, SNAPSHOT_FILE
+from season_store import current_store
+
 # Current date (October 4, 2025 - last day with scores)
 CUTOFF_DATE = datetime(2025, 10, 4, 23, 59, 59)
 
@@ -18,6 +22,49 @@ with open(r'C:\Users\sidda\Desktop\Github Repositories\football-elo\data\season_
 
 completed_matches = data['completed_matches']
 
+# Ratings as of the cutoff come from the snapshot index when process_data.py has built one
+snapshots = EloSnapshotIndex.load(SNAPSHOT_FILE) if os.path.exists(SNAPSHOT_FILE) else None
+
+
+def store_elos_at_cutoff(season='season_2025_26', section='completed_matches'):
+    """
+    Each team's rating at the cutoff from the season store's columns: the
+    post-match rating of its last match up to the cutoff, otherwise the
+    pre-match rating of its first match after it
+    """
+    store = current_store(season)
+    dates = store.column(season, section, 'date').tolist()
+    cutoff = CUTOFF_DATE.strftime('%Y-%m-%d %H:%M:%S')
+    sides = [(store.column(season, section, f'{side}TeamName').tolist(),
+              store.column(season, section, f'{side}_elo_pre').tolist(),
+              store.column(season, section, f'{side}_elo_post').tolist(),
+              (store.present(season, section, f'{side}_elo_pre')
+               & store.present(season, section, f'{side}_elo_post')).tolist())
+             for side in ('home', 'away')]
+
+    elos = {}
+    for i in sorted(range(len(dates)), key=dates.__getitem__):
+        for teams, elo_pre, elo_post, present in sides:
+            if not present[i]:
+                continue
+            if dates[i] <= cutoff:
+                elos[teams[i]] = elo_post[i]
+            else:
+                elos.setdefault(teams[i], elo_pre[i])
+    return elos
+
+
+# Without snapshots, fall back to the replayed ratings in the season store
+store_elos = store_elos_at_cutoff() if snapshots is None else {}
+
+
+def elo_at_cutoff(team, fallback):
+    if snapshots is None:
+        return store_elos.get(team, fallback)
+    elo = snapshots.elo_at(team, CUTOFF_DATE)
+    return fallback if elo is None else elo
+
+
 # Split into past (keep scores) and future (remove scores)
 past_matches = []
 future_matches = []
@@ -49,8 +96,8 @@ for match in completed_matches:
             'homeTeamScore': None,
             'awayTeamScore': None,
             # These will be calculated from current ELOs for predictions
-            'home_elo_current': match.get('home_elo_pre'),  # Use pre-match ELO from when calculated
-            'away_elo_current': match.get('away_elo_pre')
+            'home_elo_current': elo_at_cutoff(match['homeTeamName'], match.get('home_elo_pre')),
+            'away_elo_current': elo_at_cutoff(match['awayTeamName'], match.get('away_elo_pre'))
         }
         future_matches.append(future_match)
 
@@ -72,6 +119,7 @@ if future_matches:
 # Update the data
 data['completed_matches'] = past_matches
 data['pending_matches'] = future_matches
+data['current_elos'] = {team: elo_at_cutoff(team, elo) for team, elo in data['current_elos'].items()}
 
 # Save updated data
 output_file = r'C:\Users\sidda\Desktop\Github Repositories\football-elo\data\season_2025_26.json'
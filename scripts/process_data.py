@@ -3,13 +3,20 @@ Football ELO Rating System - Data Processing Script
 Processes raw match data and calculates ELO ratings with all custom multipliers
 """
 
-import openpyxl
 import json
-import pandas as pd
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from collections import defaultdict
-import math
+
+# The replay (ELOCalculator and its kernel) is pure Python; NumPy, openpyxl
+# and the column caches are imported where the workbook is read and the
+# derived artifacts are written
+from elo_params import EloParameters, compile_parameters, DEFAULT_DRAW_MODEL
+from elo_state import TeamState, MatchRecord
+from form_tracker import FormTracker, WIN, DRAW, LOSS
+from rolling_state import build_state
+from standings import build_standings
+from elo_kernel import build_form_table, form_score_from_counts, match_changes, side_change
 
 # Constants and Parameters
 INITIAL_ELO = 1500
@@ -53,38 +60,72 @@ DEFENSIVE_MULTIPLIERS = {
     'shutout_loss': 0.9
 }
 
+def default_parameters(baseline_stats: Optional[Dict] = None) -> Dict:
+    """The module constants in parameters.json form"""
+    return {
+        'initial_elo': INITIAL_ELO,
+        'promoted_team_elo': PROMOTED_TEAM_ELO,
+        'base_k_factor': BASE_K_FACTOR,
+        'k_caps': K_CAPS,
+        'venue_multipliers': VENUE_MULTIPLIERS,
+        'gd_multipliers': GOAL_DIFFERENCE_MULTIPLIERS,
+        'form_multipliers': FORM_MULTIPLIERS,
+        'defensive_multipliers': DEFENSIVE_MULTIPLIERS,
+        'draw_model': DEFAULT_DRAW_MODEL,
+        'baseline_stats': baseline_stats or {}
+    }
+
+
+DEFAULT_PARAMETERS = compile_parameters(default_parameters())
+
 
 class ELOCalculator:
-    def __init__(self):
-        self.team_elos: Dict[str, float] = {}
-        self.team_history: Dict[str, List[Dict]] = defaultdict(list)
+    def __init__(self, params: Optional[EloParameters] = None, form_window: int = 5):
+        self.params = params or DEFAULT_PARAMETERS
+        self.state = TeamState(self.params.initial_elo)
+        self.form = FormTracker(form_window)
+        self.form_table = build_form_table(self.params.form_multipliers, form_window)
         self.match_results: List[Dict] = []
 
+    @property
+    def team_elos(self) -> Dict[str, float]:
+        """Current ratings as a {team_name: elo} dict (a copy of the compact state)"""
+        return self.state.to_dict()
+
+    @team_elos.setter
+    def team_elos(self, elos: Dict[str, float]):
+        self.state = TeamState(self.params.initial_elo)
+        self.form = FormTracker(self.form.window)
+        self.state.load(elos)
+
+    def set_elo(self, team: str, elo: float):
+        """Set a single team's rating"""
+        self.state.set(team, elo)
+
+    def team_index(self, team: str, team_id: Optional[int] = None) -> int:
+        """Dense index for a team, registering it (with empty form) if new"""
+        idx = self.state.index(team, team_id)
+        self.form.ensure(idx + 1)
+        return idx
+
+    def form_state(self) -> Dict:
+        """Serializable form tracker state keyed by team name"""
+        return self.form.to_dict(self.state.names)
+
+    def load_form_state(self, data: Dict):
+        """Restore form from form_state() output"""
+        self.form = FormTracker.from_dict(data, self.team_index)
+        self.form.ensure(len(self.state))
+        self.form_table = build_form_table(self.params.form_multipliers, self.form.window)
+
     def get_k_factor_cap(self, elo: float) -> float:
         """Get K-factor cap based on current ELO"""
-        for threshold, cap in sorted(K_CAPS.items()):
-            if elo < threshold:
-                return cap
-        return 35
+        return self.params.k_cap(elo)
 
     def calculate_form_score(self, team: str, current_match_idx: int) -> int:
-        """Calculate form score based on last 5 games"""
-        if not self.team_history[team]:
-            return 0
-
-        last_5 = self.team_history[team][-5:]
-        wins = sum(1 for m in last_5 if m['result'] == 'W')
-        losses = sum(1 for m in last_5 if m['result'] == 'L')
-
-        if wins == 5:
-            return 5
-        elif wins >= 4:
-            return 4
-        elif wins >= 3:
-            return 3
-        elif losses >= 3:
-            return -3
-        return 0
+        """Calculate form score based on the last games in the form window"""
+        idx = self.team_index(team)
+        return form_score_from_counts(self.form.wins[idx], self.form.losses[idx], self.form.window)
 
     def calculate_opponent_quality_multiplier(self, winner_elo: float, loser_elo: float,
                                               is_underdog_win: bool) -> float:
@@ -102,41 +143,30 @@ class ELOCalculator:
 
     def calculate_venue_multiplier(self, is_home: bool, result: str) -> float:
         """Calculate venue-based multiplier"""
+        params = self.params
         if is_home:
-            return VENUE_MULTIPLIERS['home_win'] if result == 'W' else VENUE_MULTIPLIERS['home_draw']
+            return params.venue_home_win if result == 'W' else params.venue_home_draw
         else:
-            return VENUE_MULTIPLIERS['away_win'] if result == 'W' else VENUE_MULTIPLIERS['away_draw']
+            return params.venue_away_win if result == 'W' else params.venue_away_draw
 
     def calculate_gd_multiplier(self, goal_diff: int, is_winner: bool) -> float:
         """Calculate goal difference multiplier"""
-        abs_gd = abs(goal_diff)
-
-        if is_winner:
-            # Cap at 4+ goals
-            gd_key = min(abs_gd, 4)
-            return GOAL_DIFFERENCE_MULTIPLIERS['win'].get(gd_key, 1.5)
-        else:
-            # Losses
-            gd_key = min(abs_gd, 4)
-            return GOAL_DIFFERENCE_MULTIPLIERS['loss'].get(gd_key, 0.7)
+        # Capped at 4+ goals
+        return self.params.gd_multiplier(goal_diff, is_winner)
 
     def calculate_form_multiplier(self, team: str, current_match_idx: int) -> float:
         """Calculate form-based multiplier"""
         form_score = self.calculate_form_score(team, current_match_idx)
-        return FORM_MULTIPLIERS.get(form_score, 1.0)
+        return self.params.form_multipliers.get(form_score, 1.0)
 
     def calculate_defensive_multiplier(self, goals_scored: int, goals_conceded: int,
                                       result: str) -> float:
         """Calculate defensive quality multiplier"""
         if result == 'W':
-            if goals_conceded == 0:
-                return DEFENSIVE_MULTIPLIERS['clean_sheet_win']
-            elif goals_conceded == 1:
-                return DEFENSIVE_MULTIPLIERS['win_concede_1']
-            else:
-                return DEFENSIVE_MULTIPLIERS['win_concede_2plus']
+            # Clean sheet, conceded 1, conceded 2+
+            return self.params.win_defense[min(goals_conceded, 2)]
         elif result == 'L' and goals_scored == 0:
-            return DEFENSIVE_MULTIPLIERS['shutout_loss']
+            return self.params.shutout_loss_defense
         return 1.0
 
     def calculate_expected_score(self, home_elo: float, away_elo: float,
@@ -153,174 +183,145 @@ class ELOCalculator:
         """
         Calculate ELO change for a team based on match result
         Returns: (elo_change, multipliers_dict)
+        A one-side breakdown for inspection; replays go through process_record.
         """
-        team_elo = self.team_elos.get(team, INITIAL_ELO)
-        opponent_elo = self.team_elos.get(opponent, INITIAL_ELO)
-
-        # Calculate expected score
-        if is_home:
-            expected, _ = self.calculate_expected_score(team_elo, opponent_elo, home_advantage)
-        else:
-            _, expected = self.calculate_expected_score(opponent_elo, team_elo, home_advantage)
-
-        # Actual score
-        if result == 'W':
-            actual = 1.0
-            # GD enhancement for wins
-            gd = abs(goals_scored - goals_conceded)
-            if gd >= 4:
-                actual = 1.3
-            elif gd == 3:
-                actual = 1.2
-            elif gd == 2:
-                actual = 1.1
-        elif result == 'D':
-            actual = 0.5
-        else:
-            actual = 0.0
-
-        # Calculate all multipliers
-        multipliers = {}
-
-        # 1. Opponent Quality
-        if result == 'W':
-            is_underdog = team_elo < opponent_elo
-            multipliers['opponent'] = self.calculate_opponent_quality_multiplier(
-                team_elo, opponent_elo, is_underdog
-            )
-        else:
-            multipliers['opponent'] = 1.0
-
-        # 2. Venue
-        multipliers['venue'] = self.calculate_venue_multiplier(is_home, result)
-
-        # 3. Goal Difference
-        gd = goals_scored - goals_conceded
-        multipliers['gd'] = self.calculate_gd_multiplier(gd, result == 'W')
-
-        # 4. Form
-        multipliers['form'] = self.calculate_form_multiplier(team, current_match_idx)
-
-        # 5. Defense
-        multipliers['defense'] = self.calculate_defensive_multiplier(
-            goals_scored, goals_conceded, result
+        team_idx = self.team_index(team)
+        opponent_idx = self.team_index(opponent)
+        ratings = self.state.ratings
+        multipliers = self._multipliers(
+            ratings[team_idx], ratings[opponent_idx], is_home, goals_scored, goals_conceded,
+            self.form_table[self.form.wins[team_idx]][self.form.losses[team_idx]], home_advantage
         )
+        return multipliers['k_final'] * (multipliers['actual'] - multipliers['expected']), multipliers
 
-        # Calculate base K
-        base_k = BASE_K_FACTOR
-
-        # Apply all multipliers
-        k_adjusted = base_k
-        for mult_name, mult_value in multipliers.items():
-            k_adjusted *= mult_value
-
-        # Apply K-factor cap
-        k_cap = self.get_k_factor_cap(team_elo)
-        k_final = min(k_adjusted, k_cap)
-
-        # Calculate ELO change
-        elo_change = k_final * (actual - expected)
+    def process_record(self, record: MatchRecord, home_advantage: float = 50):
+        """
+        Process a match from compile_matches and update ELOs, filling the
+        record's ELO fields in place (elo_kernel.match_changes)
+        """
+        home = record.home
+        away = record.away
+        home_score = record.home_score
+        away_score = record.away_score
+        ratings = self.state.ratings
+        home_elo = ratings[home]
+        away_elo = ratings[away]
+
+        form = self.form
+        wins = form.wins
+        losses = form.losses
+        form_table = self.form_table
+        home_form = form_table[wins[home]][losses[home]]
+        away_form = form_table[wins[away]][losses[away]]
+        home_change, away_change = match_changes(
+            self.params, home_elo, away_elo, home_score, away_score, home_form, away_form, home_advantage
+        )
 
-        return elo_change, {
-            'k_base': base_k,
+        form.push_match(home, away, WIN if home_score > away_score else LOSS if home_score < away_score else DRAW)
+
+        ratings[home] = home_elo + home_change
+        ratings[away] = away_elo + away_change
+        record.home_elo_pre = home_elo
+        record.away_elo_pre = away_elo
+        record.home_elo_change = home_change
+        record.away_elo_change = away_change
+        record.home_form = home_form
+        record.away_form = away_form
+
+    def compile_matches(self, matches: List[Dict]) -> List[MatchRecord]:
+        """Convert completed match dicts into MatchRecords for process_record"""
+        records = self.state.compile_matches(matches)
+        self.form.ensure(len(self.state))
+        return records
+
+    def replay(self, matches: List[Dict], home_advantage: float = 50) -> List[MatchRecord]:
+        """Replay matches (already sorted by date) on the compact state; pending matches are skipped"""
+        records = self.compile_matches(matches)
+        process_record = self.process_record
+        for record in records:
+            process_record(record, home_advantage)
+        return records
+
+    def _multipliers(self, elo: float, opponent_elo: float, is_home: bool, goals_scored: int,
+                     goals_conceded: int, form: float, home_advantage: float) -> Dict:
+        """The multiplier breakdown of one side of a replayed match"""
+        (_, expected, actual, opponent_mult, venue, gd, form, defense,
+         k_adjusted, k_cap, k_final) = side_change(
+            self.params, elo, opponent_elo, is_home, goals_scored, goals_conceded, form, home_advantage
+        )
+        return {
+            'k_base': self.params.base_k_factor,
             'k_adjusted': k_adjusted,
             'k_final': k_final,
             'k_cap': k_cap,
             'expected': expected,
             'actual': actual,
-            **multipliers
+            'opponent': opponent_mult,
+            'venue': venue,
+            'gd': gd,
+            'form': form,
+            'defense': defense
         }
 
-    def process_match(self, match_data: Dict, match_idx: int, home_advantage: float = 50) -> Dict:
-        """Process a single match and update ELOs"""
-        home_team = match_data['homeTeamName']
-        away_team = match_data['awayTeamName']
-        home_score = match_data['homeTeamScore']
-        away_score = match_data['awayTeamScore']
-
-        # Skip if scores are None (future matches)
-        if home_score is None or away_score is None:
-            return None
-
-        # Initialize ELOs if not present
-        if home_team not in self.team_elos:
-            self.team_elos[home_team] = INITIAL_ELO
-        if away_team not in self.team_elos:
-            self.team_elos[away_team] = INITIAL_ELO
-
-        # Get pre-match ELOs
-        home_elo_pre = self.team_elos[home_team]
-        away_elo_pre = self.team_elos[away_team]
-
-        # Determine results
-        if home_score > away_score:
-            home_result = 'W'
-            away_result = 'L'
-        elif home_score < away_score:
-            home_result = 'L'
-            away_result = 'W'
-        else:
-            home_result = 'D'
-            away_result = 'D'
-
-        # Calculate ELO changes
-        home_elo_change, home_mult = self.calculate_elo_change(
-            home_team, away_team, True, home_score, away_score, home_result, match_idx, home_advantage
-        )
-        away_elo_change, away_mult = self.calculate_elo_change(
-            away_team, home_team, False, away_score, home_score, away_result, match_idx, home_advantage
-        )
-
-        # Update ELOs
-        self.team_elos[home_team] += home_elo_change
-        self.team_elos[away_team] += away_elo_change
-
-        # Record in history
-        self.team_history[home_team].append({
-            'result': home_result,
-            'opponent': away_team,
-            'elo_change': home_elo_change
-        })
-        self.team_history[away_team].append({
-            'result': away_result,
-            'opponent': home_team,
-            'elo_change': away_elo_change
-        })
-
-        # Create match result record
-        match_result = {
+    def match_result(self, match_data: Dict, record: MatchRecord, home_advantage: float = 50) -> Dict:
+        """
+        The season file record for a match replayed by process_record. Built
+        after the replay, so the replay itself never allocates a dict.
+        """
+        home_score = record.home_score
+        away_score = record.away_score
+        home_result, away_result = (('W', 'L') if home_score > away_score else
+                                    ('L', 'W') if home_score < away_score else ('D', 'D'))
+        home_elo_pre = record.home_elo_pre
+        away_elo_pre = record.away_elo_pre
+        return {
             **match_data,
             'home_elo_pre': home_elo_pre,
             'away_elo_pre': away_elo_pre,
-            'home_elo_post': self.team_elos[home_team],
-            'away_elo_post': self.team_elos[away_team],
-            'home_elo_change': home_elo_change,
-            'away_elo_change': away_elo_change,
+            'home_elo_post': home_elo_pre + record.home_elo_change,
+            'away_elo_post': away_elo_pre + record.away_elo_change,
+            'home_elo_change': record.home_elo_change,
+            'away_elo_change': record.away_elo_change,
             'home_result': home_result,
             'away_result': away_result,
             'goal_diff': home_score - away_score,
-            'home_multipliers': home_mult,
-            'away_multipliers': away_mult
+            'home_multipliers': self._multipliers(home_elo_pre, away_elo_pre, True, home_score, away_score,
+                                                  record.home_form, home_advantage),
+            'away_multipliers': self._multipliers(away_elo_pre, home_elo_pre, False, away_score, home_score,
+                                                  record.away_form, home_advantage)
         }
 
+    def replay_results(self, matches: List[Dict], home_advantage: float = 50) -> List[Dict]:
+        """
+        Replay completed matches (sorted by date) on the compact state, then
+        build their season file records in one pass at the end
+        """
+        completed = [m for m in matches if m['homeTeamScore'] is not None and m['awayTeamScore'] is not None]
+        records = self.replay(completed, home_advantage)
+        match_result = self.match_result
+        return [match_result(m, record, home_advantage) for m, record in zip(completed, records)]
+
+    def process_match(self, match_data: Dict, match_idx: int, home_advantage: float = 50) -> Dict:
+        """Process a single match and update ELOs"""
+        # Skip if scores are None (future matches)
+        if match_data['homeTeamScore'] is None or match_data['awayTeamScore'] is None:
+            return None
+
+        record = self.compile_matches([match_data])[0]
+        self.process_record(record, home_advantage)
+        match_result = self.match_result(match_data, record, home_advantage)
+
         self.match_results.append(match_result)
         return match_result
 
 
 def load_raw_data(file_path: str) -> List[Dict]:
-    """Load raw data from Excel file"""
-    print(f"Loading data from {file_path}...")
-    wb = openpyxl.load_workbook(file_path, data_only=True)
-    ws = wb['Super Data']
-
-    matches = []
-    headers = [cell.value for cell in ws[1]]
+    """Load raw data from Excel file (through the content-hashed column cache)"""
+    from excel_reader import MATCH_SHEET
+    from workbook_cache import load_matches
 
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        match_data = dict(zip(headers, row))
-        matches.append(match_data)
-
-    wb.close()
+    print(f"Loading data from {file_path}...")
+    matches = load_matches(file_path, MATCH_SHEET)
     print(f"Loaded {len(matches)} matches")
     return matches
 
@@ -414,16 +415,11 @@ def calculate_baseline_stats(matches_2024: List[Dict]) -> Dict:
     return baseline
 
 
-def main():
-    """Main processing function"""
-    print("="*80)
-    print("FOOTBALL ELO RATING SYSTEM - DATA PROCESSING")
-    print("="*80)
-
-    # Load data
-    raw_file = r"C:\Users\sidda\Desktop\Github Repositories\football-elo\Football-Top5-Past-And-Current-Data.xlsx"
-    all_matches = load_raw_data(raw_file)
-
+def replay_seasons(all_matches: List[Dict]) -> Tuple[Dict, Dict]:
+    """
+    Replay the workbook rows: (2024-25 season output, 2025-26 season output),
+    the dicts saved as season_2024_25.json and season_2025_26.json
+    """
     # Split by season
     matches_2024 = [m for m in all_matches if '2024-25' in str(m['seasonName'])]
     matches_2025 = [m for m in all_matches if '2025-26' in str(m['seasonName'])]
@@ -444,14 +440,7 @@ def main():
     # Sort by date
     matches_2024_sorted = sorted(matches_2024, key=lambda x: x['date'])
 
-    processed_2024 = []
-    for idx, match in enumerate(matches_2024_sorted):
-        result = calculator.process_match(match, idx, baseline_stats['avg_home_advantage'])
-        if result:
-            processed_2024.append(result)
-
-        if (idx + 1) % 100 == 0:
-            print(f"  Processed {idx + 1}/{len(matches_2024_sorted)} matches...")
+    processed_2024 = calculator.replay_results(matches_2024_sorted, baseline_stats['avg_home_advantage'])
 
     print(f"\nCompleted! Processed {len(processed_2024)} matches from 2024-25 season")
 
@@ -463,18 +452,12 @@ def main():
     for rank, (team, elo) in enumerate(sorted_teams, 1):
         print(f"  {rank:2d}. {team:30s}: {elo:.1f}")
 
-    # Save processed 2024-25 data
     output_2024 = {
         'matches': processed_2024,
         'final_elos': final_elos_2024,
         'baseline_stats': baseline_stats
     }
 
-    output_file_2024 = r"C:\Users\sidda\Desktop\Github Repositories\football-elo\football-elo-webapp\data\season_2024_25.json"
-    with open(output_file_2024, 'w', encoding='utf-8') as f:
-        json.dump(output_2024, f, indent=2, default=str)
-    print(f"\nSaved 2024-25 season data to {output_file_2024}")
-
     # Prepare 2025-26 season data (matches with and without scores)
     print("\n" + "="*80)
     print("PREPARING 2025-26 SEASON DATA")
@@ -493,58 +476,90 @@ def main():
 
     # Set promoted teams to promoted ELO
     for team in promoted_teams:
-        calculator_2025.team_elos[team] = PROMOTED_TEAM_ELO
+        calculator_2025.set_elo(team, PROMOTED_TEAM_ELO)
 
     print(f"\nPromoted teams ({len(promoted_teams)}):")
     for team in sorted(promoted_teams):
         print(f"  - {team} (Starting ELO: {PROMOTED_TEAM_ELO})")
 
-    # Process matches that have scores
-    processed_2025 = []
-    pending_2025 = []
-
-    for idx, match in enumerate(matches_2025_sorted):
-        if match['homeTeamScore'] is not None and match['awayTeamScore'] is not None:
-            result = calculator_2025.process_match(match, idx, baseline_stats['avg_home_advantage'])
-            if result:
-                processed_2025.append(result)
-        else:
-            # Store as pending match
-            pending_match = {
-                **match,
-                'home_elo_current': calculator_2025.team_elos.get(match['homeTeamName'], INITIAL_ELO),
-                'away_elo_current': calculator_2025.team_elos.get(match['awayTeamName'], INITIAL_ELO)
-            }
-            pending_2025.append(pending_match)
+    # Process matches that have scores; pending ones carry the ratings after the replay
+    processed_2025 = calculator_2025.replay_results(matches_2025_sorted, baseline_stats['avg_home_advantage'])
+    state_2025 = calculator_2025.state
+    pending_2025 = [
+        {
+            **match,
+            'home_elo_current': state_2025.get(match['homeTeamName'], INITIAL_ELO),
+            'away_elo_current': state_2025.get(match['awayTeamName'], INITIAL_ELO)
+        }
+        for match in matches_2025_sorted
+        if match['homeTeamScore'] is None or match['awayTeamScore'] is None
+    ]
 
     print(f"\nProcessed {len(processed_2025)} completed matches")
     print(f"Pending {len(pending_2025)} upcoming matches")
 
-    # Save 2025-26 data
     output_2025 = {
         'completed_matches': processed_2025,
         'pending_matches': pending_2025,
         'current_elos': calculator_2025.team_elos,
+        'team_form': calculator_2025.form_state(),
+        'team_stats': build_state(processed_2025)[1],
+        'standings': build_standings(processed_2025),
         'promoted_teams': list(promoted_teams)
     }
+    return output_2024, output_2025
+
+
+def save_seasons(output_2024: Dict, output_2025: Dict, output_file_2024: str, output_file_2025: str,
+                 snapshot_file: Optional[str] = None, store=None):
+    """
+    Write both season files and the artifacts derived from them (snapshots,
+    columnar store; snapshot_file defaults to elo_snapshots.SNAPSHOT_FILE,
+    store to a SeasonStore on the default root)
+    """
+    from elo_snapshots import EloSnapshotIndex, SNAPSHOT_FILE
+    from season_store import SeasonStore
+
+    snapshot_file = snapshot_file or SNAPSHOT_FILE
+    with open(output_file_2024, 'w', encoding='utf-8') as f:
+        json.dump(output_2024, f, indent=2, default=str)
+    print(f"\nSaved 2024-25 season data to {output_file_2024}")
 
-    output_file_2025 = r"C:\Users\sidda\Desktop\Github Repositories\football-elo\football-elo-webapp\data\season_2025_26.json"
     with open(output_file_2025, 'w', encoding='utf-8') as f:
         json.dump(output_2025, f, indent=2, default=str)
     print(f"Saved 2025-26 season data to {output_file_2025}")
 
+    # Point-in-time ratings index (history page, cutoffs, backtests)
+    snapshots = EloSnapshotIndex.from_matches(output_2024['matches'] + output_2025['completed_matches'])
+    snapshots.save(snapshot_file)
+    print(f"Saved ELO snapshots to {snapshot_file}")
+
+    # Columnar copies of both seasons, built from the JSON just written
+    store = store or SeasonStore()
+    for season, season_file in (('season_2024_25', output_file_2024), ('season_2025_26', output_file_2025)):
+        with open(season_file, 'r', encoding='utf-8') as f:
+            store.write_season(season, json.load(f), season_file)
+    print(f"Saved columnar season store to {store.root}")
+
+
+def main():
+    """Main processing function"""
+    print("="*80)
+    print("FOOTBALL ELO RATING SYSTEM - DATA PROCESSING")
+    print("="*80)
+
+    # Load data
+    raw_file = r"C:\Users\sidda\Desktop\Github Repositories\football-elo\Football-Top5-Past-And-Current-Data.xlsx"
+    all_matches = load_raw_data(raw_file)
+
+    output_2024, output_2025 = replay_seasons(all_matches)
+
+    output_file_2024 = r"C:\Users\sidda\Desktop\Github Repositories\football-elo\football-elo-webapp\data\season_2024_25.json"
+    output_file_2025 = r"C:\Users\sidda\Desktop\Github Repositories\football-elo\football-elo-webapp\data\season_2025_26.json"
+    save_seasons(output_2024, output_2025, output_file_2024, output_file_2025)
+
     # Save parameters
-    params = {
-        'initial_elo': INITIAL_ELO,
-        'promoted_team_elo': PROMOTED_TEAM_ELO,
-        'base_k_factor': BASE_K_FACTOR,
-        'k_caps': K_CAPS,
-        'venue_multipliers': VENUE_MULTIPLIERS,
-        'gd_multipliers': GOAL_DIFFERENCE_MULTIPLIERS,
-        'form_multipliers': FORM_MULTIPLIERS,
-        'defensive_multipliers': DEFENSIVE_MULTIPLIERS,
-        'baseline_stats': baseline_stats
-    }
+    params = default_parameters(output_2024['baseline_stats'])
 
     params_file = r"C:\Users\sidda\Desktop\Github Repositories\football-elo\football-elo-webapp\data\parameters.json"
     with open(params_file, 'w', encoding='utf-8') as f:
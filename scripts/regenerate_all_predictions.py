@@ -1,11 +1,23 @@
 """
-Regenerate predictions for ALL pending matches in Supabase based on current ELO ratings
+Bring the predictions table in line with current ELO ratings
+Only the pending fixtures of teams whose rating differs from the one their
+stored predictions were made with (or the teams given with --teams) are
+recomputed, found through the team -> fixture index, and only rows whose
+probabilities actually changed are upserted. Predictions of matches that are
+no longer pending are deleted. --full recomputes every pending fixture (rows
+are still only written if they changed).
 """
 
+import argparse
 import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+from elo_params import parameters_from_rows
+from fixture_index import build_index, fixtures_for, prediction_changed, stale_teams, PREDICTION_COLUMNS
+from prediction_kernel import predict_fixtures
+from supabase_stream import stream_rows
+
 # Load environment variables
 load_dotenv('.env.local')
 
@@ -17,169 +29,98 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-
-def calculate_draw_probability(home_elo: float, away_elo: float,
-                               home_defensive_quality: float = 0.5,
-                               away_defensive_quality: float = 0.5) -> float:
-    """
-    Calculate draw probability based on:
-    - ELO difference (closer teams = higher draw %)
-    - Team quality (elite teams = more tactical/defensive = higher draw %)
-    - Defensive capabilities
-    """
-    # Base draw percentage from historical data
-    base_draw_pct = 0.2494  # 24.94% from 2024-25 season
-
-    # ELO closeness bonus (0 to 0.10)
-    elo_diff = abs(home_elo - away_elo)
-    closeness_bonus = max(0, (200 - min(elo_diff, 200)) / 2000)
-
-    # Calculate final draw probability
-    draw_prob = base_draw_pct * (1 + closeness_bonus)
-
-    # Cap between 15% and 40%
-    draw_prob = max(0.15, min(0.40, draw_prob))
-
-    return draw_prob
-
-
-def calculate_match_prediction(home_elo: float, away_elo: float,
-                               home_advantage: float) -> dict:
-    """
-    Calculate all 5 prediction types for a match
-    """
-    # 1. Calculate standard ELO probabilities (with home advantage)
-    expected_home = 1 / (1 + 10 ** ((away_elo - home_elo - home_advantage) / 400))
-    expected_away = 1 - expected_home
-
-    # 2. Calculate draw probability
-    draw_prob = calculate_draw_probability(home_elo, away_elo)
-
-    # 3. Adjust home/away probabilities to account for draws
-    remaining_prob = 1 - draw_prob
-    home_win_prob = expected_home * remaining_prob
-    away_win_prob = expected_away * remaining_prob
-
-    # Ensure probabilities sum to 1.0
-    total = home_win_prob + draw_prob + away_win_prob
-    if abs(total - 1.0) > 0.001:
-        home_win_prob /= total
-        draw_prob /= total
-        away_win_prob /= total
-
-    # 4. Calculate double chance probabilities
-    home_or_draw = home_win_prob + draw_prob
-    away_or_draw = away_win_prob + draw_prob
-
-    # 5. Determine recommended bet
-    single_outcomes = {
-        'Home Win': home_win_prob,
-        'Draw': draw_prob,
-        'Away Win': away_win_prob
-    }
-
-    double_chance = {
-        'Home Win/Draw': home_or_draw,
-        'Away Win/Draw': away_or_draw
-    }
-
-    # Get best single outcome
-    best_single = max(single_outcomes.items(), key=lambda x: x[1])
-    best_double = max(double_chance.items(), key=lambda x: x[1])
-
-    # Prefer single outcome if it's >= 40%, otherwise use double chance if > 60%
-    if best_single[1] >= 0.40:
-        recommended = best_single
-    elif best_double[1] > 0.60:
-        recommended = best_double
-    else:
-        recommended = best_single
-
-    return {
-        'home_win_prob': round(home_win_prob, 4),
-        'draw_prob': round(draw_prob, 4),
-        'away_win_prob': round(away_win_prob, 4),
-        'home_or_draw_prob': round(home_or_draw, 4),
-        'away_or_draw_prob': round(away_or_draw, 4),
-        'recommended_bet': recommended[0],
-        'recommended_prob': round(recommended[1], 4),
-        'confidence': 'High' if recommended[1] > 0.6 else ('Medium' if recommended[1] > 0.5 else 'Low')
-    }
+UPSERT_BATCH_SIZE = 500
 
 
 def main():
-    """Regenerate predictions for all pending matches"""
+    """Refresh predictions for pending matches whose teams' ratings changed"""
+    parser = argparse.ArgumentParser(description="Refresh predictions for pending matches")
+    parser.add_argument('--teams', nargs='+', help="Only refresh these teams' fixtures")
+    parser.add_argument('--full', action='store_true', help="Recompute every pending fixture")
+    args = parser.parse_args()
+
     print("="*80)
-    print("REGENERATING PREDICTIONS FOR ALL PENDING MATCHES")
+    print("REFRESHING PREDICTIONS FOR PENDING MATCHES")
     print("="*80)
 
-    # 1. Get home advantage parameter
+    # 1. Get model parameters
     params_response = supabase.table('parameters').select('*').execute()
-    params_dict = {p['param_key']: p['param_value'] for p in params_response.data}
-    home_advantage = params_dict.get('baseline_stats', {}).get('avg_home_advantage', 46.8)
+    params = parameters_from_rows(params_response.data)
 
-    print(f"\nHome advantage: {home_advantage}")
+    print(f"\nHome advantage: {params.home_advantage}")
 
     # 2. Get current ELOs from teams table
-    teams_response = supabase.table('teams').select('name, current_elo').execute()
-    current_elos = {team['name']: team['current_elo'] for team in teams_response.data}
+    current_elos = {team['name']: float(team['current_elo'])
+                    for team in stream_rows(supabase, 'teams', 'name, current_elo')}
 
     print(f"Loaded current ELOs for {len(current_elos)} teams")
 
-    # 3. Get all pending matches (is_completed = false)
-    pending_response = supabase.table('matches') \
-        .select('*') \
-        .eq('season_year', 2025) \
-        .eq('is_completed', False) \
-        .order('match_date', desc=False) \
-        .execute()
-
-    pending_matches = pending_response.data
-
-    print(f"Found {len(pending_matches)} pending matches")
-
-    # 4. Delete all existing predictions (we'll regenerate them all)
-    delete_response = supabase.table('predictions').delete().neq('id', 0).execute()
-    print(f"Deleted existing predictions")
-
-    # 5. Generate predictions for each pending match
-    predictions_to_insert = []
-
-    for match in pending_matches:
-        home_team = match['home_team_name']
-        away_team = match['away_team_name']
-
-        home_elo = current_elos.get(home_team, 1500)
-        away_elo = current_elos.get(away_team, 1500)
-
-        prediction = calculate_match_prediction(home_elo, away_elo, home_advantage)
-
-        predictions_to_insert.append({
-            'match_id': match['id'],
-            'event_id': match['event_id'],
-            'home_elo': home_elo,
-            'away_elo': away_elo,
-            **prediction
-        })
+    # 3. Get all pending matches (is_completed = false) and the stored predictions
+    pending_matches = list(stream_rows(
+        supabase, 'matches', 'id, event_id, match_date, home_team_name, away_team_name',
+        where=lambda q: q.eq('season_year', 2025).eq('is_completed', False),
+        keys=('match_date', 'id')))
+    stored = {
+        row['event_id']: row
+        for row in stream_rows(supabase, 'predictions',
+                               'event_id, home_elo, away_elo, ' + ', '.join(PREDICTION_COLUMNS),
+                               keys=('event_id',))
+    }
 
-    # 6. Insert all predictions
-    if predictions_to_insert:
-        insert_response = supabase.table('predictions').insert(predictions_to_insert).execute()
-        print(f"\nInserted {len(predictions_to_insert)} predictions")
+    print(f"Found {len(pending_matches)} pending matches, {len(stored)} stored predictions")
 
+    # 4. Fixtures to recompute: the changed teams' fixtures plus any without a prediction
+    if args.full:
+        targets = pending_matches
+    else:
+        index = build_index(pending_matches, 'home_team_name', 'away_team_name', 'event_id')
+        teams = set(args.teams) if args.teams else stale_teams(
+            pending_matches, stored, current_elos, default_elo=params.initial_elo)
+        event_ids = fixtures_for(index, teams)
+        targets = [m for m in pending_matches if m['event_id'] in event_ids or m['event_id'] not in stored]
+        print(f"Teams with changed ratings: {len(teams)}")
+
+    # 5. Predict them in one batch and keep the rows that actually changed
+    predictions_to_upsert = [
+        {'match_id': match['id'], 'event_id': match['event_id'], **prediction}
+        for match, prediction in zip(targets, predict_fixtures(targets, current_elos, params))
+        if prediction_changed(stored.get(match['event_id']), prediction)
+    ]
+    print(f"Recomputed {len(targets)} fixtures, {len(predictions_to_upsert)} predictions changed")
+
+    # 6. Upsert the changed rows on event_id
+    for i in range(0, len(predictions_to_upsert), UPSERT_BATCH_SIZE):
+        supabase.table('predictions') \
+            .upsert(predictions_to_upsert[i:i + UPSERT_BATCH_SIZE], on_conflict='event_id') \
+            .execute()
+    if predictions_to_upsert:
+        print(f"\nUpserted {len(predictions_to_upsert)} predictions")
+
+    # 7. Delete predictions of matches that are no longer pending
+    pending_ids = {m['event_id'] for m in pending_matches}
+    finished = [event_id for event_id in stored if event_id not in pending_ids]
+    for i in range(0, len(finished), UPSERT_BATCH_SIZE):
+        supabase.table('predictions').delete().in_('event_id', finished[i:i + UPSERT_BATCH_SIZE]).execute()
+    if finished:
+        print(f"Deleted {len(finished)} predictions of completed matches")
+
+    if predictions_to_upsert:
         # Show sample predictions
         print("\nSample predictions (first 5):")
-        for i, pred in enumerate(predictions_to_insert[:5], 1):
-            match = next(m for m in pending_matches if m['event_id'] == pred['event_id'])
+        matches_by_event = {m['event_id']: m for m in targets}
+        for i, pred in enumerate(predictions_to_upsert[:5], 1):
+            match = matches_by_event[pred['event_id']]
             print(f"\n{i}. {match['match_date']}")
             print(f"   {match['home_team_name']} vs {match['away_team_name']}")
             print(f"   Home: {pred['home_win_prob']*100:.1f}% | Draw: {pred['draw_prob']*100:.1f}% | Away: {pred['away_win_prob']*100:.1f}%")
             print(f"   Recommended: {pred['recommended_bet']} ({pred['recommended_prob']*100:.1f}%) - {pred['confidence']}")
-    else:
+    elif not pending_matches:
         print("\nNo pending matches found to generate predictions for")
+    else:
+        print("\nAll predictions are up to date")
 
     print("\n" + "="*80)
-    print("PREDICTIONS REGENERATION COMPLETE")
+    print("PREDICTIONS REFRESH COMPLETE")
     print("="*80)
 
 
@@ -0,0 +1,90 @@
+"""
+Persisted per-team rolling state
+Each team's last-N results (team_form, the same shape as
+FormTracker.to_dict) and running counters (team_stats: matches played, goals
+for/against, clean sheets) are stored in the season file next to
+current_elos. Every score entry updates both in O(1), so online updates get
+the full multiplier set without scanning the season's history; a season file
+written before these keys existed is upgraded with one scan.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from elo_kernel import FORM_WINDOW
+
+FORM_KEY = 'team_form'
+STATS_KEY = 'team_stats'
+
+STAT_FIELDS = ('played', 'goals_for', 'goals_against', 'clean_sheets')
+
+
+def result_letters(home_score: int, away_score: int) -> Tuple[str, str]:
+    if home_score > away_score:
+        return 'W', 'L'
+    if home_score < away_score:
+        return 'L', 'W'
+    return 'D', 'D'
+
+
+def push_form(form: Dict[str, List[str]], team: str, result: str, window: int):
+    form[team] = (form.get(team, []) + [result])[-window:]
+
+
+def add_stats(stats: Dict[str, Dict[str, int]], team: str, scored: int, conceded: int, sign: int = 1):
+    """Add (sign=1) or take back (sign=-1) one match in a team's counters"""
+    counters = stats.get(team)
+    if counters is None:
+        counters = stats[team] = dict.fromkeys(STAT_FIELDS, 0)
+    counters['played'] += sign
+    counters['goals_for'] += sign * scored
+    counters['goals_against'] += sign * conceded
+    if conceded == 0:
+        counters['clean_sheets'] += sign
+
+
+def match_stats(stats: Dict[str, Dict[str, int]], home: str, away: str,
+                home_score: int, away_score: int, sign: int = 1):
+    """Add (or take back) one match in both teams' counters"""
+    add_stats(stats, home, home_score, away_score, sign)
+    add_stats(stats, away, away_score, home_score, sign)
+
+
+def add_match(form: Dict[str, List[str]], stats: Dict[str, Dict[str, int]], home: str, away: str,
+              home_score: int, away_score: int, window: int):
+    """Push one result into {team: recent results} and the counters"""
+    home_result, away_result = result_letters(home_score, away_score)
+    push_form(form, home, home_result, window)
+    push_form(form, away, away_result, window)
+    match_stats(stats, home, away, home_score, away_score)
+
+
+def build_state(matches: Iterable[Mapping], window: int = FORM_WINDOW) -> Tuple[Dict, Dict]:
+    """(team_form, team_stats) from completed match records in order"""
+    form: Dict[str, List[str]] = {}
+    stats: Dict[str, Dict[str, int]] = {}
+    for m in matches:
+        add_match(form, stats, m['homeTeamName'], m['awayTeamName'],
+                  m['homeTeamScore'], m['awayTeamScore'], window)
+    return {'window': window, 'results': form}, stats
+
+
+def season_state(data: Dict, window: int = FORM_WINDOW) -> Tuple[Dict, Dict]:
+    """
+    The season file's (team_form, team_stats), rebuilt from the completed
+    matches if either is missing
+    """
+    form = data.get(FORM_KEY)
+    stats = data.get(STATS_KEY)
+    if not form or 'results' not in form or stats is None:
+        built_form, built_stats = build_state(data['completed_matches'], (form or {}).get('window', window))
+        if not form or 'results' not in form:
+            form = data[FORM_KEY] = built_form
+        if stats is None:
+            stats = data[STATS_KEY] = built_stats
+    return form, stats
+
+
+def team_context(form: Dict, stats: Dict, team: str) -> Dict:
+    """One team's rolling state as a flat dict (form as a 'WDL' string, oldest first)"""
+    counters = stats.get(team) or dict.fromkeys(STAT_FIELDS, 0)
+    return {'form': ''.join(form['results'].get(team, [])), **counters}
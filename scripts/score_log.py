@@ -0,0 +1,508 @@
+"""
+Append-only score event log
+Score entries are appended to data/season_2025_26.scores.jsonl (one JSON line
+per score, flushed and fsync'd before the entry counts as committed) instead of
+rewriting the whole season file. An eventId -> byte offset index over the log
+gives O(1) lookups; it is saved next to the log (.index.json) after every
+append, so opening the log only scans the lines written since. entry_context()
+keeps what a score entry needs from the season file (pending fixtures by
+eventId, current ratings, team state) in a small cache next to the log as
+well, rebuilt only when the season file changes. compact() folds the log into the season file (the base
+snapshot) in one rewrite, either on demand or in a background process once the
+log reaches COMPACT_THRESHOLD entries. `crosscheck` replays the season and the
+log through the batch engine and reports any drift from the stored ratings.
+
+Usage:
+    python score_log.py compact
+    python score_log.py status
+    python score_log.py crosscheck
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from correct_result import (SEASON_FILE, HISTORY_FILE, load_history, load_json, record_score_entry,
+                            refresh_pending, save_json, season_start_elos)
+from elo_kernel import FORM_WINDOW
+from elo_params import EloParameters, load_parameters
+from elo_vectorized import replay_vectorized
+from fixture_index import changed_teams, drop_fixture, season_index
+from rolling_state import FORM_KEY, STATS_KEY, add_match, season_state
+from standings import season_standings
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+LOG_FILE = os.path.join(DATA_DIR, 'season_2025_26.scores.jsonl')
+
+# Fold the log into the season file once it holds this many entries
+COMPACT_THRESHOLD = 50
+
+# Season file key recording the last log sequence number folded into it
+SEQ_KEY = 'score_log_seq'
+
+# Rating differences below this are float noise, not drift
+DRIFT_TOLERANCE = 1e-6
+
+LOCK_TIMEOUT = 30.0
+STALE_LOCK_SECONDS = 300
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+    """Portable exclusive lock using an O_EXCL lock file"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                # A crashed holder leaves the file behind
+                if time.time() - os.path.getmtime(path) > STALE_LOCK_SECONDS:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {path}")
+            time.sleep(0.01)
+    try:
+        os.write(fd, str(os.getpid()).encode('ascii'))
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ScoreLog:
+    """
+    The JSON-lines log plus an eventId -> offset index. The same pass keeps
+    the per-team state of the entries not yet folded into the season file
+    (seq > base_seq): latest ratings, recent results and counter deltas.
+    Opening loads the saved index and scans only the lines after it; a missing
+    or stale index (other base_seq, log reset or rewritten) means one scan of
+    the (compaction-bounded) log.
+    """
+
+    def __init__(self, path: str = LOG_FILE, base_seq: int = 0):
+        self.path = path
+        self.index_path = index_path(path)
+        self.offsets: Dict[int, int] = {}
+        # Sequence numbers continue from the last one folded into the season file
+        self.base_seq = base_seq
+        self.last_seq = base_seq
+        self.count = 0
+        self.valid_end = 0
+        self.elos: Dict[str, float] = {}
+        self.form: Dict[str, List[str]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.last_offset: Optional[int] = None
+        self._scan(self._load_index())
+
+    def _overlay(self, entry: Dict):
+        if entry['seq'] <= self.base_seq:
+            return
+        home, away = entry['home_team'], entry['away_team']
+        self.elos[home] = entry['home_elo_post']
+        self.elos[away] = entry['away_elo_post']
+        add_match(self.form, self.stats, home, away, entry['home_score'], entry['away_score'], FORM_WINDOW)
+
+    def _load_index(self) -> int:
+        """Restore the saved index if it still describes the log; returns the offset to scan from"""
+        index = load_json(self.index_path)
+        if not index or index.get('base_seq') != self.base_seq or not os.path.exists(self.path):
+            return 0
+        if os.path.getsize(self.path) < index['valid_end']:
+            return 0
+        if index['last_offset'] is not None:
+            # The last indexed line must still be where the index says it is
+            with open(self.path, 'rb') as f:
+                f.seek(index['last_offset'])
+                line = f.readline()
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                return 0
+            if entry.get('seq') != index['last_seq'] or index['last_offset'] + len(line) != index['valid_end']:
+                return 0
+
+        self.offsets = {int(event_id): offset for event_id, offset in index['offsets'].items()}
+        self.last_seq = index['last_seq']
+        self.last_offset = index['last_offset']
+        self.count = index['count']
+        self.valid_end = index['valid_end']
+        self.elos = index['elos']
+        self.form = index['form']
+        self.stats = index['stats']
+        return self.valid_end
+
+    def save_index(self):
+        """Write the index next to the log (callers hold the log lock)"""
+        save_json(self.index_path, {
+            'base_seq': self.base_seq,
+            'last_seq': self.last_seq,
+            'last_offset': self.last_offset,
+            'count': self.count,
+            'valid_end': self.valid_end,
+            'offsets': self.offsets,
+            'elos': self.elos,
+            'form': self.form,
+            'stats': self.stats
+        })
+
+    def _scan(self, offset: int = 0):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                # A torn final write has no newline (or is not valid JSON); it was never committed
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self.offsets[entry['event_id']] = offset
+                self.last_offset = offset
+                self.last_seq = max(self.last_seq, entry['seq'])
+                self._overlay(entry)
+                self.count += 1
+                offset += len(line)
+            self.valid_end = offset
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self.offsets
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, event_id: int) -> Optional[Dict]:
+        """The latest entry for an event (seek + one line read)"""
+        offset = self.offsets.get(event_id)
+        if offset is None:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def entries(self) -> Iterator[Dict]:
+        """Committed entries in append order"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            while f.tell() < self.valid_end:
+                yield json.loads(f.readline())
+
+    def append(self, entry: Dict) -> Dict:
+        """
+        Commit an entry: assign the next sequence number, append one line and
+        fsync. Callers hold the log lock.
+        """
+        return self.append_many([entry])[0]
+
+    def append_many(self, entries: List[Dict]) -> List[Dict]:
+        """Commit several entries with a single write and fsync (callers hold the log lock)"""
+        committed = []
+        lines = []
+        seq = self.last_seq
+        for entry in entries:
+            seq += 1
+            committed.append({'seq': seq, **entry})
+            lines.append((json.dumps(committed[-1], default=str) + '\n').encode('utf-8'))
+        if not committed:
+            return committed
+
+        with open(self.path, 'ab') as f:
+            if f.tell() > self.valid_end:
+                f.truncate(self.valid_end)
+                f.seek(self.valid_end)
+            f.write(b''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        for entry, line in zip(committed, lines):
+            self.offsets[entry['event_id']] = self.last_offset = self.valid_end
+            self.valid_end += len(line)
+            self._overlay(entry)
+        self.last_seq = seq
+        self.count += len(committed)
+        self.save_index()
+        return committed
+
+    def reset(self):
+        """Empty the log after compaction (callers hold the log lock)"""
+        with open(self.path, 'wb') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.offsets.clear()
+        self.elos.clear()
+        self.form.clear()
+        self.stats.clear()
+        self.base_seq = self.last_seq
+        self.last_offset = None
+        self.count = 0
+        self.valid_end = 0
+        self.save_index()
+
+
+def lock_path(log_file: str = LOG_FILE) -> str:
+    return log_file + '.lock'
+
+
+def index_path(log_file: str = LOG_FILE) -> str:
+    return log_file + '.index.json'
+
+
+def context_path(log_file: str = LOG_FILE) -> str:
+    return log_file + '.context.json'
+
+
+def entry_context(season_file: str = SEASON_FILE, log_file: str = LOG_FILE) -> Dict:
+    """
+    What a score entry needs from the season file: the pending fixtures by
+    eventId ('pending'), current_elos, the team form and counters and the last
+    folded sequence number. Cached next to the log and keyed by the season
+    file's mtime and size, so only the first entry after the season file is
+    rewritten loads it. Callers hold the log lock.
+    """
+    info = os.stat(season_file)
+    stamp = [info.st_mtime_ns, info.st_size]
+    path = context_path(log_file)
+    context = load_json(path)
+    if not context or context.get('season_stamp') != stamp:
+        with open(season_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        form, stats = season_state(data)
+        context = {
+            'season_stamp': stamp,
+            SEQ_KEY: data.get(SEQ_KEY, 0),
+            'current_elos': data['current_elos'],
+            FORM_KEY: form,
+            STATS_KEY: stats,
+            'pending': {m['eventId']: m for m in data['pending_matches']}
+        }
+        save_json(path, context)
+    context['pending'] = {int(event_id): m for event_id, m in context['pending'].items()}
+    return context
+
+
+def pending_entries(log: ScoreLog, data: Dict) -> List[Dict]:
+    """Log entries not yet folded into the season file"""
+    folded = data.get(SEQ_KEY, 0)
+    return [entry for entry in log.entries() if entry['seq'] > folded]
+
+
+def current_elos(data: Dict, log: ScoreLog) -> Dict[str, float]:
+    """The season file's current_elos with the unfolded log entries applied"""
+    elos = dict(data['current_elos'])
+    elos.update(log.elos)
+    return elos
+
+
+def current_form(data: Dict, log: ScoreLog) -> Tuple[Dict[str, List[str]], int]:
+    """
+    ({team: recent results}, window): the season file's team form with the
+    unfolded log entries applied
+    """
+    form, _ = season_state(data)
+    window = form['window']
+    results = dict(form['results'])
+    for team, recent in log.form.items():
+        results[team] = (results.get(team, []) + recent)[-window:]
+    return results, window
+
+
+def current_stats(data: Dict, log: ScoreLog) -> Dict[str, Dict[str, int]]:
+    """The season file's team counters with the unfolded log entries applied"""
+    _, stats = season_state(data)
+    merged = dict(stats)
+    for team, delta in log.stats.items():
+        base = stats.get(team, {})
+        merged[team] = {field: base.get(field, 0) + value for field, value in delta.items()}
+    return merged
+
+
+def score_entry(match: Dict, home_score: int, away_score: int, home_elo_pre: float, away_elo_pre: float,
+                home_elo_change: float, away_elo_change: float,
+                home_elo_post: float, away_elo_post: float) -> Dict:
+    return {
+        'type': 'score',
+        'event_id': match['eventId'],
+        'home_team': match['homeTeamName'],
+        'away_team': match['awayTeamName'],
+        'home_score': home_score,
+        'away_score': away_score,
+        'home_elo_pre': home_elo_pre,
+        'away_elo_pre': away_elo_pre,
+        'home_elo_change': home_elo_change,
+        'away_elo_change': away_elo_change,
+        'home_elo_post': home_elo_post,
+        'away_elo_post': away_elo_post,
+        'recorded_at': datetime.now().isoformat(timespec='seconds')
+    }
+
+
+def completed_record(match: Dict, entry: Dict) -> Dict:
+    """The completed_matches record for a pending match and its log entry"""
+    home_score, away_score = entry['home_score'], entry['away_score']
+    return {
+        **match,
+        'homeTeamScore': home_score,
+        'awayTeamScore': away_score,
+        'homeTeamWinner': home_score > away_score,
+        'awayTeamWinner': away_score > home_score,
+        'home_elo_pre': entry['home_elo_pre'],
+        'away_elo_pre': entry['away_elo_pre'],
+        'home_elo_change': entry['home_elo_change'],
+        'away_elo_change': entry['away_elo_change'],
+        'home_elo_post': entry['home_elo_post'],
+        'away_elo_post': entry['away_elo_post']
+    }
+
+
+def apply_entries(data: Dict, history: Dict, entries: List[Dict]) -> int:
+    """Fold log entries into a season dict (and the undo history); returns how many applied"""
+    if not entries:
+        return 0
+    pending = {m['eventId']: i for i, m in enumerate(data['pending_matches'])}
+    season_state(data)
+    season_standings(data)
+    index = season_index(data)
+    done = set()
+    applied = 0
+    for entry in entries:
+        idx = pending.get(entry['event_id'])
+        if idx is None or idx in done:
+            continue
+        match = data['pending_matches'][idx]
+        completed = completed_record(match, entry)
+        data['current_elos'][entry['home_team']] = entry['home_elo_post']
+        data['current_elos'][entry['away_team']] = entry['away_elo_post']
+        data['completed_matches'].append(completed)
+        record_score_entry(history, data, completed, match)
+        drop_fixture(index, match)
+        done.add(idx)
+        applied += 1
+
+    data['pending_matches'] = [m for i, m in enumerate(data['pending_matches']) if i not in done]
+    if 'predictions' in data:
+        logged = {entry['event_id'] for entry in entries}
+        data['predictions'] = [p for p in data['predictions'] if p['eventId'] not in logged]
+    data[SEQ_KEY] = max(data.get(SEQ_KEY, 0), entries[-1]['seq'])
+    return applied
+
+
+def fold(data: Dict, history: Dict, log: ScoreLog) -> int:
+    """Apply every log entry the season dict has not seen yet"""
+    return apply_entries(data, history, pending_entries(log, data))
+
+
+def compact(season_file: str = SEASON_FILE, log_file: str = LOG_FILE,
+            history_file: str = HISTORY_FILE) -> int:
+    """
+    Fold every committed log entry into the season file and empty the log.
+    The season file records the last folded sequence number, so a crash
+    between the two steps never applies an entry twice. Predictions are
+    refreshed for the fixtures of teams whose ratings the entries changed.
+    """
+    with file_lock(lock_path(log_file)):
+        if not os.path.exists(log_file) or not os.path.getsize(log_file):
+            return 0
+        with open(season_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Open the log from the season file's folded sequence, as the score
+        # entry does, so the index it saved is reused instead of rescanning
+        log = ScoreLog(log_file, base_seq=data.get(SEQ_KEY, 0))
+        history = load_history(data, history_file)
+        before = dict(data['current_elos'])
+        applied = fold(data, history, log)
+        if applied:
+            refresh_pending(data, load_parameters(), changed_teams(before, data['current_elos']))
+            save_json(season_file, data)
+            save_json(history_file, history)
+        log.reset()
+    return applied
+
+
+def drift_report(data: Dict, log: ScoreLog, params: EloParameters) -> Dict:
+    """
+    Replay the season (completed matches, then the unfolded log) through the
+    batch engine from the season start ratings and compare every stored ELO
+    change, and the resulting current ratings, with the replay
+    """
+    pending = {m['eventId']: m for m in data['pending_matches']}
+    logged = [completed_record(pending[entry['event_id']], entry)
+              for entry in pending_entries(log, data) if entry['event_id'] in pending]
+    matches = data['completed_matches'] + logged
+
+    replay = replay_vectorized(matches, params.home_advantage, season_start_elos(data), params)
+    stored = [(m['home_elo_change'], m['away_elo_change']) for m in replay['matches']]
+    drift = [float(max(abs(home - replay['home_elo_change'][i]), abs(away - replay['away_elo_change'][i])))
+             for i, (home, away) in enumerate(stored)]
+    drifting = [i for i, d in enumerate(drift) if d > DRIFT_TOLERANCE]
+
+    elos = current_elos(data, log)
+    elo_drift = {team: elo - replay['final_elos'][team]
+                 for team, elo in elos.items() if team in replay['final_elos']}
+    drifting_teams = sorted((team for team, d in elo_drift.items() if abs(d) > DRIFT_TOLERANCE),
+                            key=lambda team: -abs(elo_drift[team]))
+
+    return {
+        'matches': len(matches),
+        'logged': len(logged),
+        'drifting_matches': len(drifting),
+        'drifting_logged': sum(1 for i in drifting if i >= len(data['completed_matches'])),
+        'first_drift': replay['matches'][drifting[0]]['eventId'] if drifting else None,
+        'max_change_drift': max(drift, default=0.0),
+        'drifting_teams': len(drifting_teams),
+        'max_elo_drift': max((abs(d) for d in elo_drift.values()), default=0.0),
+        'worst_teams': {team: round(elo_drift[team], 3) for team in drifting_teams[:10]}
+    }
+
+
+def compact_in_background(log_file: str = LOG_FILE):
+    """Start `score_log.py compact` as a detached process"""
+    args = [sys.executable, os.path.abspath(__file__), 'compact', '--log-file', log_file]
+    options = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL, 'close_fds': True}
+    if os.name == 'nt':
+        options['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        options['start_new_session'] = True
+    subprocess.Popen(args, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score event log maintenance")
+    parser.add_argument('command', choices=('compact', 'status', 'crosscheck'))
+    parser.add_argument('--season-file', default=SEASON_FILE)
+    parser.add_argument('--log-file', default=LOG_FILE)
+    parser.add_argument('--history-file', default=HISTORY_FILE)
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        applied = compact(args.season_file, args.log_file, args.history_file)
+        print(json.dumps({'success': True, 'compacted': applied}))
+    elif args.command == 'crosscheck':
+        with open(args.season_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        log = ScoreLog(args.log_file, base_seq=data.get(SEQ_KEY, 0))
+        report = drift_report(data, log, load_parameters())
+        print(json.dumps(report))
+        if report['drifting_matches'] or report['drifting_teams']:
+            sys.exit(1)
+    else:
+        log = ScoreLog(args.log_file)
+        print(json.dumps({'entries': len(log), 'last_seq': log.last_seq, 'bytes': log.valid_end}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+"""
+Partitioned columnar season store
+Converts the season JSON files into one directory per season under data/store,
+with every tabular section (matches, completed_matches, pending_matches,
+predictions) split by league and saved as one typed fixed-width .npy file per
+column. Columns are memory-mapped on demand, so reading the ELO columns of one
+league touches a few small files instead of parsing the whole JSON. Nested
+multiplier dicts are flattened into 'home_multipliers.k_final'-style columns.
+export_json() rebuilds the original JSON structure for compatibility.
+
+Usage:
+    python season_store.py build [season_2024_25 season_2025_26]
+    python season_store.py export season_2025_26 out.json
+    python season_store.py info season_2025_26
+"""
+
+import json
+import os
+import re
+import shutil
+import sys
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from workbook_cache import column_kind, encode_column, TEXT
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+STORE_DIR = os.path.join(DATA_DIR, 'store')
+SEASONS = ('season_2024_25', 'season_2025_26')
+
+STORE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+EXTRA_FILE = 'extra.json'
+
+# Memory-mapped column files kept open per store (one league's ELO columns stay hot)
+COLUMN_CACHE_SIZE = 512
+
+# Values that are not plain scalars (lists, mixed types) are stored as JSON text
+JSON = 'json'
+
+# Per-row state of a column, stored in '<column>.null.npy' when not all present
+PRESENT, NULL, ABSENT = 0, 1, 2
+
+ROW_COLUMN = '_row'
+
+# Placeholder for keys a record does not have
+ABSENT_MARK = object()
+
+NESTED_SEPARATOR = '.'
+
+
+def league_slug(league: Optional[str]) -> str:
+    if league is None:
+        return '_none'
+    return re.sub(r'[^a-z0-9]+', '_', str(league).lower()).strip('_')
+
+
+def _source_stamp(path: str) -> Dict:
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _is_table(value) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(r, dict) for r in value)
+
+
+def _column_order(records: List[Dict]) -> List[str]:
+    order = {}
+    for record in records:
+        for key in record:
+            order.setdefault(key, None)
+    return list(order)
+
+
+def _kind(values: List) -> str:
+    kind = column_kind(values)
+    if kind == TEXT and any(v is not None and not isinstance(v, str) for v in values):
+        return JSON
+    return kind
+
+
+def _encode(values: List, kind: str) -> Dict[str, np.ndarray]:
+    """
+    Arrays to save for a column: numeric kinds are stored as is, text and JSON
+    are dictionary-encoded (int32 codes + fixed-width category table)
+    """
+    if kind == JSON:
+        values = ['' if v is None else json.dumps(v) for v in values]
+    elif kind != TEXT:
+        return {'': encode_column(values, kind)}
+    categories, codes = np.unique(encode_column(values, TEXT), return_inverse=True)
+    return {'': codes.astype(np.int32), '.dict': categories}
+
+
+def _leaves(records: List[Dict], columns: List[str], nested: Dict[str, List[str]]):
+    """(name, values, states) for every stored column, nested dicts flattened"""
+    for column in columns:
+        raw = [r.get(column) for r in records]
+        if column in nested:
+            yield column, None, [ABSENT if column not in r else PRESENT if isinstance(r[column], dict) else NULL
+                                 for r in records]
+            for key in nested[column]:
+                yield (f'{column}{NESTED_SEPARATOR}{key}',
+                       [v.get(key) if isinstance(v, dict) else None for v in raw],
+                       [ABSENT if not isinstance(v, dict) or key not in v else NULL if v[key] is None else PRESENT
+                        for v in raw])
+        else:
+            yield column, raw, [ABSENT if column not in r else NULL if r[column] is None else PRESENT
+                                for r in records]
+
+
+def _save(directory: str, name: str, array: np.ndarray):
+    np.save(os.path.join(directory, f'{name}.npy'), array, allow_pickle=False)
+
+
+def _write_partition(directory: str, records: List[Dict], rows: List[int], columns: List[str],
+                     nested: Dict[str, List[str]], kinds: Dict[str, str]):
+    os.makedirs(directory)
+    _save(directory, ROW_COLUMN, np.array(rows, dtype=np.int64))
+    for name, values, states in _leaves(records, columns, nested):
+        if values is not None:
+            for suffix, array in _encode(values, kinds[name]).items():
+                _save(directory, name + suffix, array)
+        if any(states):
+            _save(directory, f'{name}.null', np.array(states, dtype=np.int8))
+
+
+def _row_dict(keys: List[str], row: Sequence) -> Dict:
+    if ABSENT_MARK in row:
+        return {k: v for k, v in zip(keys, row) if v is not ABSENT_MARK}
+    return dict(zip(keys, row))
+
+
+class SeasonStore:
+    """Read/write access to data/store; all column reads are memory-mapped and lazy"""
+
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+        self._manifests: Dict[str, Dict] = {}
+        self._arrays: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+
+    def _load(self, directory: str, name: str) -> np.ndarray:
+        path = os.path.join(directory, f'{name}.npy')
+        array = self._arrays.get(path)
+        if array is None:
+            array = self._arrays[path] = np.load(path, mmap_mode='r')
+            if len(self._arrays) > COLUMN_CACHE_SIZE:
+                self._arrays.popitem(last=False)
+        else:
+            self._arrays.move_to_end(path)
+        return array
+
+    # ---- writing ----------------------------------------------------------
+
+    def write_season(self, season: str, data: Dict, source: Optional[str] = None):
+        """Store a season dict (the season JSON structure), replacing any previous copy"""
+        target = os.path.join(self.root, season)
+        tmp_dir = target + '.tmp'
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+
+        manifest = {
+            'version': STORE_VERSION,
+            'source': _source_stamp(source) if source else None,
+            'keys': list(data),
+            'sections': {}
+        }
+
+        for section, records in data.items():
+            if not _is_table(records):
+                continue
+            columns = _column_order(records)
+            nested = {}
+            for column in columns:
+                present = [r[column] for r in records if r.get(column) is not None]
+                if present and all(isinstance(v, dict) for v in present):
+                    nested[column] = _column_order(present)
+
+            partitions: Dict[str, List[int]] = {}
+            league_names: Dict[str, Optional[str]] = {}
+            for i, record in enumerate(records):
+                slug = league_slug(record.get('leagueName'))
+                partitions.setdefault(slug, []).append(i)
+                league_names[slug] = record.get('leagueName')
+
+            # One kind per column for the whole section, so partitions agree
+            kinds = {name: _kind(values) for name, values, _ in _leaves(records, columns, nested)
+                     if values is not None}
+            for slug, rows in partitions.items():
+                _write_partition(os.path.join(tmp_dir, section, slug), [records[i] for i in rows],
+                                 rows, columns, nested, kinds)
+
+            manifest['sections'][section] = {
+                'rows': len(records),
+                'columns': columns,
+                'nested': nested,
+                'kinds': kinds,
+                'partitions': {slug: {'league': league_names[slug], 'rows': len(rows)}
+                               for slug, rows in partitions.items()}
+            }
+
+        # Non-tabular keys (current_elos, baseline_stats, ...) stay JSON, apart from the manifest
+        with open(os.path.join(tmp_dir, EXTRA_FILE), 'w', encoding='utf-8') as f:
+            json.dump({k: v for k, v in data.items() if not _is_table(v)}, f, default=str)
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, default=str)
+
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(tmp_dir, target)
+        self._manifests.pop(season, None)
+        prefix = os.path.join(target, '')
+        for path in [p for p in self._arrays if p.startswith(prefix)]:
+            del self._arrays[path]
+
+    # ---- reading ----------------------------------------------------------
+
+    def manifest(self, season: str) -> Dict:
+        if season not in self._manifests:
+            with open(os.path.join(self.root, season, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                self._manifests[season] = json.load(f)
+        return self._manifests[season]
+
+    def has_season(self, season: str) -> bool:
+        return os.path.exists(os.path.join(self.root, season, MANIFEST_FILE))
+
+    def is_current(self, season: str, source: str) -> bool:
+        """True when the store was built from the source file as it is now"""
+        if not self.has_season(season) or not os.path.exists(source):
+            return False
+        manifest = self.manifest(season)
+        return manifest.get('version') == STORE_VERSION and manifest.get('source') == _source_stamp(source)
+
+    def leagues(self, season: str, section: str) -> List[str]:
+        partitions = self.manifest(season)['sections'][section]['partitions']
+        return [p['league'] for p in partitions.values()]
+
+    def _partition_dirs(self, season: str, section: str, league: Optional[str]) -> List[str]:
+        partitions = self.manifest(season)['sections'][section]['partitions']
+        slugs = list(partitions) if league is None else [league_slug(league)]
+        return [os.path.join(self.root, season, section, slug) for slug in slugs if slug in partitions]
+
+    def _partition_column(self, directory: str, column: str, kind: str) -> np.ndarray:
+        if kind in (TEXT, JSON):
+            return self._load(directory, f'{column}.dict')[self._load(directory, column)]
+        return self._load(directory, column)
+
+    def column(self, season: str, section: str, column: str, league: Optional[str] = None) -> np.ndarray:
+        """
+        One column as a NumPy array (memory-mapped for a single league's
+        numeric columns, in original row order for the whole section).
+        Null/absent rows hold the kind's fill value; see states().
+        JSON columns come back as their JSON text.
+        """
+        kind = self.manifest(season)['sections'][section]['kinds'].get(column)
+        arrays = [self._partition_column(d, column, kind)
+                  for d in self._partition_dirs(season, section, league)]
+        if league is not None:
+            return arrays[0] if arrays else np.empty(0)
+        return self._merge(season, section, arrays)
+
+    def states(self, season: str, section: str, column: str,
+               league: Optional[str] = None) -> Optional[np.ndarray]:
+        """PRESENT / NULL / ABSENT per row for a column, or None when every row is present"""
+        dirs = self._partition_dirs(season, section, league)
+        paths = [os.path.join(d, f'{column}.null.npy') for d in dirs]
+        if not any(os.path.exists(p) for p in paths):
+            return None
+        arrays = [self._load(d, f'{column}.null') if os.path.exists(p)
+                  else np.zeros(len(self._load(d, ROW_COLUMN)), dtype=np.int8)
+                  for d, p in zip(dirs, paths)]
+        if league is not None:
+            return arrays[0]
+        return self._merge(season, section, arrays)
+
+    def columns(self, season: str, section: str, columns: Sequence[str],
+                league: Optional[str] = None) -> Dict[str, np.ndarray]:
+        return {c: self.column(season, section, c, league) for c in columns}
+
+    def present(self, season: str, section: str, column: str, league: Optional[str] = None) -> np.ndarray:
+        """Boolean mask of the rows that hold a value (neither null nor missing) for a column"""
+        states = self.states(season, section, column, league)
+        if states is not None:
+            return states == PRESENT
+        partitions = self.manifest(season)['sections'][section]['partitions']
+        if league is None:
+            return np.ones(sum(p['rows'] for p in partitions.values()), dtype=bool)
+        return np.ones(partitions.get(league_slug(league), {}).get('rows', 0), dtype=bool)
+
+    def _merge(self, season: str, section: str, arrays: List[np.ndarray]) -> np.ndarray:
+        if not arrays:
+            return np.empty(0)
+        rows = [self._load(d, ROW_COLUMN) for d in self._partition_dirs(season, section, None)]
+        # Text partitions differ in width, so take the widest dtype
+        merged = np.empty(sum(len(a) for a in arrays), dtype=np.result_type(*arrays))
+        for row, array in zip(rows, arrays):
+            merged[row] = array
+        return merged
+
+    def _values(self, season: str, section: str, name: str, kind: str, league: Optional[str]) -> List:
+        """A column as Python values, None for nulls and ABSENT_MARK for missing keys"""
+        values = self.column(season, section, name, league).tolist()
+        if kind == JSON:
+            values = [json.loads(v) if v else None for v in values]
+        states = self.states(season, section, name, league)
+        if states is not None:
+            values = [v if s == PRESENT else None if s == NULL else ABSENT_MARK
+                      for v, s in zip(values, states.tolist())]
+        return values
+
+    def records(self, season: str, section: str, league: Optional[str] = None) -> List[Dict]:
+        """Row dicts for a section (or one league of it), in original order"""
+        info = self.manifest(season)['sections'][section]
+        kinds = info['kinds']
+        n = len(self.column(season, section, ROW_COLUMN, league))
+
+        names = []
+        fields = []
+        for column in info['columns']:
+            names.append(column)
+            if column not in info['nested']:
+                fields.append(self._values(season, section, column, kinds[column], league))
+                continue
+
+            keys = info['nested'][column]
+            subs = [self._values(season, section, f'{column}{NESTED_SEPARATOR}{key}',
+                                 kinds[f'{column}{NESTED_SEPARATOR}{key}'], league) for key in keys]
+            parent = self.states(season, section, column, league)
+            parent = parent.tolist() if parent is not None else [PRESENT] * n
+            fields.append([
+                _row_dict(keys, row) if state == PRESENT else None if state == NULL else ABSENT_MARK
+                for state, row in zip(parent, zip(*subs))
+            ])
+
+        return [_row_dict(names, row) for row in zip(*fields)]
+
+    def extra(self, season: str) -> Dict:
+        """The season's non-tabular keys (current_elos, baseline_stats, ...)"""
+        with open(os.path.join(self.root, season, EXTRA_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def export_json(self, season: str) -> Dict:
+        """The season in its original JSON structure"""
+        manifest = self.manifest(season)
+        extra = self.extra(season)
+        return {
+            key: self.records(season, key) if key in manifest['sections'] else extra[key]
+            for key in manifest['keys']
+        }
+
+
+def current_store(season: str, data_dir: str = DATA_DIR) -> SeasonStore:
+    """The store, with the season rebuilt first if data/<season>.json has changed since it was built"""
+    source = os.path.join(data_dir, f'{season}.json')
+    store = SeasonStore(os.path.join(data_dir, 'store'))
+    if not store.is_current(season, source):
+        with open(source, 'r', encoding='utf-8') as f:
+            store.write_season(season, json.load(f), source)
+    return store
+
+
+def season_columns(season: str, section: str, columns: Sequence[str], league: Optional[str] = None,
+                   data_dir: str = DATA_DIR) -> Dict[str, np.ndarray]:
+    """
+    Selected columns of a season section, rebuilding the season's store first
+    if data/<season>.json has changed since it was built
+    """
+    return current_store(season, data_dir).columns(season, section, columns, league)
+
+
+def build(seasons: Sequence[str] = SEASONS, data_dir: str = DATA_DIR):
+    store = SeasonStore(os.path.join(data_dir, 'store'))
+    for season in seasons:
+        source = os.path.join(data_dir, f'{season}.json')
+        with open(source, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        store.write_season(season, data, source)
+        sections = store.manifest(season)['sections']
+        print(f"  {season}: " + ", ".join(
+            f"{name} {info['rows']} rows / {len(info['partitions'])} leagues" for name, info in sections.items()))
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'export', 'info'):
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == 'build':
+        print("Building season store...")
+        build(sys.argv[2:] or SEASONS)
+    elif command == 'export':
+        data = SeasonStore().export_json(sys.argv[2])
+        out = sys.argv[3] if len(sys.argv) > 3 else os.path.join(DATA_DIR, f'{sys.argv[2]}.export.json')
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, default=str)
+        print(f"Exported {sys.argv[2]} to {out}")
+    else:
+        store = SeasonStore()
+        for name, info in store.manifest(sys.argv[2])['sections'].items():
+            print(f"{name}: {info['rows']} rows, {len(info['columns'])} columns")
+            for p in info['partitions'].values():
+                print(f"  {p['league']}: {p['rows']}")
+
+
+if __name__ == "__main__":
+    main()
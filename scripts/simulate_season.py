@@ -0,0 +1,536 @@
+"""
+Monte Carlo season simulator
+Plays out the rest of the 2025-26 season many times from the current ELO
+ratings and standings. Ratings and form keep updating inside each simulation
+using the ELOCalculator rules. The output gives each team's distribution of
+final position and points, plus title, Champions League, European-place and
+relegation odds.
+
+Match outcomes are drawn from the prediction_kernel probabilities. Scorelines
+are then drawn from the historical scorelines with the same outcome.
+Simulations run in chunks of NumPy arrays across a process pool. Every chunk
+gets its own seed from one SeedSequence, so a given --seed gives the same
+result for any number of workers.
+
+Usage:
+    python simulate_season.py                      # 100k simulations from data/season_2025_26.json
+    python simulate_season.py --source supabase    # standings and fixtures from the matches table
+    python simulate_season.py -n 20000 --seed 7 --workers 4
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from elo_kernel import WIN_ACTUAL_SCORES, build_form_table
+from elo_params import EloParameters, load_parameters
+from elo_vectorized import schedule_batches
+from form_tracker import FormTracker, WIN, DRAW, LOSS
+from prediction_kernel import draw_probabilities
+from supabase_stream import stream_rows
+from sweep import share_arrays, attach_arrays, stack_parameters
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+SEASON_FILE = os.path.join(DATA_DIR, 'season_2025_26.json')
+HISTORY_FILE = os.path.join(DATA_DIR, 'season_2024_25.json')
+OUTPUT_FILE = os.path.join(DATA_DIR, 'season_simulation.json')
+
+SEASON_YEAR = 2025
+FORM_WINDOW = 5
+DEFAULT_SIMULATIONS = 100_000
+DEFAULT_CHUNK_SIZE = 1_000
+
+# Weights of a win and a loss in the flattened form index (wins * (window + 1) + losses)
+FORM_WIN_WEIGHT = FORM_WINDOW + 1
+FORM_LOSS_WEIGHT = 1
+# 10 ** (x / 400) == exp(x * LOG10_OVER_400)
+LOG10_OVER_400 = np.log(10) / 400
+
+# League places: Champions League, all European places (including the UCL) and
+# direct relegation. Bundesliga and Ligue 1 relegation play-offs (16th) are not counted.
+LEAGUE_RULES = {
+    'English Premier League': {'champions_league': 4, 'europe': 6, 'relegation': 3},
+    'Spanish LALIGA': {'champions_league': 4, 'europe': 6, 'relegation': 3},
+    'Italian Serie A': {'champions_league': 4, 'europe': 6, 'relegation': 3},
+    'German Bundesliga': {'champions_league': 4, 'europe': 6, 'relegation': 2},
+    'French Ligue 1': {'champions_league': 4, 'europe': 6, 'relegation': 2}
+}
+DEFAULT_LEAGUE_RULES = {'champions_league': 4, 'europe': 6, 'relegation': 3}
+
+
+# ---------------------------------------------------------------------------
+# Season state
+# ---------------------------------------------------------------------------
+
+def _fixture(league: str, home: str, away: str, home_score, away_score, date) -> Dict:
+    return {'league': league, 'home': home, 'away': away,
+            'home_score': home_score, 'away_score': away_score, 'date': str(date or '')}
+
+
+def load_json_season(path: str = SEASON_FILE) -> Tuple[Dict[str, float], List[Dict], List[Dict]]:
+    """(current ELOs, completed fixtures, pending fixtures) from a season JSON file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        season = json.load(f)
+
+    convert = lambda m: _fixture(m['leagueName'], m['homeTeamName'], m['awayTeamName'],
+                                 m['homeTeamScore'], m['awayTeamScore'], m.get('date'))
+    return (season['current_elos'],
+            [convert(m) for m in season['completed_matches']],
+            [convert(m) for m in season['pending_matches']])
+
+
+def load_supabase_season(season_year: int = SEASON_YEAR) -> Tuple[Dict[str, float], List[Dict], List[Dict]]:
+    """(current ELOs, completed fixtures, pending fixtures) from the teams and matches tables"""
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    load_dotenv('.env.local')
+    supabase = create_client(os.getenv('NEXT_PUBLIC_SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+
+    elos = {team['name']: float(team['current_elo'])
+            for team in stream_rows(supabase, 'teams', 'name, current_elo')}
+
+    rows = stream_rows(supabase, 'matches',
+                       'league_name, home_team_name, away_team_name, home_team_score, away_team_score, '
+                       'match_date, is_completed',
+                       where=lambda q: q.eq('season_year', season_year), keys=('match_date', 'id'))
+
+    completed, pending = [], []
+    for m in rows:
+        fixture = _fixture(m['league_name'], m['home_team_name'], m['away_team_name'],
+                           m['home_team_score'], m['away_team_score'], m['match_date'])
+        (completed if m['is_completed'] else pending).append(fixture)
+    return elos, completed, pending
+
+
+def fill_schedule(completed: Sequence[Dict], pending: Sequence[Dict]) -> List[Dict]:
+    """
+    Fixtures of each league's double round-robin that are neither played nor
+    scheduled yet, grouped into rounds in which every team plays at most once.
+    They have no date and are simulated after the known fixtures.
+    """
+    teams = defaultdict(set)
+    seen = set()
+    for m in list(completed) + list(pending):
+        teams[m['league']].update((m['home'], m['away']))
+        seen.add((m['home'], m['away']))
+
+    remaining = [
+        (league, home, away)
+        for league in sorted(teams)
+        for home in sorted(teams[league])
+        for away in sorted(teams[league])
+        if home != away and (home, away) not in seen
+    ]
+    # A fixed shuffle keeps the greedy rounds close to full
+    random.Random(0).shuffle(remaining)
+
+    fixtures = []
+    while remaining:
+        playing, postponed = set(), []
+        for league, home, away in remaining:
+            if home in playing or away in playing:
+                postponed.append((league, home, away))
+                continue
+            playing.update((home, away))
+            fixtures.append(_fixture(league, home, away, None, None, None))
+        remaining = postponed
+    return fixtures
+
+
+def load_scorelines(paths: Sequence[str] = (HISTORY_FILE, SEASON_FILE)) -> np.ndarray:
+    """Historical (home goals, away goals) pairs that simulated scorelines are drawn from"""
+    scores = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            season = json.load(f)
+        for m in season.get('matches', []) + season.get('completed_matches', []):
+            if m['homeTeamScore'] is not None and m['awayTeamScore'] is not None:
+                scores.append((m['homeTeamScore'], m['awayTeamScore']))
+    return np.array(scores, dtype=np.int64)
+
+
+def compile_simulation(elos: Dict[str, float], completed: Sequence[Dict], pending: Sequence[Dict],
+                       scorelines: np.ndarray, params: EloParameters) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    Arrays for simulate_chunk (shared between workers) and the team/league
+    metadata needed to summarize the results
+    """
+    completed = sorted(completed, key=lambda m: m['date'])
+    leagues = sorted({m['league'] for m in list(completed) + list(pending)})
+    league_teams = {league: set() for league in leagues}
+    for m in list(completed) + list(pending):
+        league_teams[m['league']].update((m['home'], m['away']))
+
+    names = [team for league in leagues for team in sorted(league_teams[league])]
+    team_index = {team: i for i, team in enumerate(names)}
+    team_league = np.array([i for i, league in enumerate(leagues) for _ in league_teams[league]], dtype=np.int64)
+    n_teams = len(names)
+
+    # Standings and form after the completed matches
+    points = np.zeros(n_teams, dtype=np.int64)
+    goals_for = np.zeros(n_teams, dtype=np.int64)
+    goals_against = np.zeros(n_teams, dtype=np.int64)
+    form = FormTracker(FORM_WINDOW, n_teams)
+    for m in completed:
+        h, a = team_index[m['home']], team_index[m['away']]
+        hs, aws = m['home_score'], m['away_score']
+        goals_for[h] += hs
+        goals_against[h] += aws
+        goals_for[a] += aws
+        goals_against[a] += hs
+        if hs > aws:
+            points[h] += 3
+        elif hs < aws:
+            points[a] += 3
+        else:
+            points[h] += 1
+            points[a] += 1
+        form.push(h, WIN if hs > aws else (DRAW if hs == aws else LOSS))
+        form.push(a, WIN if aws > hs else (DRAW if hs == aws else LOSS))
+
+    # Ring buffer laid out as in FormTracker: slot = games played % window
+    form_ring = np.array(form.results, dtype=np.int8).reshape(n_teams, FORM_WINDOW)
+
+    home = np.array([team_index[m['home']] for m in pending], dtype=np.int64)
+    away = np.array([team_index[m['away']] for m in pending], dtype=np.int64)
+    batches = schedule_batches(home, away, n_teams)
+    order = np.argsort(batches, kind='stable')
+    bounds = np.flatnonzero(np.diff(batches[order])) + 1
+
+    # Scorelines grouped by outcome (home win, draw, away win)
+    outcome = np.where(scorelines[:, 0] > scorelines[:, 1], 0,
+                       np.where(scorelines[:, 0] == scorelines[:, 1], 1, 2))
+    by_outcome = np.argsort(outcome, kind='stable')
+    outcome_counts = np.bincount(outcome, minlength=3)
+
+    arrays = {
+        'home': home,
+        'away': away,
+        'order': order,
+        'bounds': bounds,
+        'elos': np.array([elos.get(team, params.initial_elo) for team in names], dtype=np.float64),
+        'defense': np.array([params.defensive_score(team) for team in names], dtype=np.float64),
+        'points': points,
+        'goals_for': goals_for,
+        'goals_against': goals_against,
+        'form_ring': form_ring,
+        'form_wins': np.array(form.wins, dtype=np.int64),
+        'form_losses': np.array(form.losses, dtype=np.int64),
+        'form_played': np.array(form.played, dtype=np.int64),
+        'team_league': team_league,
+        'score_home': scorelines[by_outcome, 0],
+        'score_away': scorelines[by_outcome, 1],
+        'outcome_offset': np.concatenate(([0], np.cumsum(outcome_counts)[:-1])),
+        'outcome_count': outcome_counts
+    }
+    meta = {
+        'names': names,
+        'leagues': leagues,
+        'league_teams': {league: [team_index[t] for t in sorted(league_teams[league])] for league in leagues},
+        'max_points': int(points.max(initial=0)) + 3 * int(np.bincount(
+            np.concatenate((home, away)), minlength=n_teams).max(initial=0))
+    }
+    return arrays, meta
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+def scoreline_tables(score_home: np.ndarray, score_away: np.ndarray,
+                     params: EloParameters) -> Dict[str, np.ndarray]:
+    """
+    Everything the rating and table update needs from a scoreline, flattened so
+    entry side * n_scorelines + scoreline describes the home (side 0) or away
+    (side 1) team: actual score, win flag, the venue x goal difference x defense
+    multiplier, league points, goal difference, goals scored and form weight.
+    """
+    tables = {key: value[0] for key, value in stack_parameters([params]).items()}
+    scored = np.stack((score_home, score_away))
+    conceded = np.stack((score_away, score_home))
+    is_away = np.array([[0], [1]])
+
+    won = scored > conceded
+    lost = scored < conceded
+    abs_gd = np.minimum(np.abs(scored - conceded), 4)
+
+    venue = tables['venue'][2 * is_away + ~won]
+    gd = tables['gd'][np.where(won, abs_gd, 5 + abs_gd)]
+    defense = tables['defense'][np.where(won, np.minimum(conceded, 2), np.where(lost & (scored == 0), 3, 4))]
+
+    return {
+        'actual': np.where(won, np.array(WIN_ACTUAL_SCORES)[abs_gd], np.where(lost, 0.0, 0.5)).ravel(),
+        'won': won.astype(np.float64).ravel(),
+        'multiplier': (venue * gd * defense).ravel(),
+        'points': np.where(won, 3, np.where(lost, 0, 1)).astype(np.int16).ravel(),
+        'goal_diff': (scored - conceded).astype(np.int16).ravel(),
+        'goals_for': scored.astype(np.int16).ravel(),
+        'form_weight': np.where(won, FORM_WIN_WEIGHT, np.where(lost, FORM_LOSS_WEIGHT, 0)).astype(np.int8).ravel()
+    }
+
+
+def k_cap_lookup(thresholds: Sequence[float], values: Sequence[float]):
+    """
+    Function mapping an ELO array to K caps. Whole-number thresholds (the usual
+    case) use a table indexed by floor(elo), which is several times cheaper than
+    a binary search per element.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    low, high = thresholds[0], thresholds[-1]
+    if np.all(thresholds == np.floor(thresholds)) and high - low <= 100_000:
+        # elo < t  <=>  floor(elo) < t for whole-number t
+        grid = np.arange(low - 1, high + 1)
+        table = values[np.searchsorted(thresholds, grid, side='right')]
+        last = len(table) - 1
+        return lambda elo: table[np.clip((elo - (low - 1)).astype(np.int64), 0, last)]
+    return lambda elo: values[np.searchsorted(thresholds, elo, side='right')]
+
+
+def simulate_chunk(arrays: Dict[str, np.ndarray], params: EloParameters, n_sims: int,
+                   seed: np.random.SeedSequence, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Play the pending fixtures n_sims times.
+    Returns (position counts [team, position], final points counts [team, points]).
+
+    State is team-major ([team, simulation]) so each fixture batch reads and
+    writes whole contiguous rows.
+    """
+    rng = np.random.default_rng(seed)
+    lookup = scoreline_tables(arrays['score_home'], arrays['score_away'], params)
+    n_scorelines = len(arrays['score_home'])
+    k_cap = k_cap_lookup(params.k_cap_thresholds, params.k_cap_values)
+    form_table = np.array(build_form_table(params.form_multipliers, FORM_WINDOW)).ravel()
+    home_advantage = params.home_advantage
+
+    column = lambda values, dtype: np.repeat(values.astype(dtype)[:, None], n_sims, axis=1)
+    n_teams = len(arrays['elos'])
+    elos = column(arrays['elos'], np.float64)
+    points = column(arrays['points'], np.int16)
+    goal_diff = column(arrays['goals_for'] - arrays['goals_against'], np.int16)
+    goals_for = column(arrays['goals_for'], np.int16)
+    # Form as a single index wins * (window + 1) + losses into the form table;
+    # the ring holds each result's weight in that index
+    form_index = column(arrays['form_wins'] * FORM_WIN_WEIGHT + arrays['form_losses'], np.int8)
+    ring = np.where(arrays['form_ring'] == WIN, FORM_WIN_WEIGHT,
+                    np.where(arrays['form_ring'] == LOSS, FORM_LOSS_WEIGHT, 0))
+    form_ring = np.repeat(ring.astype(np.int8)[:, :, None], n_sims, axis=2)
+    # Every simulation plays the same fixtures, so games played is shared
+    form_played = arrays['form_played'].copy()
+
+    for rows in np.split(arrays['order'], arrays['bounds']):
+        if not len(rows):
+            continue
+        h = arrays['home'][rows]
+        a = arrays['away'][rows]
+        n_matches = len(rows)
+
+        # Both sides of every match stacked: home rows first, then away
+        team = np.concatenate((h, a))
+        team_elo = elos[team]
+        h_elo = team_elo[:n_matches]
+        a_elo = team_elo[n_matches:]
+        home_gap = a_elo - h_elo
+
+        # Outcome from the prediction model, then a historical scoreline with that outcome
+        expected_home = 1 / (1 + np.exp((home_gap - home_advantage) * LOG10_OVER_400))
+        avg_defense = ((arrays['defense'][h] + arrays['defense'][a]) / 2)[:, None]
+        draw = draw_probabilities(h_elo, a_elo, avg_defense, params.draw_model)
+        home_win = expected_home * (1 - draw)
+        u = rng.random(h_elo.shape)
+        outcome = (u >= home_win).astype(np.int64) + (u >= home_win + draw)
+        pick = arrays['outcome_offset'][outcome] + \
+            (rng.random(h_elo.shape) * arrays['outcome_count'][outcome]).astype(np.int64)
+
+        side = np.concatenate((pick, pick + n_scorelines))
+        expected = np.concatenate((expected_home, 1 - expected_home))
+
+        # Opponent quality for wins: up to x2.0 as the underdog, down to x0.6 as the favourite
+        elo_gap = np.concatenate((home_gap, -home_gap))
+        opponent = np.minimum(np.maximum(np.maximum(elo_gap / 400, elo_gap / 800), -0.4), 1.0)
+        opponent = 1.0 + lookup['won'][side] * opponent
+
+        k_adjusted = params.base_k_factor * opponent * lookup['multiplier'][side] * form_table[form_index[team]]
+        elos[team] += np.minimum(k_adjusted, k_cap(team_elo)) * (lookup['actual'][side] - expected)
+
+        points[team] += lookup['points'][side]
+        goal_diff[team] += lookup['goal_diff'][side]
+        goals_for[team] += lookup['goals_for'][side]
+
+        # Rolling form: add the new result's weight, drop the oldest one's
+        weight = lookup['form_weight'][side]
+        slot = form_played[team] % FORM_WINDOW
+        form_index[team] += weight - form_ring[team, slot]
+        form_ring[team, slot] = weight
+        form_played[team] += 1
+
+    # Final positions per league: points, then goal difference, then goals scored,
+    # then a random draw
+    sort_key = (points * 1_000_000.0 + (goal_diff + 1000) * 1000.0 + goals_for +
+                rng.random(points.shape) * 0.5)
+    positions = np.empty((n_teams, n_sims), dtype=np.int64)
+    for league in np.unique(arrays['team_league']):
+        members = np.flatnonzero(arrays['team_league'] == league)
+        ranking = np.argsort(-sort_key[members], axis=0, kind='stable')
+        positions[members[ranking], np.arange(n_sims)] = np.arange(len(members))[:, None]
+
+    max_position = int(np.bincount(arrays['team_league']).max())
+    team_ids = np.arange(n_teams)[:, None]
+    position_counts = np.bincount((team_ids * max_position + positions).ravel(),
+                                  minlength=n_teams * max_position).reshape(n_teams, max_position)
+    points_counts = np.bincount((team_ids * (max_points + 1) + points).ravel(),
+                                minlength=n_teams * (max_points + 1)).reshape(n_teams, max_points + 1)
+    return position_counts, points_counts
+
+
+_worker_arrays: Optional[Dict[str, np.ndarray]] = None
+_worker_params: Optional[EloParameters] = None
+_worker_blocks: list = []
+
+
+def _init_worker(specs: Dict, params: EloParameters):
+    global _worker_arrays, _worker_params, _worker_blocks
+    _worker_blocks, _worker_arrays = attach_arrays(specs)
+    _worker_params = params
+
+
+def _simulate_task(task: Tuple[int, np.random.SeedSequence, int]) -> Tuple[np.ndarray, np.ndarray]:
+    n_sims, seed, max_points = task
+    return simulate_chunk(_worker_arrays, _worker_params, n_sims, seed, max_points)
+
+
+def run_simulations(arrays: Dict[str, np.ndarray], meta: Dict, params: EloParameters,
+                    n_sims: int = DEFAULT_SIMULATIONS, seed: Optional[int] = None,
+                    workers: Optional[int] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """Position and points counts over n_sims simulations, summed across chunks"""
+    sizes = [min(chunk_size, n_sims - start) for start in range(0, n_sims, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(size, child, meta['max_points']) for size, child in zip(sizes, seeds)]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    if workers <= 1:
+        results = [simulate_chunk(arrays, params, size, child, max_points)
+                   for size, child, max_points in tasks]
+    else:
+        blocks, specs = share_arrays(arrays)
+        try:
+            with Pool(workers, initializer=_init_worker, initargs=(specs, params)) as pool:
+                results = pool.map(_simulate_task, tasks)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    position_counts = sum(r[0] for r in results)
+    points_counts = sum(r[1] for r in results)
+    return position_counts, points_counts
+
+
+def summarize(position_counts: np.ndarray, points_counts: np.ndarray, arrays: Dict[str, np.ndarray],
+              meta: Dict, n_sims: int) -> Dict[str, List[Dict]]:
+    """Per-league tables of each team's odds, ordered by expected points"""
+    points_values = np.arange(points_counts.shape[1])
+    cumulative = np.cumsum(points_counts, axis=1)
+    percentile = lambda team, q: int(np.searchsorted(cumulative[team], q * n_sims))
+
+    tables = {}
+    for league in meta['leagues']:
+        rules = LEAGUE_RULES.get(league, DEFAULT_LEAGUE_RULES)
+        members = meta['league_teams'][league]
+        size = len(members)
+        rows = []
+        for team in members:
+            position_probs = position_counts[team, :size] / n_sims
+            rows.append({
+                'team': meta['names'][team],
+                'current_elo': round(float(arrays['elos'][team]), 2),
+                'current_points': int(arrays['points'][team]),
+                'expected_points': round(float(points_counts[team] @ points_values) / n_sims, 2),
+                'points_p10': percentile(team, 0.10),
+                'points_median': percentile(team, 0.50),
+                'points_p90': percentile(team, 0.90),
+                'title': round(float(position_probs[0]), 4),
+                'champions_league': round(float(position_probs[:rules['champions_league']].sum()), 4),
+                'europe': round(float(position_probs[:rules['europe']].sum()), 4),
+                'relegation': round(float(position_probs[size - rules['relegation']:].sum()), 4),
+                'position_probs': [round(float(p), 4) for p in position_probs]
+            })
+        rows.sort(key=lambda r: -r['expected_points'])
+        tables[league] = rows
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo simulation of the rest of the 2025-26 season')
+    parser.add_argument('-n', '--simulations', type=int, default=DEFAULT_SIMULATIONS)
+    parser.add_argument('--seed', type=int, default=None, help='seed for reproducible results')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='simulations per task')
+    parser.add_argument('--source', choices=('json', 'supabase'), default='json')
+    parser.add_argument('--known-fixtures-only', action='store_true',
+                        help='only simulate fixtures present in the data (do not complete the round-robin)')
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("MONTE CARLO SEASON SIMULATION")
+    print("="*80)
+
+    params = load_parameters()
+    if args.source == 'supabase':
+        elos, completed, pending = load_supabase_season()
+    else:
+        elos, completed, pending = load_json_season()
+
+    filled = [] if args.known_fixtures_only else fill_schedule(completed, pending)
+    arrays, meta = compile_simulation(elos, completed, pending + filled, load_scorelines(), params)
+
+    print(f"\nCompleted matches: {len(completed)}")
+    print(f"Fixtures to simulate: {len(pending) + len(filled)} "
+          f"({len(pending)} scheduled, {len(filled)} added to complete the round-robin)")
+    print(f"Simulations: {args.simulations:,}")
+
+    start = time.perf_counter()
+    position_counts, points_counts = run_simulations(
+        arrays, meta, params, args.simulations, args.seed, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"Simulated in {elapsed:.1f}s")
+
+    tables = summarize(position_counts, points_counts, arrays, meta, args.simulations)
+
+    for league, rows in tables.items():
+        print(f"\n{league}")
+        print(f"  {'Team':<28} {'Pts':>4} {'xPts':>6} {'Title':>7} {'UCL':>7} {'Europe':>7} {'Releg.':>7}")
+        for row in rows:
+            print(f"  {row['team']:<28} {row['current_points']:>4} {row['expected_points']:>6.1f} "
+                  f"{row['title']*100:>6.1f}% {row['champions_league']*100:>6.1f}% "
+                  f"{row['europe']*100:>6.1f}% {row['relegation']*100:>6.1f}%")
+
+    output = {
+        'generated_at': datetime.now().isoformat(),
+        'source': args.source,
+        'simulations': args.simulations,
+        'seed': args.seed,
+        'fixtures_simulated': len(pending) + len(filled),
+        'fixtures_added': len(filled),
+        'parameters_fingerprint': params.fingerprint,
+        'leagues': tables
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+
+    print(f"\nSimulation saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Incremental league standings
+One row per team per league with P/W/D/L, goals, goal difference, points,
+clean sheets, home and away splits and the current streak, stored in the
+season file under `standings` ({league: {team: row}}) and in the standings
+table. Every result updates both teams' rows in O(1) (a correction takes the
+old result back with sign=-1), so a league table is a lookup and a sort of
+~20 rows instead of an aggregation over every completed match. A season file
+written before the key existed is upgraded with one scan.
+
+The workbook's per-match table columns (home_wins, home_gf,
+home_clean_sheet, ...) do not describe the table before each match (they
+disagree with the season's own results from the first matchday), so the
+standings are built from the results alone.
+
+Usage:
+    python standings.py [--league "English Premier League"]
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from rolling_state import result_letters
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+SEASON_FILE = os.path.join(DATA_DIR, 'season_2025_26.json')
+
+STANDINGS_KEY = 'standings'
+
+SPLIT_FIELDS = ('played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against', 'clean_sheets')
+ROW_FIELDS = (SPLIT_FIELDS + ('goal_difference', 'points')
+              + tuple(f'home_{f}' for f in SPLIT_FIELDS) + tuple(f'away_{f}' for f in SPLIT_FIELDS))
+
+RESULT_FIELDS = {'W': 'won', 'D': 'drawn', 'L': 'lost'}
+POINTS = {'W': 3, 'D': 1, 'L': 0}
+
+
+def new_row() -> Dict:
+    return {**dict.fromkeys(ROW_FIELDS, 0), 'streak_result': None, 'streak_length': 0}
+
+
+def team_row(standings: Dict, league: str, team: str) -> Dict:
+    teams = standings.setdefault(league, {})
+    row = teams.get(team)
+    if row is None:
+        row = teams[team] = new_row()
+    return row
+
+
+def add_result(row: Dict, venue: str, scored: int, conceded: int, sign: int = 1):
+    """
+    Add (sign=1) or take back (sign=-1) one match in a team's counters. The
+    streak only moves forward; after taking a result back, recount it with
+    recount_streaks().
+    """
+    result = result_letters(scored, conceded)[0]
+    for prefix in ('', f'{venue}_'):
+        row[f'{prefix}played'] += sign
+        row[f'{prefix}{RESULT_FIELDS[result]}'] += sign
+        row[f'{prefix}goals_for'] += sign * scored
+        row[f'{prefix}goals_against'] += sign * conceded
+        if conceded == 0:
+            row[f'{prefix}clean_sheets'] += sign
+    row['goal_difference'] += sign * (scored - conceded)
+    row['points'] += sign * POINTS[result]
+    if sign > 0:
+        if row['streak_result'] == result:
+            row['streak_length'] += 1
+        else:
+            row['streak_result'], row['streak_length'] = result, 1
+
+
+def add_match(standings: Dict, league: str, home: str, away: str, home_score: int, away_score: int,
+              sign: int = 1):
+    """Add (or take back) one match in both teams' rows; a team left without matches is dropped"""
+    add_result(team_row(standings, league, home), 'home', home_score, away_score, sign)
+    add_result(team_row(standings, league, away), 'away', away_score, home_score, sign)
+    if sign < 0:
+        teams = standings[league]
+        for team in (home, away):
+            if not teams[team]['played']:
+                del teams[team]
+
+
+def add_completed(standings: Dict, match: Mapping, sign: int = 1):
+    """add_match for a completed match record"""
+    add_match(standings, match['leagueName'], match['homeTeamName'], match['awayTeamName'],
+              match['homeTeamScore'], match['awayTeamScore'], sign)
+
+
+def recount_streaks(standings: Dict, matches: List[Mapping], teams: Iterable[str]):
+    """
+    Recount the given teams' current streaks from the completed matches,
+    newest first, stopping at each team's first different result
+    """
+    teams = set(teams)
+    open_teams = set(teams)
+    streaks = {}
+    for m in reversed(matches):
+        if not open_teams:
+            break
+        results = zip((m['homeTeamName'], m['awayTeamName']),
+                      result_letters(m['homeTeamScore'], m['awayTeamScore']))
+        for team, result in results:
+            if team not in open_teams:
+                continue
+            streak = streaks.setdefault(team, [result, 0])
+            if streak[0] == result:
+                streak[1] += 1
+            else:
+                open_teams.discard(team)
+
+    for rows in standings.values():
+        for team in teams & rows.keys():
+            rows[team]['streak_result'], rows[team]['streak_length'] = streaks.get(team, (None, 0))
+
+
+def build_standings(matches: Iterable[Mapping]) -> Dict:
+    """{league: {team: row}} from completed match records in order"""
+    standings: Dict = {}
+    for m in matches:
+        add_completed(standings, m)
+    return standings
+
+
+def season_standings(data: Dict) -> Dict:
+    """The season file's standings, rebuilt from the completed matches if missing"""
+    standings = data.get(STANDINGS_KEY)
+    if standings is None:
+        standings = data[STANDINGS_KEY] = build_standings(data['completed_matches'])
+    return standings
+
+
+def league_table(standings: Dict, league: Optional[str] = None) -> List[Dict]:
+    """
+    Rows sorted by points, goal difference, then goals for, with positions;
+    one league or (league=None) every team together
+    """
+    leagues = [league] if league is not None else sorted(standings)
+    rows = [{'league': name, 'team': team, **row}
+            for name in leagues for team, row in standings.get(name, {}).items()]
+    rows.sort(key=lambda r: (-r['points'], -r['goal_difference'], -r['goals_for'], r['team']))
+    for position, row in enumerate(rows, 1):
+        row['position'] = position
+    return rows
+
+
+def streak_label(row: Mapping) -> str:
+    return f"{row['streak_result']}{row['streak_length']}" if row['streak_result'] else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="2025-26 league standings from the season file")
+    parser.add_argument('--league', help="one league (default: every league)")
+    parser.add_argument('--season-file', default=SEASON_FILE)
+    args = parser.parse_args()
+
+    with open(args.season_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    standings = season_standings(data)
+    leagues = [args.league] if args.league else sorted(standings)
+    for league in leagues:
+        print("="*80)
+        print(league.upper())
+        print("="*80)
+        print(f"{'Pos':>3}  {'Team':<28}{'P':>3}{'W':>4}{'D':>4}{'L':>4}{'GF':>5}{'GA':>5}{'GD':>5}{'Pts':>5}"
+              f"{'CS':>4}  Streak")
+        for row in league_table(standings, league):
+            print(f"{row['position']:>3}  {row['team']:<28}{row['played']:>3}{row['won']:>4}{row['drawn']:>4}"
+                  f"{row['lost']:>4}{row['goals_for']:>5}{row['goals_against']:>5}{row['goal_difference']:>+5}"
+                  f"{row['points']:>5}{row['clean_sheets']:>4}  {streak_label(row)}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Keyset-paginated streaming reads from Supabase tables
+A plain select() silently stops at the PostgREST row limit, and offset
+pagination (.range) rescans every skipped row and can skip or repeat rows if
+the table changes between pages. stream_rows() instead orders by a unique key
+(id, or a compound key such as (match_date, id)), asks for the rows after the
+last key it saw, projects only the requested columns and yields rows lazily,
+so a job holds one page in memory however large the table grows.
+
+Usage:
+    for m in stream_rows(supabase, 'matches', 'event_id, home_team_name, away_team_name',
+                         where=lambda q: q.eq('is_completed', False), keys=('match_date', 'id')):
+        ...
+"""
+
+from typing import Callable, Dict, Iterator, Optional, Sequence
+
+PAGE_SIZE = 1000
+
+
+def _quote(value) -> str:
+    """A filter value quoted for PostgREST logic trees (timestamps contain ':' and '+')"""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_filter(keys: Sequence[str], last: Dict, desc: bool = False) -> str:
+    """
+    PostgREST or=(...) body selecting rows strictly after `last` in key order:
+    k0 > v0, or k0 = v0 and k1 > v1, ...
+    """
+    op = 'lt' if desc else 'gt'
+    branches = []
+    for i, key in enumerate(keys):
+        terms = [f"{k}.eq.{_quote(last[k])}" for k in keys[:i]] + [f"{key}.{op}.{_quote(last[key])}"]
+        branches.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+    return ','.join(branches)
+
+
+def stream_rows(client, table: str, columns: str = '*', where: Optional[Callable] = None,
+                keys: Sequence[str] = ('id',), page_size: int = PAGE_SIZE,
+                desc: bool = False) -> Iterator[Dict]:
+    """
+    Yield every row of `table` matching `where` (a function that adds filters
+    to a query builder) in key order, one page per request. The key columns
+    must identify a row uniquely; they are added to the projection if missing.
+    With a compound key, `where` must not use or_() itself.
+    """
+    names = [c.strip() for c in columns.split(',')]
+    if '*' not in names:
+        names += [k for k in keys if k not in names]
+    projection = ', '.join(names)
+
+    last = None
+    while True:
+        query = client.table(table).select(projection)
+        if where is not None:
+            query = where(query)
+        if last is not None:
+            if len(keys) == 1:
+                query = (query.lt if desc else query.gt)(keys[0], last[keys[0]])
+            else:
+                query = query.or_(keyset_filter(keys, last, desc))
+        for key in keys:
+            query = query.order(key, desc=desc)
+        page = query.limit(page_size).execute().data
+
+        yield from page
+        if len(page) < page_size:
+            return
+        last = page[-1]
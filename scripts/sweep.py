@@ -0,0 +1,507 @@
+"""
+Parallel parameter sweep and backtest
+Replays the 2024-25 and 2025-26 seasons for many parameter sets at once and
+ranks them by log-loss and Brier score of the pre-match predictions.
+
+Fixture arrays are built once and placed in shared memory, so pool workers
+read them without copying. Each worker replays a chunk of configurations
+together, with ratings held as a (configurations x teams) array.
+
+Usage:
+    python sweep.py                        # grid over DEFAULT_SPACE
+    python sweep.py space.json             # grid over a search space file
+    python sweep.py space.json --random 5000 --seed 7
+
+A search space maps parameter paths (dotted, in parameters.json form) to a list
+of values or a {"min", "max"} range ("num" sets the number of grid points):
+    {"base_k_factor": [15, 20, 25],
+     "k_caps.1400": {"min": 60, "max": 90, "num": 4},
+     "draw_model.base": {"min": 0.22, "max": 0.28}}
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from datetime import datetime
+from multiprocessing import Pool, shared_memory
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from elo_kernel import WIN_ACTUAL_SCORES, build_form_table
+from elo_params import EloParameters, compile_parameters, load_parameters, parameters_fingerprint
+from elo_vectorized import schedule_batches
+from form_tracker import FormTracker, WIN, DRAW, LOSS
+from prediction_kernel import match_probabilities
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+LEADERBOARD_FILE = os.path.join(DATA_DIR, 'sweep_leaderboard.json')
+
+FORM_WINDOW = 5
+DEFAULT_CHUNK_SIZE = 64
+GRID_POINTS = 5
+EPSILON = 1e-15
+
+DEFAULT_SPACE = {
+    'base_k_factor': [15, 20, 25, 30],
+    'baseline_stats.avg_home_advantage': [30, 40, 50, 60, 70],
+    'venue_multipliers.away_win': [1.15, 1.25, 1.35],
+    'venue_multipliers.home_draw': [0.9, 1.0],
+    'k_caps.1400': [60, 75],
+    'draw_model.base': [0.22, 0.2494, 0.27]
+}
+
+# Column order of the per-configuration lookup tables
+VENUE_COLUMNS = ('venue_home_win', 'venue_home_draw', 'venue_away_win', 'venue_away_draw')
+DRAW_KEYS = ('base', 'closeness_range', 'closeness_scale', 'elite_threshold',
+             'elite_bonus', 'defensive_scale', 'min', 'max')
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def load_backtest_seasons(data_dir: str = DATA_DIR) -> List[List[Dict]]:
+    """Completed matches of each season, oldest season first, sorted by date"""
+    with open(os.path.join(data_dir, 'season_2024_25.json'), 'r', encoding='utf-8') as f:
+        season_2024 = json.load(f)['matches']
+    with open(os.path.join(data_dir, 'season_2025_26.json'), 'r', encoding='utf-8') as f:
+        season_2025 = json.load(f)['completed_matches']
+    return [sorted(season, key=lambda x: x['date']) for season in (season_2024, season_2025)]
+
+
+def compile_fixtures(seasons: Sequence[Sequence[Dict]], params: EloParameters) -> Dict[str, np.ndarray]:
+    """
+    Flatten the seasons into the arrays the backtest replays.
+
+    Everything that depends only on the results (outcomes, form before each
+    match, lookup columns for venue/goal difference/defense) is computed here
+    once; a configuration only changes the ratings. Form resets at the start of
+    each season, and teams first seen after the first season start at the
+    promoted-team ELO, as in process_data.main.
+    """
+    team_index: Dict[str, int] = {}
+    promoted: List[bool] = []
+    home, away, outcome, avg_defense, batch = [], [], [], [], []
+    # Per side: row 0 = home team, row 1 = away team
+    actual, won, venue_col, gd_col, form_col, defense_col = ([[], []] for _ in range(6))
+
+    batch_offset = 0
+    for season_no, season in enumerate(seasons):
+        played = [m for m in season
+                  if m['homeTeamScore'] is not None and m['awayTeamScore'] is not None]
+        for m in played:
+            for team in (m['homeTeamName'], m['awayTeamName']):
+                if team not in team_index:
+                    team_index[team] = len(team_index)
+                    promoted.append(season_no > 0)
+
+        form = FormTracker(FORM_WINDOW, len(team_index))
+        season_home, season_away = [], []
+        for m in played:
+            h = team_index[m['homeTeamName']]
+            a = team_index[m['awayTeamName']]
+            hs, aws = m['homeTeamScore'], m['awayTeamScore']
+            season_home.append(h)
+            season_away.append(a)
+            outcome.append(0 if hs > aws else (1 if hs == aws else 2))
+            avg_defense.append((params.defensive_score(m['homeTeamName']) +
+                                params.defensive_score(m['awayTeamName'])) / 2)
+
+            for side, (team, scored, conceded) in enumerate(((h, hs, aws), (a, aws, hs))):
+                abs_gd = min(abs(scored - conceded), 4)
+                is_win = scored > conceded
+                wins, losses = form.counts(team)
+
+                actual[side].append(WIN_ACTUAL_SCORES[abs_gd] if is_win else
+                                    (0.0 if scored < conceded else 0.5))
+                won[side].append(is_win)
+                venue_col[side].append(2 * side + (0 if is_win else 1))
+                gd_col[side].append(abs_gd if is_win else 5 + abs_gd)
+                form_col[side].append(wins * (FORM_WINDOW + 1) + losses)
+                if is_win:
+                    defense_col[side].append(min(conceded, 2))
+                elif scored < conceded and scored == 0:
+                    defense_col[side].append(3)
+                else:
+                    defense_col[side].append(4)
+
+            form.push(h, WIN if hs > aws else (DRAW if hs == aws else LOSS))
+            form.push(a, WIN if aws > hs else (DRAW if hs == aws else LOSS))
+
+        season_batches = schedule_batches(np.array(season_home, dtype=np.int64),
+                                          np.array(season_away, dtype=np.int64), len(team_index))
+        batch.extend((season_batches + batch_offset).tolist())
+        batch_offset += int(season_batches.max()) + 1 if len(season_batches) else 0
+        home.extend(season_home)
+        away.extend(season_away)
+
+    batch = np.array(batch, dtype=np.int64)
+    order = np.argsort(batch, kind='stable')
+    bounds = np.flatnonzero(np.diff(batch[order])) + 1
+
+    return {
+        'home': np.array(home, dtype=np.int64),
+        'away': np.array(away, dtype=np.int64),
+        'outcome': np.array(outcome, dtype=np.int64),
+        'avg_defense': np.array(avg_defense, dtype=np.float64),
+        'promoted': np.array(promoted, dtype=bool),
+        'actual': np.array(actual, dtype=np.float64),
+        'won': np.array(won, dtype=bool),
+        'venue_col': np.array(venue_col, dtype=np.int64),
+        'gd_col': np.array(gd_col, dtype=np.int64),
+        'form_col': np.array(form_col, dtype=np.int64),
+        'defense_col': np.array(defense_col, dtype=np.int64),
+        'order': order,
+        'bounds': bounds
+    }
+
+
+# ---------------------------------------------------------------------------
+# Backtest
+# ---------------------------------------------------------------------------
+
+def stack_parameters(params_list: Sequence[EloParameters]) -> Dict[str, np.ndarray]:
+    """Per-configuration lookup tables, one row per parameter set"""
+    column = lambda values: np.array(values, dtype=np.float64)[:, None]
+
+    # Pad K-cap bands so every row has the same number of thresholds
+    n_bands = max(len(p.k_cap_thresholds) for p in params_list)
+    thresholds = np.full((len(params_list), n_bands), np.inf)
+    cap_values = np.empty((len(params_list), n_bands + 1))
+    for row, p in enumerate(params_list):
+        thresholds[row, :len(p.k_cap_thresholds)] = p.k_cap_thresholds
+        cap_values[row, :len(p.k_cap_values)] = p.k_cap_values
+        cap_values[row, len(p.k_cap_values):] = p.k_cap_values[-1]
+
+    # Form tables flattened to [wins * (window + 1) + losses]
+    form_tables = [[m for row in build_form_table(p.form_multipliers, FORM_WINDOW) for m in row]
+                   for p in params_list]
+
+    tables = {
+        'initial_elo': column([p.initial_elo for p in params_list]),
+        'promoted_elo': column([p.promoted_team_elo for p in params_list]),
+        'base_k': column([p.base_k_factor for p in params_list]),
+        'home_advantage': column([p.home_advantage for p in params_list]),
+        'venue': np.array([[getattr(p, c) for c in VENUE_COLUMNS] for p in params_list]),
+        'gd': np.array([p.gd_win + p.gd_loss for p in params_list]),
+        'form': np.array(form_tables),
+        'defense': np.array([p.win_defense + (p.shutout_loss_defense, 1.0) for p in params_list]),
+        'k_cap_thresholds': thresholds,
+        'k_cap_values': cap_values
+    }
+    for key in DRAW_KEYS:
+        tables['draw_' + key] = column([p.draw_model[key] for p in params_list])
+    return tables
+
+
+def replay_backtest(fixtures: Mapping[str, np.ndarray],
+                    tables: Mapping[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Replay every fixture for all configurations at once.
+    Returns (final ELOs, home pre-match ELOs, away pre-match ELOs), one row per configuration.
+    """
+    n_configs = tables['base_k'].shape[0]
+    n_matches = len(fixtures['home'])
+
+    elos = np.where(fixtures['promoted'], tables['promoted_elo'], tables['initial_elo'])
+    home_pre = np.empty((n_configs, n_matches))
+    away_pre = np.empty((n_configs, n_matches))
+
+    base_k = tables['base_k']
+    home_advantage = tables['home_advantage']
+    thresholds = tables['k_cap_thresholds']
+    cap_values = tables['k_cap_values']
+
+    for rows in np.split(fixtures['order'], fixtures['bounds']):
+        h = fixtures['home'][rows]
+        a = fixtures['away'][rows]
+        h_elo = elos[:, h]
+        a_elo = elos[:, a]
+
+        # Both sides of every match side by side: home columns first, then away
+        team = np.concatenate((h, a))
+        team_elo = np.concatenate((h_elo, a_elo), axis=1)
+        opp_elo = np.concatenate((a_elo, h_elo), axis=1)
+        won = fixtures['won'][:, rows].ravel()
+
+        # float_power matches Python's float ** bit for bit, np.power does not
+        expected_home = 1 / (1 + np.float_power(10.0, (a_elo - h_elo - home_advantage) / 400))
+        expected = np.concatenate((expected_home, 1 - expected_home), axis=1)
+
+        elo_diff = np.abs(team_elo - opp_elo)
+        opponent = np.where(
+            won,
+            np.where(team_elo < opp_elo,
+                     np.minimum(1.0 + (elo_diff / 400), 2.0),
+                     np.maximum(1.0 - (elo_diff / 800), 0.6)),
+            1.0
+        )
+
+        # Same multiplication order as ELOCalculator.calculate_elo_change
+        k_adjusted = base_k * opponent
+        k_adjusted = k_adjusted * tables['venue'][:, fixtures['venue_col'][:, rows].ravel()]
+        k_adjusted = k_adjusted * tables['gd'][:, fixtures['gd_col'][:, rows].ravel()]
+        k_adjusted = k_adjusted * tables['form'][:, fixtures['form_col'][:, rows].ravel()]
+        k_adjusted = k_adjusted * tables['defense'][:, fixtures['defense_col'][:, rows].ravel()]
+
+        k_cap = np.broadcast_to(cap_values[:, -1:], team_elo.shape)
+        for band in range(thresholds.shape[1] - 1, -1, -1):
+            k_cap = np.where(team_elo < thresholds[:, band:band + 1], cap_values[:, band:band + 1], k_cap)
+
+        elos[:, team] += np.minimum(k_adjusted, k_cap) * (fixtures['actual'][:, rows].ravel() - expected)
+
+        home_pre[:, rows] = h_elo
+        away_pre[:, rows] = a_elo
+
+    return elos, home_pre, away_pre
+
+
+def score_predictions(fixtures: Mapping[str, np.ndarray], tables: Mapping[str, np.ndarray],
+                      home_pre: np.ndarray, away_pre: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean log-loss and Brier score of the pre-match predictions, per configuration"""
+    draw_model = {key: tables['draw_' + key] for key in DRAW_KEYS}
+    home_win, draw, away_win = match_probabilities(home_pre, away_pre, tables['home_advantage'],
+                                                   fixtures['avg_defense'], draw_model)
+    probs = np.stack((home_win, draw, away_win))
+    observed = np.eye(3)[fixtures['outcome']].T[:, None, :]
+
+    p_outcome = np.take_along_axis(probs, fixtures['outcome'][None, None, :], axis=0)[0]
+    log_loss = -np.log(np.clip(p_outcome, EPSILON, 1.0)).mean(axis=1)
+    brier = ((probs - observed) ** 2).sum(axis=0).mean(axis=1)
+    return log_loss, brier
+
+
+def evaluate(fixtures: Mapping[str, np.ndarray],
+             params_list: Sequence[EloParameters]) -> Tuple[np.ndarray, np.ndarray]:
+    """(log-loss, Brier) for each parameter set"""
+    tables = stack_parameters(params_list)
+    _, home_pre, away_pre = replay_backtest(fixtures, tables)
+    return score_predictions(fixtures, tables, home_pre, away_pre)
+
+
+# ---------------------------------------------------------------------------
+# Search space
+# ---------------------------------------------------------------------------
+
+def apply_overrides(raw: Mapping, overrides: Mapping[str, object]) -> Dict:
+    """
+    Copy of a parameters.json-style dict with dotted-path overrides applied.
+    Only the dicts along each override path are copied; the rest is shared with raw.
+    """
+    result = dict(raw)
+    for path, value in overrides.items():
+        *parents, leaf = path.split('.')
+        node = result
+        for key in parents:
+            node[key] = dict(node.get(key) or {})
+            node = node[key]
+        node[leaf] = value
+    return result
+
+
+def grid_configs(space: Mapping[str, object]) -> List[Dict[str, object]]:
+    """Every combination of the space's values ({"min", "max"} ranges become `num` grid points)"""
+    axes = []
+    for path, spec in space.items():
+        if isinstance(spec, Mapping):
+            values = np.linspace(spec['min'], spec['max'], int(spec.get('num', GRID_POINTS))).tolist()
+        else:
+            values = list(spec)
+        axes.append([(path, v) for v in values])
+    return [dict(combo) for combo in itertools.product(*axes)]
+
+
+def random_configs(space: Mapping[str, object], n: int, seed: Optional[int] = None) -> List[Dict[str, object]]:
+    """n random configurations: uniform over ranges, uniform choice over value lists"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for path, spec in space.items():
+        if isinstance(spec, Mapping):
+            columns[path] = rng.uniform(spec['min'], spec['max'], n).tolist()
+        else:
+            values = list(spec)
+            columns[path] = [values[i] for i in rng.integers(0, len(values), n)]
+    return [{path: values[i] for path, values in columns.items()} for i in range(n)]
+
+
+def unique_configs(configs: Iterable[Dict[str, object]], base_raw: Mapping) -> List[Dict[str, object]]:
+    """
+    The configurations without repeats, first occurrence kept. Two override
+    sets are the same configuration when the parameters they produce have the
+    same fingerprint (random draws from value lists repeat; an override equal
+    to the base value is the same as leaving it out).
+    """
+    seen = set()
+    unique = []
+    for overrides in configs:
+        fingerprint = parameters_fingerprint(apply_overrides(base_raw, overrides))
+        if fingerprint not in seen:
+            seen.add(fingerprint)
+            unique.append(overrides)
+    return unique
+
+
+# ---------------------------------------------------------------------------
+# Process pool
+# ---------------------------------------------------------------------------
+
+_worker_fixtures: Optional[Dict[str, np.ndarray]] = None
+_worker_base: Optional[Dict] = None
+_worker_blocks: List[shared_memory.SharedMemory] = []
+
+
+def share_arrays(arrays: Mapping[str, np.ndarray]) -> Tuple[List[shared_memory.SharedMemory], Dict]:
+    """Copy arrays into shared memory blocks; returns the blocks and specs for attach_arrays"""
+    blocks, specs = [], {}
+    for key, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        specs[key] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def attach_arrays(specs: Mapping) -> Tuple[List[shared_memory.SharedMemory], Dict[str, np.ndarray]]:
+    """Read-only views of arrays shared with share_arrays"""
+    blocks, arrays = [], {}
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        view = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        view.flags.writeable = False
+        blocks.append(block)
+        arrays[key] = view
+    return blocks, arrays
+
+
+def _init_worker(specs: Mapping, base_raw: Dict):
+    global _worker_fixtures, _worker_base, _worker_blocks
+    _worker_blocks, _worker_fixtures = attach_arrays(specs)
+    _worker_base = base_raw
+
+
+def _init_worker_local(fixtures: Dict[str, np.ndarray], base_raw: Dict):
+    global _worker_fixtures, _worker_base
+    _worker_fixtures = fixtures
+    _worker_base = base_raw
+
+
+def _evaluate_chunk(chunk: List[Dict[str, object]]) -> List[Tuple[float, float]]:
+    params_list = [compile_parameters(apply_overrides(_worker_base, overrides)) for overrides in chunk]
+    log_loss, brier = evaluate(_worker_fixtures, params_list)
+    return list(zip(log_loss.tolist(), brier.tolist()))
+
+
+def sweep_base(raw: Mapping) -> Dict:
+    """
+    The base parameters without the per-team baseline tables. Defensive scores
+    are baked into the fixtures by compile_fixtures, so dropping them keeps
+    compiling each configuration cheap.
+    """
+    baseline = {key: value for key, value in (raw.get('baseline_stats') or {}).items()
+                if key not in ('team_home_advantages', 'team_defensive_quality')}
+    return {**raw, 'baseline_stats': baseline}
+
+
+def run_sweep(configs: Sequence[Dict[str, object]], base_raw: Dict, fixtures: Dict[str, np.ndarray],
+              workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict]:
+    """Score every configuration and return the leaderboard, best log-loss first"""
+    base_raw = sweep_base(base_raw)
+    chunks = [list(configs[i:i + chunk_size]) for i in range(0, len(configs), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        _init_worker_local(fixtures, base_raw)
+        results = [_evaluate_chunk(chunk) for chunk in chunks]
+    else:
+        blocks, specs = share_arrays(fixtures)
+        try:
+            with Pool(min(workers, len(chunks)) or 1, initializer=_init_worker,
+                      initargs=(specs, base_raw)) as pool:
+                results = pool.map(_evaluate_chunk, chunks)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    entries = [
+        {'log_loss': ll, 'brier': bs, 'overrides': overrides}
+        for chunk, scores in zip(chunks, results)
+        for overrides, (ll, bs) in zip(chunk, scores)
+    ]
+    entries.sort(key=lambda e: (e['log_loss'], e['brier']))
+    return [{'rank': rank, **entry} for rank, entry in enumerate(entries, 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parameter sweep over the 2024-25 and 2025-26 seasons')
+    parser.add_argument('space', nargs='?', help='search space JSON file (default: built-in grid)')
+    parser.add_argument('--random', type=int, metavar='N', help='sample N random configurations instead of the grid')
+    parser.add_argument('--seed', type=int, default=None, help='random seed')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='configurations replayed together per task')
+    parser.add_argument('--params', default=None, help='base parameters file (default: data/parameters.json)')
+    parser.add_argument('--output', default=LEADERBOARD_FILE, help='leaderboard JSON file')
+    parser.add_argument('--top', type=int, default=10, help='rows to print')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("PARAMETER SWEEP")
+    print("="*80)
+
+    base = load_parameters(args.params) if args.params else load_parameters()
+    base_raw = base.to_dict()
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space, 'r', encoding='utf-8') as f:
+            space = json.load(f)
+
+    configs = random_configs(space, args.random, args.seed) if args.random else grid_configs(space)
+    drawn = len(configs)
+    configs = unique_configs(configs, base_raw)
+
+    fixtures = compile_fixtures(load_backtest_seasons(), base)
+    n_batches = len(fixtures['bounds']) + 1
+    print(f"\nFixtures: {len(fixtures['home'])} matches in {n_batches} batches")
+    print(f"Configurations: {len(configs)} ({'random' if args.random else 'grid'}) over {len(space)} parameters")
+    if len(configs) < drawn:
+        print(f"  ({drawn - len(configs)} duplicate configurations skipped)")
+
+    baseline_log_loss, baseline_brier = evaluate(fixtures, [base])
+
+    start = time.perf_counter()
+    leaderboard = run_sweep(configs, base_raw, fixtures, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    print(f"Evaluated in {elapsed:.1f}s ({len(configs) / elapsed * 60:,.0f} configurations/minute)")
+    print(f"\nCurrent parameters: log-loss {baseline_log_loss[0]:.5f}, Brier {baseline_brier[0]:.5f}")
+    print(f"\nTop {min(args.top, len(leaderboard))} configurations:")
+    for entry in leaderboard[:args.top]:
+        settings = ', '.join(f"{path}={value:.4g}" if isinstance(value, float) else f"{path}={value}"
+                             for path, value in entry['overrides'].items())
+        print(f"  {entry['rank']:4d}. log-loss {entry['log_loss']:.5f}  Brier {entry['brier']:.5f}  {settings}")
+
+    output = {
+        'generated_at': datetime.now().isoformat(),
+        'matches': len(fixtures['home']),
+        'space': space,
+        'baseline': {
+            'log_loss': float(baseline_log_loss[0]),
+            'brier': float(baseline_brier[0]),
+            'fingerprint': base.fingerprint
+        },
+        'elapsed_seconds': elapsed,
+        'leaderboard': leaderboard
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+
+    print(f"\nLeaderboard saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
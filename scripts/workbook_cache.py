@@ -0,0 +1,129 @@
+"""
+Content-hashed columnar cache of the source workbook
+Parses the match sheet once (through excel_reader) into typed NumPy columns
+saved as an NPZ under data/.cache, keyed by the SHA-256 of the workbook bytes.
+Later runs load the columns in milliseconds and only re-parse the workbook
+when its content changes.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from excel_reader import ExcelMatchReader, WORKBOOK_FILE, MATCH_SHEET
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+CACHE_DIR = os.path.join(DATA_DIR, '.cache')
+
+# Bump when the column encoding changes so stale caches are ignored
+CACHE_VERSION = 1
+
+# Column kinds; every column also stores a null mask
+INT, FLOAT, BOOL, DATE, TEXT = 'int', 'float', 'bool', 'date', 'text'
+
+
+def workbook_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(path: str, sheet: Optional[str] = MATCH_SHEET, cache_dir: str = CACHE_DIR) -> str:
+    key = hashlib.sha256(f"{workbook_hash(path)}:{sheet}".encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f'workbook-v{CACHE_VERSION}-{key[:16]}.npz')
+
+
+def column_kind(values: List) -> str:
+    present = [v for v in values if v is not None]
+    if not present:
+        return TEXT
+    if all(isinstance(v, bool) for v in present):
+        return BOOL
+    if all(isinstance(v, datetime) for v in present):
+        return DATE
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return INT
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return FLOAT
+    return TEXT
+
+
+def encode_column(values: List, kind: str) -> np.ndarray:
+    if kind == INT:
+        return np.array([0 if v is None else v for v in values], dtype=np.int64)
+    if kind == FLOAT:
+        return np.array([0.0 if v is None else v for v in values], dtype=np.float64)
+    if kind == BOOL:
+        return np.array([bool(v) for v in values], dtype=np.bool_)
+    if kind == DATE:
+        return np.array([v if v is not None else 'NaT' for v in values], dtype='datetime64[us]')
+    return np.array(['' if v is None else str(v) for v in values], dtype=np.str_)
+
+
+def columns_from_records(records: List[Dict], headers: List[str]) -> Dict[str, np.ndarray]:
+    """Typed column arrays (plus '<column>__null' masks and the header/kind lists)"""
+    arrays = {}
+    kinds = []
+    for column in headers:
+        values = [r.get(column) for r in records]
+        kind = column_kind(values)
+        kinds.append(kind)
+        arrays[column] = encode_column(values, kind)
+        arrays[f'{column}__null'] = np.array([v is None for v in values], dtype=np.bool_)
+    arrays['__columns__'] = np.array(headers, dtype=np.str_)
+    arrays['__kinds__'] = np.array(kinds, dtype=np.str_)
+    return arrays
+
+
+def load_columns(path: str = WORKBOOK_FILE, sheet: Optional[str] = MATCH_SHEET,
+                 cache_dir: Optional[str] = CACHE_DIR) -> Dict[str, np.ndarray]:
+    """
+    The match sheet as typed columns, from the cache when the workbook is
+    unchanged, otherwise parsed (and cached) again
+    """
+    cache_file = cache_path(path, sheet, cache_dir) if cache_dir else None
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with np.load(cache_file) as npz:
+                return {key: npz[key] for key in npz.files}
+        except (OSError, ValueError, KeyError):
+            pass
+
+    reader = ExcelMatchReader(path, sheet, required=())
+    records = list(reader)
+    arrays = columns_from_records(records, [h for h in reader.headers if h])
+
+    if cache_file:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = cache_file + '.tmp.npz'
+            np.savez(tmp_file, **arrays)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+    return arrays
+
+
+def records_from_columns(arrays: Dict[str, np.ndarray]) -> List[Dict]:
+    """Row dicts (same values and types as ExcelMatchReader yields) from typed columns"""
+    headers = arrays['__columns__'].tolist()
+    columns = []
+    for column in headers:
+        values = arrays[column].tolist()
+        nulls = arrays[f'{column}__null']
+        if nulls.any():
+            for i in np.flatnonzero(nulls).tolist():
+                values[i] = None
+        columns.append(values)
+    return [dict(zip(headers, row)) for row in zip(*columns)]
+
+
+def load_matches(path: str = WORKBOOK_FILE, sheet: Optional[str] = MATCH_SHEET,
+                 cache_dir: Optional[str] = CACHE_DIR) -> List[Dict]:
+    """All match rows of the workbook as dicts, through the columnar cache"""
+    return records_from_columns(load_columns(path, sheet, cache_dir))
@@ -1,24 +1,36 @@
 -- Football ELO Database Schema for Supabase
+-- Every statement is guarded (IF NOT EXISTS, DROP ... IF EXISTS, CREATE OR
+-- REPLACE), so the whole file can be run again on an existing database to
+-- upgrade it: new columns and tables are added, elo_history and standings are
+-- backfilled from the completed matches and the functions are replaced.
 
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
 -- Table: teams
 -- Stores all teams and their current ELO ratings
-CREATE TABLE teams (
+CREATE TABLE IF NOT EXISTS teams (
   id SERIAL PRIMARY KEY,
   name TEXT UNIQUE NOT NULL,
   league_id INTEGER NOT NULL,
   league_name TEXT NOT NULL,
-  current_elo DECIMAL(10, 2) NOT NULL DEFAULT 1500.0,
+  current_elo DOUBLE PRECISION NOT NULL DEFAULT 1500.0,
   is_promoted BOOLEAN DEFAULT FALSE,
+
+  -- Rolling current-season state, updated with every score entry
+  recent_form TEXT NOT NULL DEFAULT '',     -- last 5 results, oldest first (e.g. 'WWDLW')
+  matches_played INTEGER NOT NULL DEFAULT 0,
+  goals_for INTEGER NOT NULL DEFAULT 0,
+  goals_against INTEGER NOT NULL DEFAULT 0,
+  clean_sheets INTEGER NOT NULL DEFAULT 0,
+
   created_at TIMESTAMPTZ DEFAULT NOW(),
   updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 -- Table: matches
 -- Stores all matches (both completed and pending)
-CREATE TABLE matches (
+CREATE TABLE IF NOT EXISTS matches (
   id SERIAL PRIMARY KEY,
   event_id INTEGER UNIQUE NOT NULL,
   season_type INTEGER NOT NULL,
@@ -43,12 +55,12 @@ CREATE TABLE matches (
   away_team_winner BOOLEAN,
 
   -- ELO data (NULL if pending)
-  home_elo_pre DECIMAL(10, 2),
-  away_elo_pre DECIMAL(10, 2),
-  home_elo_change DECIMAL(10, 2),
-  away_elo_change DECIMAL(10, 2),
-  home_elo_post DECIMAL(10, 2),
-  away_elo_post DECIMAL(10, 2),
+  home_elo_pre DOUBLE PRECISION,
+  away_elo_pre DOUBLE PRECISION,
+  home_elo_change DOUBLE PRECISION,
+  away_elo_change DOUBLE PRECISION,
+  home_elo_post DOUBLE PRECISION,
+  away_elo_post DOUBLE PRECISION,
 
   -- Status
   is_completed BOOLEAN DEFAULT FALSE,
@@ -60,7 +72,7 @@ CREATE TABLE matches (
 
 -- Table: predictions
 -- Stores predictions for pending matches
-CREATE TABLE predictions (
+CREATE TABLE IF NOT EXISTS predictions (
   id SERIAL PRIMARY KEY,
   match_id INTEGER REFERENCES matches(id) ON DELETE CASCADE,
   event_id INTEGER UNIQUE NOT NULL,
@@ -88,7 +100,7 @@ CREATE TABLE predictions (
 
 -- Table: parameters
 -- Stores ELO calculation parameters
-CREATE TABLE parameters (
+CREATE TABLE IF NOT EXISTS parameters (
   id SERIAL PRIMARY KEY,
   param_key TEXT UNIQUE NOT NULL,
   param_value JSONB NOT NULL,
@@ -98,14 +110,14 @@ CREATE TABLE parameters (
 );
 
 -- Indexes for performance
-CREATE INDEX idx_matches_event_id ON matches(event_id);
-CREATE INDEX idx_matches_completed ON matches(is_completed);
-CREATE INDEX idx_matches_date ON matches(match_date);
-CREATE INDEX idx_matches_league ON matches(league_id);
-CREATE INDEX idx_matches_season ON matches(season_year);
-CREATE INDEX idx_teams_name ON teams(name);
-CREATE INDEX idx_teams_elo ON teams(current_elo DESC);
-CREATE INDEX idx_predictions_match_id ON predictions(match_id);
+CREATE INDEX IF NOT EXISTS idx_matches_event_id ON matches(event_id);
+CREATE INDEX IF NOT EXISTS idx_matches_completed ON matches(is_completed);
+CREATE INDEX IF NOT EXISTS idx_matches_date ON matches(match_date);
+CREATE INDEX IF NOT EXISTS idx_matches_league ON matches(league_id);
+CREATE INDEX IF NOT EXISTS idx_matches_season ON matches(season_year);
+CREATE INDEX IF NOT EXISTS idx_teams_name ON teams(name);
+CREATE INDEX IF NOT EXISTS idx_teams_elo ON teams(current_elo DESC);
+CREATE INDEX IF NOT EXISTS idx_predictions_match_id ON predictions(match_id);
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE teams ENABLE ROW LEVEL SECURITY;
@@ -114,27 +126,35 @@ ALTER TABLE predictions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE parameters ENABLE ROW LEVEL SECURITY;
 
 -- Policies: Anyone can read, only authenticated users can write
+DROP POLICY IF EXISTS "Allow public read access to teams" ON teams;
 CREATE POLICY "Allow public read access to teams" ON teams
   FOR SELECT USING (true);
 
+DROP POLICY IF EXISTS "Allow authenticated write access to teams" ON teams;
 CREATE POLICY "Allow authenticated write access to teams" ON teams
   FOR ALL USING (auth.role() = 'authenticated');
 
+DROP POLICY IF EXISTS "Allow public read access to matches" ON matches;
 CREATE POLICY "Allow public read access to matches" ON matches
   FOR SELECT USING (true);
 
+DROP POLICY IF EXISTS "Allow authenticated write access to matches" ON matches;
 CREATE POLICY "Allow authenticated write access to matches" ON matches
   FOR ALL USING (auth.role() = 'authenticated');
 
+DROP POLICY IF EXISTS "Allow public read access to predictions" ON predictions;
 CREATE POLICY "Allow public read access to predictions" ON predictions
   FOR SELECT USING (true);
 
+DROP POLICY IF EXISTS "Allow authenticated write access to predictions" ON predictions;
 CREATE POLICY "Allow authenticated write access to predictions" ON predictions
   FOR ALL USING (auth.role() = 'authenticated');
 
+DROP POLICY IF EXISTS "Allow public read access to parameters" ON parameters;
 CREATE POLICY "Allow public read access to parameters" ON parameters
   FOR SELECT USING (true);
 
+DROP POLICY IF EXISTS "Allow authenticated write access to parameters" ON parameters;
 CREATE POLICY "Allow authenticated write access to parameters" ON parameters
   FOR ALL USING (auth.role() = 'authenticated');
 
@@ -148,14 +168,565 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Triggers for updated_at
+DROP TRIGGER IF EXISTS update_teams_updated_at ON teams;
 CREATE TRIGGER update_teams_updated_at BEFORE UPDATE ON teams
   FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+DROP TRIGGER IF EXISTS update_matches_updated_at ON matches;
 CREATE TRIGGER update_matches_updated_at BEFORE UPDATE ON matches
   FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+DROP TRIGGER IF EXISTS update_predictions_updated_at ON predictions;
 CREATE TRIGGER update_predictions_updated_at BEFORE UPDATE ON predictions
   FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+DROP TRIGGER IF EXISTS update_parameters_updated_at ON parameters;
 CREATE TRIGGER update_parameters_updated_at BEFORE UPDATE ON parameters
   FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Databases created before the rolling team state columns
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS recent_form TEXT NOT NULL DEFAULT '';
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS matches_played INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS goals_for INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS goals_against INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS clean_sheets INTEGER NOT NULL DEFAULT 0;
+
+-- Databases created with DECIMAL(10, 2) ratings: apply_score() works in double
+-- precision like elo_kernel, so the columns it reads and writes hold unrounded
+-- ratings (a no-op once converted; rounded values already stored stay as they
+-- are until the next migration or rebuild rewrites them)
+ALTER TABLE teams ALTER COLUMN current_elo TYPE DOUBLE PRECISION;
+ALTER TABLE matches
+  ALTER COLUMN home_elo_pre TYPE DOUBLE PRECISION,
+  ALTER COLUMN away_elo_pre TYPE DOUBLE PRECISION,
+  ALTER COLUMN home_elo_change TYPE DOUBLE PRECISION,
+  ALTER COLUMN away_elo_change TYPE DOUBLE PRECISION,
+  ALTER COLUMN home_elo_post TYPE DOUBLE PRECISION,
+  ALTER COLUMN away_elo_post TYPE DOUBLE PRECISION;
+
+-- Table: elo_history
+-- One row per team per completed match (team_id is the source team id, as in
+-- matches.home_team_id/away_team_id). A team's rating timeline is one range
+-- scan of the (team_id, match_date) index instead of a scan of matches.
+CREATE TABLE IF NOT EXISTS elo_history (
+  team_id INTEGER NOT NULL,
+  event_id INTEGER NOT NULL REFERENCES matches(event_id) ON DELETE CASCADE,
+  match_date TIMESTAMPTZ NOT NULL,
+  elo_pre DOUBLE PRECISION NOT NULL,
+  elo_post DOUBLE PRECISION NOT NULL,
+  delta DOUBLE PRECISION NOT NULL,
+  PRIMARY KEY (team_id, event_id)
+);
+
+ALTER TABLE elo_history
+  ALTER COLUMN elo_pre TYPE DOUBLE PRECISION,
+  ALTER COLUMN elo_post TYPE DOUBLE PRECISION,
+  ALTER COLUMN delta TYPE DOUBLE PRECISION;
+
+CREATE INDEX IF NOT EXISTS idx_elo_history_team_date ON elo_history(team_id, match_date);
+
+ALTER TABLE elo_history ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access to elo_history" ON elo_history;
+CREATE POLICY "Allow public read access to elo_history" ON elo_history
+  FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "Allow authenticated write access to elo_history" ON elo_history;
+CREATE POLICY "Allow authenticated write access to elo_history" ON elo_history
+  FOR ALL USING (auth.role() = 'authenticated');
+
+-- Backfill from the completed matches (rows already present are kept)
+INSERT INTO elo_history (team_id, event_id, match_date, elo_pre, elo_post, delta)
+SELECT s.team_id, m.event_id, m.match_date, s.elo_pre, s.elo_post, s.elo_post - s.elo_pre
+FROM matches m,
+  LATERAL (VALUES (m.home_team_id, m.home_elo_pre, m.home_elo_post),
+                  (m.away_team_id, m.away_elo_pre, m.away_elo_post)) AS s(team_id, elo_pre, elo_post)
+WHERE m.is_completed AND s.elo_pre IS NOT NULL AND s.elo_post IS NOT NULL
+ON CONFLICT (team_id, event_id) DO NOTHING;
+
+-- Table: standings
+-- The current season's league tables, one row per team (scripts/standings.py):
+-- totals, home/away splits and the current streak, updated in O(1) by
+-- apply_score() for every result, so a table is an index scan instead of an
+-- aggregation over every completed match.
+CREATE TABLE IF NOT EXISTS standings (
+  league_name TEXT NOT NULL,
+  team_name TEXT NOT NULL,
+  played INTEGER NOT NULL DEFAULT 0,
+  won INTEGER NOT NULL DEFAULT 0,
+  drawn INTEGER NOT NULL DEFAULT 0,
+  lost INTEGER NOT NULL DEFAULT 0,
+  goals_for INTEGER NOT NULL DEFAULT 0,
+  goals_against INTEGER NOT NULL DEFAULT 0,
+  goal_difference INTEGER NOT NULL DEFAULT 0,
+  points INTEGER NOT NULL DEFAULT 0,
+  clean_sheets INTEGER NOT NULL DEFAULT 0,
+  home_played INTEGER NOT NULL DEFAULT 0,
+  home_won INTEGER NOT NULL DEFAULT 0,
+  home_drawn INTEGER NOT NULL DEFAULT 0,
+  home_lost INTEGER NOT NULL DEFAULT 0,
+  home_goals_for INTEGER NOT NULL DEFAULT 0,
+  home_goals_against INTEGER NOT NULL DEFAULT 0,
+  home_clean_sheets INTEGER NOT NULL DEFAULT 0,
+  away_played INTEGER NOT NULL DEFAULT 0,
+  away_won INTEGER NOT NULL DEFAULT 0,
+  away_drawn INTEGER NOT NULL DEFAULT 0,
+  away_lost INTEGER NOT NULL DEFAULT 0,
+  away_goals_for INTEGER NOT NULL DEFAULT 0,
+  away_goals_against INTEGER NOT NULL DEFAULT 0,
+  away_clean_sheets INTEGER NOT NULL DEFAULT 0,
+  streak_result CHAR(1) CHECK (streak_result IN ('W', 'D', 'L')),
+  streak_length INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (league_name, team_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_standings_table
+  ON standings(league_name, points DESC, goal_difference DESC, goals_for DESC);
+
+ALTER TABLE standings ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access to standings" ON standings;
+CREATE POLICY "Allow public read access to standings" ON standings
+  FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "Allow authenticated write access to standings" ON standings;
+CREATE POLICY "Allow authenticated write access to standings" ON standings
+  FOR ALL USING (auth.role() = 'authenticated');
+
+-- One result in a team's standings row (created on its first match); the
+-- caller holds the team's row lock
+CREATE OR REPLACE FUNCTION standings_add(p_league_name TEXT, p_team_name TEXT, p_venue TEXT,
+                                         p_scored INTEGER, p_conceded INTEGER)
+RETURNS VOID AS $$
+DECLARE
+  is_home INTEGER := (p_venue = 'home')::int;
+  won INTEGER := (p_scored > p_conceded)::int;
+  drawn INTEGER := (p_scored = p_conceded)::int;
+  lost INTEGER := (p_scored < p_conceded)::int;
+  clean_sheet INTEGER := (p_conceded = 0)::int;
+BEGIN
+  INSERT INTO standings AS s (
+    league_name, team_name, played, won, drawn, lost, goals_for, goals_against, goal_difference, points,
+    clean_sheets, home_played, home_won, home_drawn, home_lost, home_goals_for, home_goals_against,
+    home_clean_sheets, away_played, away_won, away_drawn, away_lost, away_goals_for, away_goals_against,
+    away_clean_sheets, streak_result, streak_length)
+  VALUES (
+    p_league_name, p_team_name, 1, won, drawn, lost, p_scored, p_conceded, p_scored - p_conceded,
+    3 * won + drawn, clean_sheet,
+    is_home, is_home * won, is_home * drawn, is_home * lost, is_home * p_scored, is_home * p_conceded,
+    is_home * clean_sheet,
+    1 - is_home, (1 - is_home) * won, (1 - is_home) * drawn, (1 - is_home) * lost,
+    (1 - is_home) * p_scored, (1 - is_home) * p_conceded, (1 - is_home) * clean_sheet,
+    CASE WHEN won = 1 THEN 'W' WHEN lost = 1 THEN 'L' ELSE 'D' END, 1)
+  ON CONFLICT (league_name, team_name) DO UPDATE SET
+    played = s.played + EXCLUDED.played,
+    won = s.won + EXCLUDED.won,
+    drawn = s.drawn + EXCLUDED.drawn,
+    lost = s.lost + EXCLUDED.lost,
+    goals_for = s.goals_for + EXCLUDED.goals_for,
+    goals_against = s.goals_against + EXCLUDED.goals_against,
+    goal_difference = s.goal_difference + EXCLUDED.goal_difference,
+    points = s.points + EXCLUDED.points,
+    clean_sheets = s.clean_sheets + EXCLUDED.clean_sheets,
+    home_played = s.home_played + EXCLUDED.home_played,
+    home_won = s.home_won + EXCLUDED.home_won,
+    home_drawn = s.home_drawn + EXCLUDED.home_drawn,
+    home_lost = s.home_lost + EXCLUDED.home_lost,
+    home_goals_for = s.home_goals_for + EXCLUDED.home_goals_for,
+    home_goals_against = s.home_goals_against + EXCLUDED.home_goals_against,
+    home_clean_sheets = s.home_clean_sheets + EXCLUDED.home_clean_sheets,
+    away_played = s.away_played + EXCLUDED.away_played,
+    away_won = s.away_won + EXCLUDED.away_won,
+    away_drawn = s.away_drawn + EXCLUDED.away_drawn,
+    away_lost = s.away_lost + EXCLUDED.away_lost,
+    away_goals_for = s.away_goals_for + EXCLUDED.away_goals_for,
+    away_goals_against = s.away_goals_against + EXCLUDED.away_goals_against,
+    away_clean_sheets = s.away_clean_sheets + EXCLUDED.away_clean_sheets,
+    streak_length = CASE WHEN s.streak_result = EXCLUDED.streak_result THEN s.streak_length + 1 ELSE 1 END,
+    streak_result = EXCLUDED.streak_result;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The standings of the latest season rebuilt from its completed matches;
+-- returns the number of rows (schema upgrades, repair_matches())
+CREATE OR REPLACE FUNCTION rebuild_standings()
+RETURNS INTEGER AS $$
+DECLARE
+  rebuilt INTEGER;
+BEGIN
+  DELETE FROM standings WHERE true;
+
+  WITH results AS (
+    SELECT m.league_name, s.team_name, s.venue, s.scored, s.conceded, m.match_date, m.event_id,
+           CASE WHEN s.scored > s.conceded THEN 'W' WHEN s.scored < s.conceded THEN 'L' ELSE 'D' END AS result
+    FROM matches m,
+      LATERAL (VALUES (m.home_team_name, 'home', m.home_team_score, m.away_team_score),
+                      (m.away_team_name, 'away', m.away_team_score, m.home_team_score))
+        AS s(team_name, venue, scored, conceded)
+    WHERE m.is_completed AND m.season_year = (SELECT max(season_year) FROM matches)
+  ), ordered AS (
+    -- recency 1 is a team's latest result; its streak runs until the first different one
+    SELECT r.*, first_value(result) OVER w AS last_result, row_number() OVER w AS recency
+    FROM results r
+    WINDOW w AS (PARTITION BY league_name, team_name ORDER BY match_date DESC, event_id DESC)
+  )
+  INSERT INTO standings (
+    league_name, team_name, played, won, drawn, lost, goals_for, goals_against, goal_difference, points,
+    clean_sheets, home_played, home_won, home_drawn, home_lost, home_goals_for, home_goals_against,
+    home_clean_sheets, away_played, away_won, away_drawn, away_lost, away_goals_for, away_goals_against,
+    away_clean_sheets, streak_result, streak_length)
+  SELECT league_name, team_name,
+    count(*), count(*) FILTER (WHERE result = 'W'), count(*) FILTER (WHERE result = 'D'),
+    count(*) FILTER (WHERE result = 'L'), sum(scored), sum(conceded), sum(scored - conceded),
+    sum(CASE result WHEN 'W' THEN 3 WHEN 'D' THEN 1 ELSE 0 END), count(*) FILTER (WHERE conceded = 0),
+    count(*) FILTER (WHERE venue = 'home'), count(*) FILTER (WHERE venue = 'home' AND result = 'W'),
+    count(*) FILTER (WHERE venue = 'home' AND result = 'D'), count(*) FILTER (WHERE venue = 'home' AND result = 'L'),
+    COALESCE(sum(scored) FILTER (WHERE venue = 'home'), 0), COALESCE(sum(conceded) FILTER (WHERE venue = 'home'), 0),
+    count(*) FILTER (WHERE venue = 'home' AND conceded = 0),
+    count(*) FILTER (WHERE venue = 'away'), count(*) FILTER (WHERE venue = 'away' AND result = 'W'),
+    count(*) FILTER (WHERE venue = 'away' AND result = 'D'), count(*) FILTER (WHERE venue = 'away' AND result = 'L'),
+    COALESCE(sum(scored) FILTER (WHERE venue = 'away'), 0), COALESCE(sum(conceded) FILTER (WHERE venue = 'away'), 0),
+    count(*) FILTER (WHERE venue = 'away' AND conceded = 0),
+    min(last_result),
+    COALESCE(min(recency) FILTER (WHERE result <> last_result) - 1, count(*))
+  FROM ordered
+  GROUP BY league_name, team_name;
+  GET DIAGNOSTICS rebuilt = ROW_COUNT;
+  RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuilds write every row: service role only
+REVOKE EXECUTE ON FUNCTION rebuild_standings() FROM PUBLIC, anon, authenticated;
+
+-- Build the standings from the completed matches (replaces every row)
+SELECT rebuild_standings();
+
+-- Diagnostics for scripts/doctor.py: grouped counts and every consistency
+-- check in one round trip (NULL season = all seasons)
+CREATE OR REPLACE FUNCTION match_diagnostics(p_season_year INTEGER DEFAULT NULL)
+RETURNS JSONB AS $$
+  WITH scoped AS (
+    SELECT * FROM matches
+    WHERE p_season_year IS NULL OR season_year = p_season_year
+  )
+  SELECT jsonb_build_object(
+    'groups', COALESCE((
+      SELECT jsonb_agg(to_jsonb(g) ORDER BY g.season_year, g.league_name, g.is_completed)
+      FROM (
+        SELECT season_year, league_name, is_completed, COUNT(*) AS matches,
+               MIN(match_date) AS first_date, MAX(match_date) AS last_date
+        FROM scoped
+        GROUP BY season_year, league_name, is_completed
+      ) g
+    ), '[]'::jsonb),
+    'issues', (
+      SELECT jsonb_build_object(
+        'completed_without_scores', COUNT(*) FILTER (
+          WHERE is_completed AND (home_team_score IS NULL OR away_team_score IS NULL)),
+        'scored_not_completed', COUNT(*) FILTER (
+          WHERE is_completed IS NOT TRUE AND home_team_score IS NOT NULL AND away_team_score IS NOT NULL),
+        'unknown_status', COUNT(*) FILTER (WHERE is_completed IS NULL),
+        'winner_mismatch', COUNT(*) FILTER (
+          WHERE home_team_score IS NOT NULL AND away_team_score IS NOT NULL
+            AND (home_team_winner IS DISTINCT FROM (home_team_score > away_team_score)
+                 OR away_team_winner IS DISTINCT FROM (away_team_score > home_team_score))),
+        'completed_in_future', COUNT(*) FILTER (WHERE is_completed AND match_date > NOW()),
+        'pending_in_past', COUNT(*) FILTER (WHERE is_completed IS NOT TRUE AND match_date < NOW()),
+        'pending_without_prediction', COUNT(*) FILTER (
+          WHERE is_completed IS NOT TRUE
+            AND NOT EXISTS (SELECT 1 FROM predictions p WHERE p.event_id = scoped.event_id)),
+        'predictions_for_completed', COUNT(*) FILTER (
+          WHERE is_completed AND EXISTS (SELECT 1 FROM predictions p WHERE p.event_id = scoped.event_id))
+      )
+      FROM scoped
+    ),
+    'predictions', (SELECT COUNT(*) FROM predictions),
+    'orphaned_predictions', (
+      SELECT COUNT(*) FROM predictions p
+      WHERE NOT EXISTS (SELECT 1 FROM matches m WHERE m.event_id = p.event_id)),
+    'teams', (SELECT COUNT(*) FROM teams),
+    'unknown_teams', (
+      SELECT COALESCE(jsonb_agg(DISTINCT t.name), '[]'::jsonb)
+      FROM scoped, LATERAL (VALUES (home_team_name), (away_team_name)) AS t(name)
+      WHERE NOT EXISTS (SELECT 1 FROM teams WHERE teams.name = t.name))
+  );
+$$ LANGUAGE sql STABLE;
+
+-- Set-based repairs for scripts/doctor.py --fix: one statement per kind of
+-- inconsistency, returning how many rows each touched
+CREATE OR REPLACE FUNCTION repair_matches(p_season_year INTEGER DEFAULT NULL)
+RETURNS JSONB AS $$
+DECLARE
+  status_fixed INTEGER;
+  winners_fixed INTEGER;
+  predictions_removed INTEGER;
+  history_removed INTEGER;
+  standings_rebuilt INTEGER;
+BEGIN
+  -- A match is completed exactly when both scores are entered
+  UPDATE matches
+  SET is_completed = (home_team_score IS NOT NULL AND away_team_score IS NOT NULL)
+  WHERE (p_season_year IS NULL OR season_year = p_season_year)
+    AND is_completed IS DISTINCT FROM (home_team_score IS NOT NULL AND away_team_score IS NOT NULL);
+  GET DIAGNOSTICS status_fixed = ROW_COUNT;
+
+  UPDATE matches
+  SET home_team_winner = home_team_score > away_team_score,
+      away_team_winner = away_team_score > home_team_score
+  WHERE (p_season_year IS NULL OR season_year = p_season_year)
+    AND home_team_score IS NOT NULL AND away_team_score IS NOT NULL
+    AND (home_team_winner IS DISTINCT FROM (home_team_score > away_team_score)
+         OR away_team_winner IS DISTINCT FROM (away_team_score > home_team_score));
+  GET DIAGNOSTICS winners_fixed = ROW_COUNT;
+
+  -- Predictions only exist for pending matches
+  DELETE FROM predictions p
+  WHERE NOT EXISTS (
+    SELECT 1 FROM matches m
+    WHERE m.event_id = p.event_id AND m.is_completed IS NOT TRUE)
+    AND (p_season_year IS NULL OR NOT EXISTS (
+      SELECT 1 FROM matches m WHERE m.event_id = p.event_id AND m.season_year <> p_season_year));
+  GET DIAGNOSTICS predictions_removed = ROW_COUNT;
+
+  -- Rating history only exists for completed matches
+  DELETE FROM elo_history h
+  USING matches m
+  WHERE m.event_id = h.event_id AND m.is_completed IS NOT TRUE
+    AND (p_season_year IS NULL OR m.season_year = p_season_year);
+  GET DIAGNOSTICS history_removed = ROW_COUNT;
+
+  -- The standings follow whatever the matches now say
+  standings_rebuilt := rebuild_standings();
+
+  RETURN jsonb_build_object(
+    'status_fixed', status_fixed,
+    'winners_fixed', winners_fixed,
+    'predictions_removed', predictions_removed,
+    'history_removed', history_removed,
+    'standings_rebuilt', standings_rebuilt
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Repairs write to every match: service role only
+REVOKE EXECUTE ON FUNCTION repair_matches(INTEGER) FROM PUBLIC, anon, authenticated;
+
+-- K-factor cap for a rating: the cap of the first threshold above it, the
+-- last cap above all thresholds (EloParameters.k_cap)
+CREATE OR REPLACE FUNCTION elo_k_cap(p_params JSONB, p_elo DOUBLE PRECISION)
+RETURNS DOUBLE PRECISION AS $$
+  SELECT COALESCE(
+    (SELECT value::float8 FROM jsonb_each_text(p_params->'k_caps')
+     WHERE key::float8 > p_elo ORDER BY key::float8 LIMIT 1),
+    (SELECT value::float8 FROM jsonb_each_text(p_params->'k_caps')
+     ORDER BY key::float8 DESC LIMIT 1));
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Form multiplier for a recent_form string (elo_kernel.form_multiplier)
+CREATE OR REPLACE FUNCTION elo_form_multiplier(p_params JSONB, p_form TEXT)
+RETURNS DOUBLE PRECISION AS $$
+  SELECT COALESCE((p_params->'form_multipliers'->>(
+    CASE
+      WHEN wins = 5 THEN 5
+      WHEN wins >= 4 THEN 4
+      WHEN wins >= 3 THEN 3
+      WHEN losses >= 3 THEN -3
+      ELSE 0
+    END)::text)::float8, 1.0)
+  FROM (
+    SELECT length(recent) - length(replace(recent, 'W', '')) AS wins,
+           length(recent) - length(replace(recent, 'L', '')) AS losses
+    FROM (SELECT right(COALESCE(p_form, ''), 5) AS recent) r
+  ) counts;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Score entry in one round trip (/api/update-score, scripts/apply_score.py):
+-- locks the pending match and both teams, applies the rating update with the
+-- elo_kernel.match_changes formulas, advances both teams' rolling state and
+-- standings rows, records both elo_history rows and removes the match's
+-- prediction, all in the caller's transaction. Concurrent entries involving
+-- the same team wait on its row lock and see its new rating.
+CREATE OR REPLACE FUNCTION apply_score(p_event_id INTEGER, p_home_score INTEGER, p_away_score INTEGER)
+RETURNS JSONB AS $$
+DECLARE
+  m matches%ROWTYPE;
+  home teams%ROWTYPE;
+  away teams%ROWTYPE;
+  params JSONB;
+  home_advantage DOUBLE PRECISION;
+  home_elo DOUBLE PRECISION;
+  away_elo DOUBLE PRECISION;
+  winner_elo DOUBLE PRECISION;
+  loser_elo DOUBLE PRECISION;
+  expected_home DOUBLE PRECISION;
+  opponent_mult DOUBLE PRECISION;
+  win_k DOUBLE PRECISION;
+  home_k DOUBLE PRECISION;
+  away_k DOUBLE PRECISION;
+  home_actual DOUBLE PRECISION;
+  away_actual DOUBLE PRECISION;
+  home_change DOUBLE PRECISION;
+  away_change DOUBLE PRECISION;
+  abs_gd INTEGER;
+  home_result TEXT;
+  away_result TEXT;
+BEGIN
+  SELECT * INTO m FROM matches WHERE event_id = p_event_id AND is_completed IS NOT TRUE FOR UPDATE;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'Match not found' USING ERRCODE = 'P0002';
+  END IF;
+
+  -- Both teams locked in name order, so two entries can never deadlock
+  PERFORM 1 FROM teams WHERE name IN (m.home_team_name, m.away_team_name) ORDER BY name FOR UPDATE;
+  SELECT * INTO home FROM teams WHERE name = m.home_team_name;
+  SELECT * INTO away FROM teams WHERE name = m.away_team_name;
+  IF home.id IS NULL OR away.id IS NULL THEN
+    RAISE EXCEPTION 'Team ELO data not found' USING ERRCODE = 'P0002';
+  END IF;
+
+  SELECT jsonb_object_agg(param_key, param_value) INTO params FROM parameters;
+  IF params IS NULL THEN
+    RAISE EXCEPTION 'Parameters not found' USING ERRCODE = 'P0002';
+  END IF;
+  home_advantage := COALESCE((params->'baseline_stats'->>'avg_home_advantage')::float8, 50);
+
+  home_elo := home.current_elo;
+  away_elo := away.current_elo;
+  expected_home := 1 / (1 + power(10::float8, (away_elo - home_elo - home_advantage) / 400));
+  abs_gd := LEAST(abs(p_home_score - p_away_score), 4);
+
+  IF p_home_score <> p_away_score THEN
+    IF p_home_score > p_away_score THEN
+      winner_elo := home_elo; loser_elo := away_elo;
+    ELSE
+      winner_elo := away_elo; loser_elo := home_elo;
+    END IF;
+    IF winner_elo < loser_elo THEN
+      opponent_mult := LEAST(1.0 + (loser_elo - winner_elo) / 400, 2.0);
+    ELSE
+      opponent_mult := GREATEST(1.0 - (winner_elo - loser_elo) / 800, 0.6);
+    END IF;
+    -- Winner: opponent, venue, goal difference, form, goals conceded
+    win_k := (params->>'base_k_factor')::float8 * opponent_mult
+      * (params->'venue_multipliers'->>(CASE WHEN p_home_score > p_away_score THEN 'home_win' ELSE 'away_win' END))::float8
+      * COALESCE((params->'gd_multipliers'->'win'->>abs_gd::text)::float8, 1.5)
+      * elo_form_multiplier(params, CASE WHEN p_home_score > p_away_score THEN home.recent_form ELSE away.recent_form END)
+      * (params->'defensive_multipliers'->>(
+          CASE LEAST(p_home_score, p_away_score)
+            WHEN 0 THEN 'clean_sheet_win' WHEN 1 THEN 'win_concede_1' ELSE 'win_concede_2plus' END))::float8;
+  END IF;
+
+  -- Losing and drawing sides: venue, goal difference, form (and a shutout)
+  home_k := (params->>'base_k_factor')::float8 * (params->'venue_multipliers'->>'home_draw')::float8
+    * COALESCE((params->'gd_multipliers'->'loss'->>abs_gd::text)::float8, 0.7)
+    * elo_form_multiplier(params, home.recent_form);
+  away_k := (params->>'base_k_factor')::float8 * (params->'venue_multipliers'->>'away_draw')::float8
+    * COALESCE((params->'gd_multipliers'->'loss'->>abs_gd::text)::float8, 0.7)
+    * elo_form_multiplier(params, away.recent_form);
+
+  IF p_home_score > p_away_score THEN
+    home_k := win_k;
+    IF p_away_score = 0 THEN
+      away_k := away_k * (params->'defensive_multipliers'->>'shutout_loss')::float8;
+    END IF;
+    home_actual := (ARRAY[1.0, 1.0, 1.1, 1.2, 1.3])[abs_gd + 1];
+    away_actual := 0.0;
+  ELSIF p_home_score < p_away_score THEN
+    away_k := win_k;
+    IF p_home_score = 0 THEN
+      home_k := home_k * (params->'defensive_multipliers'->>'shutout_loss')::float8;
+    END IF;
+    home_actual := 0.0;
+    away_actual := (ARRAY[1.0, 1.0, 1.1, 1.2, 1.3])[abs_gd + 1];
+  ELSE
+    home_actual := 0.5;
+    away_actual := 0.5;
+  END IF;
+
+  home_change := LEAST(home_k, elo_k_cap(params, home_elo)) * (home_actual - expected_home);
+  away_change := LEAST(away_k, elo_k_cap(params, away_elo)) * (away_actual - (1 - expected_home));
+
+  UPDATE matches SET
+    home_team_score = p_home_score,
+    away_team_score = p_away_score,
+    home_team_winner = p_home_score > p_away_score,
+    away_team_winner = p_away_score > p_home_score,
+    home_elo_pre = home_elo,
+    away_elo_pre = away_elo,
+    home_elo_change = home_change,
+    away_elo_change = away_change,
+    home_elo_post = home_elo + home_change,
+    away_elo_post = away_elo + away_change,
+    is_completed = TRUE
+  WHERE id = m.id;
+
+  home_result := CASE WHEN p_home_score > p_away_score THEN 'W' WHEN p_home_score < p_away_score THEN 'L' ELSE 'D' END;
+  away_result := CASE home_result WHEN 'W' THEN 'L' WHEN 'L' THEN 'W' ELSE 'D' END;
+
+  UPDATE teams SET
+    current_elo = home_elo + home_change,
+    recent_form = right(recent_form || home_result, 5),
+    matches_played = matches_played + 1,
+    goals_for = goals_for + p_home_score,
+    goals_against = goals_against + p_away_score,
+    clean_sheets = clean_sheets + (p_away_score = 0)::int
+  WHERE id = home.id;
+
+  UPDATE teams SET
+    current_elo = away_elo + away_change,
+    recent_form = right(recent_form || away_result, 5),
+    matches_played = matches_played + 1,
+    goals_for = goals_for + p_away_score,
+    goals_against = goals_against + p_home_score,
+    clean_sheets = clean_sheets + (p_home_score = 0)::int
+  WHERE id = away.id;
+
+  DELETE FROM predictions WHERE event_id = p_event_id;
+
+  PERFORM standings_add(m.league_name, m.home_team_name, 'home', p_home_score, p_away_score);
+  PERFORM standings_add(m.league_name, m.away_team_name, 'away', p_away_score, p_home_score);
+
+  INSERT INTO elo_history (team_id, event_id, match_date, elo_pre, elo_post, delta)
+  VALUES (m.home_team_id, p_event_id, m.match_date, home_elo, home_elo + home_change, home_change),
+         (m.away_team_id, p_event_id, m.match_date, away_elo, away_elo + away_change, away_change)
+  ON CONFLICT (team_id, event_id) DO UPDATE SET
+    match_date = EXCLUDED.match_date,
+    elo_pre = EXCLUDED.elo_pre,
+    elo_post = EXCLUDED.elo_post,
+    delta = EXCLUDED.delta;
+
+  RETURN jsonb_build_object(
+    'event_id', p_event_id,
+    'home_team_name', m.home_team_name,
+    'away_team_name', m.away_team_name,
+    'home_elo_change', home_change,
+    'away_elo_change', away_change,
+    'home_elo_new', home_elo + home_change,
+    'away_elo_new', away_elo + away_change
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+-- apply_score() with every write rolled back: the same locks, work and result
+-- (scripts/apply_score.py --dry-run and --bench)
+CREATE OR REPLACE FUNCTION preview_score(p_event_id INTEGER, p_home_score INTEGER, p_away_score INTEGER)
+RETURNS JSONB AS $$
+DECLARE
+  result JSONB;
+BEGIN
+  BEGIN
+    result := apply_score(p_event_id, p_home_score, p_away_score);
+    RAISE EXCEPTION 'preview' USING ERRCODE = 'P0003';
+  EXCEPTION WHEN SQLSTATE 'P0003' THEN
+    NULL;
+  END;
+  RETURN result;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Score entry writes matches and teams: signed-in users and the service role only
+REVOKE EXECUTE ON FUNCTION apply_score(INTEGER, INTEGER, INTEGER) FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION apply_score(INTEGER, INTEGER, INTEGER) TO authenticated, service_role;
+REVOKE EXECUTE ON FUNCTION preview_score(INTEGER, INTEGER, INTEGER) FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION preview_score(INTEGER, INTEGER, INTEGER) TO authenticated, service_role;
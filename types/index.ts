@@ -149,6 +149,47 @@ export interface Season2025Data {
   promoted_teams: string[];
 }
 
+// One row of the elo_history table (team_id is the source team id)
+export interface EloHistoryEntry {
+  team_id: number;
+  event_id: number;
+  match_date: string;
+  elo_pre: number;
+  elo_post: number;
+  delta: number;
+}
+
+// One row of the standings table (current season, kept up to date per result)
+export interface StandingsEntry {
+  league_name: string;
+  team_name: string;
+  played: number;
+  won: number;
+  drawn: number;
+  lost: number;
+  goals_for: number;
+  goals_against: number;
+  goal_difference: number;
+  points: number;
+  clean_sheets: number;
+  home_played: number;
+  home_won: number;
+  home_drawn: number;
+  home_lost: number;
+  home_goals_for: number;
+  home_goals_against: number;
+  home_clean_sheets: number;
+  away_played: number;
+  away_won: number;
+  away_drawn: number;
+  away_lost: number;
+  away_goals_for: number;
+  away_goals_against: number;
+  away_clean_sheets: number;
+  streak_result: 'W' | 'D' | 'L' | null;
+  streak_length: number;
+}
+
 export interface DashboardStats {
   total_matches_played: number;
   total_predictions: number;